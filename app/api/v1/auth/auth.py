@@ -1,8 +1,13 @@
+import asyncio
+
 from fastapi import APIRouter, Depends, HTTPException, Request, status
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
+from loguru import logger
 from pydantic import BaseModel, EmailStr
 
+from app.core.auth_tokens import KeyUnavailable, TokenError, token_verifier
 from app.core.config import settings
+from app.core.metrics import metrics
 from app.core.supabase_client import supabase
 
 router = APIRouter()
@@ -15,22 +20,59 @@ class SignupLoginRequest(BaseModel):
     password: str
 
 
+def _user_from_claims(claims: dict) -> dict:
+    """The user payload handlers read (id, email, metadata), from verified access token claims"""
+    return {
+        "id": claims.get("sub"),
+        "email": claims.get("email"),
+        "phone": claims.get("phone"),
+        "role": claims.get("role"),
+        "aud": claims.get("aud"),
+        "app_metadata": claims.get("app_metadata") or {},
+        "user_metadata": claims.get("user_metadata") or {},
+        "is_anonymous": bool(claims.get("is_anonymous")),
+    }
+
+
+def _user_from_remote(user) -> dict:
+    """The same payload from the `User` Supabase's auth server returns"""
+    claims = {field: getattr(user, field, None) for field in ("email", "phone", "role", "aud", "app_metadata", "user_metadata", "is_anonymous")}
+    return _user_from_claims({**claims, "sub": str(user.id)})
+
+
 async def get_current_user(request: Request, credentials: HTTPAuthorizationCredentials = Depends(bearer_scheme)):
-    """Verify token with Supabase and return the user payload using supabase-py library."""
+    """Verify the token locally (signature, expiry, audience) and return the user payload.
+
+    Tokens no local key can check go to Supabase (`auth.get_user`) when
+    AUTH_REMOTE_FALLBACK is set; the payload has the same keys either way.
+    """
     token = credentials.credentials
 
+    if settings.AUTH_LOCAL_VERIFY:
+        try:
+            claims = await token_verifier.verify(token)
+            metrics.inc("auth.local")
+            return _user_from_claims(claims)
+        except TokenError as e:
+            raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail=f"Invalid or expired token: {e}")
+        except KeyUnavailable as e:
+            if not settings.AUTH_REMOTE_FALLBACK:
+                raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail=f"Invalid or expired token: {e}")
+            logger.debug(f"Local token verification unavailable ({e}); asking Supabase")
+
     if not settings.SUPABASE_URL or not settings.SUPABASE_KEY:
         raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail="SUPABASE_URL or SUPABASE_KEY not configured")
 
     try:
-        user = supabase.auth.get_user(token)
+        metrics.inc("auth.remote")
+        user = await asyncio.to_thread(supabase.auth.get_user, token)
     except Exception as e:
         raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail=f"Invalid or expired token: {str(e)}")
 
     if not user or not getattr(user, "user", None):
         raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Invalid or expired token")
 
-    return user.user
+    return _user_from_remote(user.user)
 
 
 @router.get("/me")
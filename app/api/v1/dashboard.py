@@ -1,90 +1,66 @@
 """
 Dashboard API
 Provides aggregated summaries and simple metrics for UI consumption.
-This implementation uses in-memory activity store from `tracking` (Phase 1).
+This implementation uses the in-memory activity store from `tracking` (Phase 1),
+aggregating over its per-user columnar index.
 """
 
-from fastapi import APIRouter, HTTPException, Query
+from fastapi import APIRouter, Query
 from typing import Literal
-from collections import defaultdict
-from datetime import datetime, timedelta
+from time import time
+import numpy as np
 from loguru import logger
 
 from app.api.v1 import tracking
 
 router = APIRouter()
 
+PERIOD_SECONDS = {"daily": 24 * 3600, "weekly": 7 * 24 * 3600}
 
-def _within_period(ts: float, period: Literal["daily", "weekly"]) -> bool:
-    """Check if timestamp (seconds) is within the requested period from now."""
-    now = datetime.utcnow()
-    dt = datetime.fromtimestamp(ts)
-    if period == "daily":
-        return dt >= (now - timedelta(days=1))
-    return dt >= (now - timedelta(days=7))
+
+def _period_start(period: Literal["daily", "weekly"]) -> float:
+    """Epoch seconds at the start of the requested period, counting back from now."""
+    return time() - PERIOD_SECONDS[period]
+
+
+def _sum_by_code(codes: np.ndarray, weights: np.ndarray):
+    """Group `weights` by interned code, skipping missing (-1) codes.
+
+    Returns (unique_codes, sums) in code order; cost is proportional to the window.
+    """
+    mask = codes >= 0
+    uniq, inverse = np.unique(codes[mask], return_inverse=True)
+    return uniq, np.bincount(inverse, weights=weights[mask], minlength=len(uniq))
 
 
 @router.get("/summary/{user_id}")
 async def summary(user_id: str, period: Literal["daily", "weekly"] = Query("weekly")):
     """Return aggregated summary for a user: total time per site, category proportions, sentiment mix."""
-    items = tracking.ACTIVITY_STORE.get(user_id, [])
-    if not items:
+    win = tracking.ACTIVITY_STORE.window(user_id, since=_period_start(period))
+    if win is None:
         return {"user_id": user_id, "period": period, "summary": {}}
 
-    total_time = 0.0
-    time_per_site = defaultdict(float)
-    category_counts = defaultdict(float)
-    sentiment_counts = defaultdict(int)
-    counted = 0
-
-    for rec in items:
-        ts = rec.get("received_at") or rec.get("end_ts") or rec.get("start_ts")
-        if ts is None:
-            continue
-        try:
-            tsf = float(ts)
-        except Exception:
-            continue
-        if not _within_period(tsf, period):
-            continue
-
-        counted += 1
-        dur = rec.get("duration_seconds") or 0.0
-        try:
-            dur = float(dur)
-        except Exception:
-            dur = 0.0
-        total_time += dur
-        site = rec.get("url") or "unknown"
-        time_per_site[site] += dur
-
-        cat = rec.get("category_override") or rec.get("classified_category")
-        if cat:
-            category_counts[cat] += dur if dur > 0 else 1
-
-        sent = None
-        s = rec.get("sentiment")
-        if isinstance(s, dict):
-            sent = s.get("label") or s.get("sentiment")
-        elif isinstance(s, str):
-            sent = s
-        if sent:
-            sentiment_counts[sent] += 1
+    dur = win.duration
+    total_time = float(dur.sum())
 
     # Build top sites list
-    top_sites = sorted(time_per_site.items(), key=lambda x: x[1], reverse=True)[:20]
+    site_codes, site_time = _sum_by_code(win.site, dur)
+    top = np.argsort(-site_time, kind="stable")[:20]
+    top_sites = [(win.label(site_codes[i]), float(site_time[i])) for i in top]
 
-    # Category proportions
-    total_cat = sum(category_counts.values()) or 1
-    categories = [{"category": k, "value": v, "proportion": v / total_cat} for k, v in category_counts.items()]
+    # Category proportions (records without a duration count once)
+    cat_codes, cat_values = _sum_by_code(win.category, np.where(dur > 0, dur, 1.0))
+    total_cat = float(cat_values.sum()) or 1
+    categories = [{"category": win.label(c), "value": float(v), "proportion": float(v) / total_cat} for c, v in zip(cat_codes, cat_values)]
 
     # Sentiment breakdown
-    total_sent = sum(sentiment_counts.values()) or 1
-    sentiments = [{"sentiment": k, "count": v, "proportion": v / total_sent} for k, v in sentiment_counts.items()]
+    sent_codes, sent_counts = _sum_by_code(win.sentiment, np.ones(len(dur)))
+    total_sent = float(sent_counts.sum()) or 1
+    sentiments = [{"sentiment": win.label(c), "count": int(v), "proportion": float(v) / total_sent} for c, v in zip(sent_codes, sent_counts)]
 
     summary = {
         "period": period,
-        "records_counted": counted,
+        "records_counted": int(len(dur)),
         "total_time_seconds": total_time,
         "top_sites": [{"site": s, "time_seconds": t} for s, t in top_sites],
         "categories": categories,
@@ -98,24 +74,29 @@ async def summary(user_id: str, period: Literal["daily", "weekly"] = Query("week
 @router.get("/sites/{user_id}")
 async def sites_table(user_id: str, limit: int = Query(100, ge=1, le=1000)):
     """Return table-like list of sites with aggregated time and category for UI table view."""
-    items = tracking.ACTIVITY_STORE.get(user_id, [])
-    agg = defaultdict(lambda: {"time": 0.0, "visits": 0, "category": None})
-
-    for rec in items:
-        site = rec.get("url") or "unknown"
-        dur = rec.get("duration_seconds") or 0.0
-        try:
-            dur = float(dur)
-        except Exception:
-            dur = 0.0
-        agg[site]["time"] += dur
-        agg[site]["visits"] += 1
-        if not agg[site]["category"]:
-            agg[site]["category"] = rec.get("category_override") or rec.get("classified_category")
-
-    rows = []
-    for site, data in agg.items():
-        rows.append({"site": site, "time_seconds": data["time"], "visits": data["visits"], "category": data["category"]})
-
-    rows = sorted(rows, key=lambda r: r["time_seconds"], reverse=True)[:limit]
+    win = tracking.ACTIVITY_STORE.window(user_id)
+    if win is None or not len(win.site):
+        return {"user_id": user_id, "sites": []}
+
+    site_codes, inverse = np.unique(win.site, return_inverse=True)
+    time_per_site = np.bincount(inverse, weights=win.duration, minlength=len(site_codes))
+    visits = np.bincount(inverse, minlength=len(site_codes))
+
+    # First known category per site, in ingest order
+    first_category = np.full(len(site_codes), -1, dtype=np.int64)
+    has_cat = np.flatnonzero(win.category >= 0)
+    if len(has_cat):
+        cat_sites, first = np.unique(inverse[has_cat], return_index=True)
+        first_category[cat_sites] = win.category[has_cat[first]]
+
+    order = np.argsort(-time_per_site, kind="stable")[:limit]
+    rows = [
+        {
+            "site": win.label(site_codes[i]),
+            "time_seconds": float(time_per_site[i]),
+            "visits": int(visits[i]),
+            "category": win.label(first_category[i]),
+        }
+        for i in order
+    ]
     return {"user_id": user_id, "sites": rows}
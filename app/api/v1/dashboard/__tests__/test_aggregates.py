@@ -0,0 +1,127 @@
+"""
+Dashboard aggregate functions against a real Postgres + PostgREST.
+
+Start the local stack from docker-compose.yml (`--profile test`) and set
+TEST_POSTGREST_URL=http://localhost:3001; skipped otherwise.
+"""
+
+import asyncio
+import os
+import random
+import uuid
+from datetime import datetime, timedelta, timezone
+
+import pytest
+
+from app.api.v1.dashboard import aggregates
+
+POSTGREST_URL = os.environ.get("TEST_POSTGREST_URL")
+pytestmark = pytest.mark.skipif(not POSTGREST_URL, reason="TEST_POSTGREST_URL not set")
+
+SESSIONS = 2500  # well past PostgREST's 1000-row cap
+
+
+@pytest.fixture
+def run():
+    # One loop per test: the client's pooled connections belong to it
+    loop = asyncio.new_event_loop()
+    yield loop.run_until_complete
+    loop.close()
+
+
+@pytest.fixture
+def client(run):
+    from postgrest import AsyncPostgrestClient
+
+    c = AsyncPostgrestClient(POSTGREST_URL)
+    yield c
+    run(c.aclose())
+
+
+@pytest.fixture
+def seeded(client, run):
+    rng = random.Random(7)
+    user_id = str(uuid.uuid4())
+    run(client.rpc("test_create_user", {"p_id": user_id}).execute())
+    start = datetime(2025, 3, 3, tzinfo=timezone.utc)
+    sessions = []
+    for i in range(SESSIONS):
+        st = start + timedelta(seconds=rng.uniform(0, 7 * 86400))
+        domain = rng.choice(["github.com", "youtube.com", "news.site"])
+        sessions.append({
+            "user_id": user_id,
+            "url": f"https://{domain}/{i % 50}",
+            "domain": domain,
+            "start_time": st.isoformat(),
+            "end_time": (st + timedelta(seconds=rng.choice([rng.uniform(1, 600), -10]))).isoformat(),
+        })
+    run(client.table("page_view_sessions").insert(sessions).execute())
+    run(client.table("user_domain_categories").insert([
+        {"user_id": user_id, "domain_pattern": "github", "category": "productive"},
+        {"user_id": user_id, "domain_pattern": "youtube", "category": "Entertainment"},
+    ]).execute())
+    run(client.table("content_analysis").insert([
+        {"user_id": user_id, "page_url": f"https://news.site/{i}", "happy_score": 0.5, "sad_score": 0.25,
+         "system_suggested_category": "News", "scraped_at": (start + timedelta(days=1)).isoformat()}
+        for i in range(10)
+    ]).execute())
+    yield user_id, start, sessions
+    run(client.table("profiles").delete().eq("id", user_id).execute())  # cascades to the user's rows
+
+
+def _seconds(s):
+    st, et = datetime.fromisoformat(s["start_time"]), datetime.fromisoformat(s["end_time"])
+    return max(0.0, (et - st).total_seconds())
+
+
+def test_category_seconds_counts_every_session(client, run, seeded):
+    user_id, start, sessions = seeded
+    rows = run(aggregates.category_seconds(user_id, start, start + timedelta(days=7), use_analysis=False, client=client))
+
+    assert sum(r["sessions"] for r in rows) == SESSIONS
+    assert sum(r["seconds"] for r in rows) == pytest.approx(sum(_seconds(s) for s in sessions))
+    by_cat = {}
+    for r in rows:
+        by_cat[r["category"]] = by_cat.get(r["category"], 0.0) + r["seconds"]
+    expected_news = sum(_seconds(s) for s in sessions if s["domain"] == "news.site")
+    assert by_cat["uncategorized"] == pytest.approx(expected_news)
+    assert len({r["day"] for r in rows}) == 7
+
+
+def test_category_seconds_prefers_content_analysis(client, run, seeded):
+    user_id, start, sessions = seeded
+    rows = run(aggregates.category_seconds(user_id, start, start + timedelta(days=7), use_analysis=True, client=client))
+    analysed = {f"https://news.site/{i}" for i in range(10)}
+    expected = sum(_seconds(s) for s in sessions if s["url"] in analysed)
+    assert sum(r["seconds"] for r in rows if r["category"] == "News") == pytest.approx(expected)
+
+
+def test_domain_seconds_and_content_summary(client, run, seeded):
+    user_id, start, sessions = seeded
+    end = start + timedelta(days=7)
+    domains = run(aggregates.domain_seconds(user_id, start, end, client=client))
+    assert sum(r["seconds"] for r in domains if r["domain"] == "youtube.com") == pytest.approx(
+        sum(_seconds(s) for s in sessions if s["domain"] == "youtube.com")
+    )
+    [news] = run(aggregates.content_summary(user_id, start, end, client=client))
+    assert (news["category"], news["docs"]) == ("news", 10)
+    assert news["happy"] == pytest.approx(5.0) and news["sad"] == pytest.approx(2.5)
+
+
+def test_daily_rollups_follow_inserts_and_rebuild(client, run, seeded):
+    user_id, start, sessions = seeded
+    end = start + timedelta(days=7)
+    # Maintained by the triggers as the fixture inserted sessions and analyses
+    rows = run(aggregates.daily_rollups(user_id, start, end, client=client))
+    assert sum(r["sessions"] for r in rows) == SESSIONS
+    assert sum(r["seconds"] for r in rows) == pytest.approx(sum(_seconds(s) for s in sessions))
+
+    # Sessions written before their analysis are re-categorised by a rebuild
+    run(client.rpc("rebuild_user_daily_rollups", {"p_user_id": user_id}).execute())
+    rebuilt = run(aggregates.daily_rollups(user_id, start, end, client=client))
+    expected = run(aggregates.category_seconds(user_id, start, end, use_analysis=True, client=client))
+    by_key = {(r["day"], r["category"]): r["seconds"] for r in rebuilt if r["sessions"]}
+    assert by_key == {(r["day"], r["category"]): pytest.approx(r["seconds"]) for r in expected}
+    [news] = aggregates.content_from_rollups(rebuilt)
+    assert (news["category"], news["docs"]) == ("news", 10)
+    assert news["happy"] == pytest.approx(5.0) and news["sad"] == pytest.approx(2.5)
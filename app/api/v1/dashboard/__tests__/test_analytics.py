@@ -0,0 +1,39 @@
+from datetime import datetime, timezone
+
+import pytest
+
+from app.api.v1.dashboard import analytics
+
+START = datetime(2025, 3, 3, tzinfo=timezone.utc)
+
+
+def bucket_for(cat):
+    return {"work": "productive", "chat": "social"}.get(cat)
+
+
+def test_from_rows_totals_and_daily():
+    rows = [
+        {"day": "2025-03-03", "category": "work", "seconds": 60},
+        {"day": "2025-03-04", "category": "chat", "seconds": 60.5},
+        {"day": "2025-03-04", "category": "news", "seconds": 10},  # no bucket: total only
+        {"day": "2025-03-10", "category": "work", "seconds": 10},  # next week
+    ]
+    usage = analytics.from_rows(rows, START, bucket_for)
+    assert usage.day.tolist() == [0, 1, 1, 7]
+    assert analytics.totals(usage) == pytest.approx({"total": 140.5, "productive": 70.0, "social": 60.5, "entertainment": 0.0})
+    stacks = analytics.daily(usage, 7)
+    assert stacks.shape == (7, 3)
+    assert stacks[0].tolist() == [60.0, 0.0, 0.0] and stacks[1].tolist() == [0.0, 60.5, 0.0]
+
+
+def test_rows_outside_the_period():
+    rows = [
+        {"day": "2025-03-09", "category": "chat", "seconds": 5},
+        {"day": "2025-03-02", "category": "work", "seconds": 7},  # previous period: totals only
+        {"day": None, "category": "other", "seconds": 1},
+    ]
+    usage = analytics.from_rows(rows, START, bucket_for)
+    assert usage.day.tolist() == [6, -1, -1]
+    assert analytics.daily(usage, 7).sum() == 5
+    assert analytics.totals(usage)["total"] == 13
+    assert analytics.pct_change(150, 100) == 50.0 and analytics.pct_change(1, 0) == 0.0
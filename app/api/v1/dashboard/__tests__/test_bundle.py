@@ -0,0 +1,67 @@
+from datetime import timedelta
+
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from app.api.v1.auth.auth import get_current_user
+from app.api.v1.dashboard import aggregates, bundle, dal
+from app.core.config import settings
+from app.core.response_cache import ACTIVITY, dashboard_cache, data_versions
+
+USER = {"id": "user-bundle-test", "email": "u@example.com", "user_metadata": {}}
+
+
+def _client(monkeypatch):
+    calls = []
+
+    def fake_rollups(user_id, start, end, client=None):
+        calls.append("rollups")
+        last_day = (end - timedelta(days=1)).date().isoformat()
+        return [{"day": last_day, "category": "productive", "seconds": 600.0 * calls.count("rollups")}]
+
+    def fake_limits(user_id):
+        calls.append("limits")
+        return [{"domain": "example.com", "allowed_minutes": 5}]
+
+    def fake_domain_seconds(user_id, start, end, client=None):
+        calls.append("domains")
+        return [{"day": (end - timedelta(days=1)).date().isoformat(), "domain": "example.com", "seconds": 600.0}]
+
+    monkeypatch.setattr(aggregates, "daily_rollups", fake_rollups)
+    monkeypatch.setattr(aggregates, "domain_seconds", fake_domain_seconds)
+    monkeypatch.setattr(dal, "domain_limits", fake_limits)
+    monkeypatch.setattr(dal, "recent_session_domains", lambda user_id, limit: [{"domain": "example.com"}])
+    monkeypatch.setattr(dal, "domain_patterns", lambda user_id: [])
+    monkeypatch.setattr(settings, "DASHBOARD_USE_ROLLUPS", True)
+    dashboard_cache._entries.clear()
+    app = FastAPI()
+    app.include_router(bundle.router, prefix="/dashboard/bundle")
+    app.dependency_overrides[get_current_user] = lambda: USER
+    return TestClient(app), calls
+
+
+def test_sections_share_reads(monkeypatch):
+    client, calls = _client(monkeypatch)
+
+    resp = client.get("/dashboard/bundle")
+    assert resp.status_code == 200
+    body = resp.json()
+    assert set(body) == {"timeRange", "dashboard", "insights", "settings"}
+    assert body["settings"]["websites"] == [{"name": "example.com", "category": None, "limit": 5}]
+    assert sorted(calls) == ["domains", "limits", "rollups"]
+
+    not_modified = client.get("/dashboard/bundle", headers={"If-None-Match": resp.headers["etag"]})
+    assert not_modified.status_code == 304 and len(calls) == 3
+
+    data_versions.bump(USER["id"], ACTIVITY)
+    changed = client.get("/dashboard/bundle", headers={"If-None-Match": resp.headers["etag"]})
+    assert changed.status_code == 200 and changed.headers["etag"] != resp.headers["etag"]
+
+
+def test_section_selection(monkeypatch):
+    client, calls = _client(monkeypatch)
+
+    resp = client.get("/dashboard/bundle", params={"sections": "settings"})
+    assert set(resp.json()) == {"timeRange", "settings"} and calls == ["limits"]
+
+    assert client.get("/dashboard/bundle", params={"sections": "settings,nope"}).status_code == 400
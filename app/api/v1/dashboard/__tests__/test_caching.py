@@ -0,0 +1,61 @@
+from datetime import timedelta
+
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from app.api.v1.auth.auth import get_current_user
+from app.api.v1.dashboard import aggregates, dashboard
+from app.core.config import settings
+from app.core.response_cache import ACTIVITY, SETTINGS, dashboard_cache, data_versions
+
+USER = {"id": "user-cache-test", "email": "u@example.com", "user_metadata": {}}
+
+
+def _client(monkeypatch):
+    calls = []
+
+    def fake_rollups(user_id, start, end, client=None):
+        calls.append((start, end))
+        last_day = (end - timedelta(days=1)).date().isoformat()
+        return [{"day": last_day, "category": "productive", "seconds": 60.0 * len(calls)}]
+
+    monkeypatch.setattr(aggregates, "daily_rollups", fake_rollups)
+    monkeypatch.setattr(settings, "DASHBOARD_USE_ROLLUPS", True)
+    dashboard_cache._entries.clear()
+    app = FastAPI()
+    app.include_router(dashboard.router, prefix="/dashboard")
+    app.dependency_overrides[get_current_user] = lambda: USER
+    return TestClient(app), calls
+
+
+def test_cached_until_activity_changes_and_revalidates_with_etag(monkeypatch):
+    client, calls = _client(monkeypatch)
+
+    first = client.get("/dashboard")
+    assert first.status_code == 200 and len(calls) == 1
+    etag = first.headers["etag"]
+
+    again = client.get("/dashboard")
+    assert again.json() == first.json() and len(calls) == 1
+
+    not_modified = client.get("/dashboard", headers={"If-None-Match": etag})
+    assert not_modified.status_code == 304 and not not_modified.content
+    assert len(calls) == 1
+
+    data_versions.bump(USER["id"], ACTIVITY)
+    changed = client.get("/dashboard", headers={"If-None-Match": etag})
+    assert changed.status_code == 200 and len(calls) == 2
+    assert changed.headers["etag"] != etag
+
+
+def test_closed_period_ignores_new_activity(monkeypatch):
+    client, calls = _client(monkeypatch)
+
+    client.get("/dashboard", params={"timeRange": "last_week"})
+    data_versions.bump(USER["id"], ACTIVITY)
+    client.get("/dashboard", params={"timeRange": "last_week"})
+    assert len(calls) == 1
+
+    data_versions.bump(USER["id"], SETTINGS)
+    client.get("/dashboard", params={"timeRange": "last_week"})
+    assert len(calls) == 2
@@ -0,0 +1,63 @@
+import asyncio
+import threading
+import time
+
+import pytest
+
+from app.api.v1.dashboard.dal import QueryBatch
+
+
+def test_query_batch_runs_concurrently_within_limit():
+    lock = threading.Lock()
+    in_flight = peak = 0
+
+    def query(i):
+        nonlocal in_flight, peak
+        with lock:
+            in_flight += 1
+            peak = max(peak, in_flight)
+        time.sleep(0.05)
+        with lock:
+            in_flight -= 1
+        return i
+
+    async def main():
+        batch = QueryBatch(limit=3)
+        return await batch.gather(*(batch.run(query, i) for i in range(6)))
+
+    started = time.perf_counter()
+    assert asyncio.run(main()) == list(range(6))
+    elapsed = time.perf_counter() - started
+    assert peak == 3
+    assert elapsed < 0.25  # two waves of 50ms, not six
+
+
+def test_query_batch_propagates_failures():
+    def boom():
+        raise RuntimeError("query failed")
+
+    async def main():
+        batch = QueryBatch(limit=2)
+        await batch.gather(batch.run(lambda: 1), batch.run(boom))
+
+    with pytest.raises(RuntimeError):
+        asyncio.run(main())
+
+
+def test_query_batch_awaits_async_queries_on_the_loop():
+    in_flight = peak = 0
+
+    async def query(i):
+        nonlocal in_flight, peak
+        in_flight += 1
+        peak = max(peak, in_flight)
+        await asyncio.sleep(0.02)
+        in_flight -= 1
+        return threading.current_thread() is threading.main_thread()
+
+    async def main():
+        batch = QueryBatch(limit=2)
+        return await batch.gather(*(batch.run(query, i) for i in range(4)))
+
+    assert asyncio.run(main()) == [True] * 4
+    assert peak == 2
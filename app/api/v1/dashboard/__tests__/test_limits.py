@@ -0,0 +1,35 @@
+from datetime import datetime, timezone
+
+import pytest
+
+from app.api.v1.dashboard import limits
+
+START = datetime(2025, 3, 3, tzinfo=timezone.utc)
+
+
+def test_limits_evaluated_per_day_against_matching_domains():
+    rows = [
+        {"day": "2025-03-03", "domain": "www.YouTube.com", "seconds": 900},
+        {"day": "2025-03-03", "domain": "m.youtube.com", "seconds": 400},
+        {"day": "2025-03-05", "domain": "www.youtube.com", "seconds": 300},
+        {"day": "2025-03-05", "domain": "github.com", "seconds": 5000},
+        {"day": "2025-03-10", "domain": "www.youtube.com", "seconds": 99999},  # after the period
+    ]
+    usage = limits.usage_index(rows, START, 7)
+    assert usage.daily.shape == (3, 7)
+
+    yt, empty, hub = limits.evaluate(
+        [{"domain": "YouTube.com", "allowed_minutes": 20}, {"domain": "", "allowed_minutes": 1}, {"domain": "hub", "allowed_minutes": 0}],
+        usage,
+    )
+    assert yt.domain == "youtube.com" and yt.allowed_seconds_per_day == 1200
+    assert yt.used_seconds == pytest.approx(1600)
+    assert yt.daily_seconds.tolist() == [1300, 0, 300, 0, 0, 0, 0]
+    assert yt.days_over == 1
+    assert empty.used_seconds == 0
+    assert hub.used_seconds == 5000 and hub.days_over == 0  # no allowance, no per-day verdict
+
+
+def test_no_usage():
+    [lim] = limits.evaluate([{"domain": "x.com", "allowed_minutes": 5}], limits.usage_index([], START, 7))
+    assert lim.used_seconds == 0 and lim.days_over == 0
@@ -0,0 +1,81 @@
+import asyncio
+from datetime import datetime, timedelta, timezone
+
+from app.api.v1.dashboard import stream
+from app.core.dashboard_events import ACTIVITY, REFRESH, DashboardEvents
+
+
+class _Request:
+    async def is_disconnected(self):
+        return False
+
+
+def _session(day, seconds, domain="twitter.com", category="Social"):
+    return {"day": day, "category": category, "domain": domain, "seconds": seconds}
+
+
+def test_feed_resumes_from_last_id_and_reports_gaps():
+    events = DashboardEvents(buffer_size=2)
+
+    async def main():
+        with events.subscribe("u1"):
+            events.publish("u2", ACTIVITY, {})  # nobody watching u2: dropped
+            for i in range(3):
+                events.publish("u1", ACTIVITY, {"i": i})
+        return events.since("u1", 1), events.since("u1", 0), events.since("u2", 0)
+
+    (replay, complete), (_, resumable), (_, watched) = asyncio.run(main())
+    assert [e.data["i"] for e in replay] == [1, 2] and complete
+    assert not resumable  # the first event fell out of the two-event buffer
+    assert not watched
+    assert events.parse_id(events.event_id(7)) == 7
+    assert events.parse_id("0-7") is None  # another process
+
+
+def test_state_counts_deltas_and_raises_limit_alert_once():
+    start, end = stream._get_time_range("this_week")
+    today = datetime.now(timezone.utc).date().isoformat()
+    state = stream._StreamState(
+        start, end, seeded_seq=5,
+        rows=[{"day": today, "category": "productive", "seconds": 300.0}],
+        limits=[{"domain": "twitter.com", "allowed_minutes": 1}],
+        today_rows=[{"day": today, "domain": "twitter.com", "seconds": 30.0}],
+    )
+
+    # Already in the seed reads: reported, not counted
+    (kind, data), = state.apply(5, [_session(today, 40.0)])
+    assert kind == ACTIVITY and data["totals"]["social"] == 0
+
+    (_, data), (kind, alert) = state.apply(6, [_session(today, 40.0)])
+    assert data["added"] == [{"day": today, "bucket": "social", "seconds": 40.0}]
+    assert data["totals"] == {"total": 340, "productive": 300, "social": 40, "entertainment": 0}
+    assert data["shares"]["social"] == round(40 * 100.0 / 340, 2)
+    assert kind == stream.ALERT and alert["domain"] == "twitter.com"
+
+    assert [k for k, _ in state.apply(7, [_session(today, 40.0)])] == [ACTIVITY]
+    next_week = (end + timedelta(days=1)).date().isoformat()
+    assert state.apply(8, [_session(next_week, 1.0)]) == [(REFRESH, {"reason": "period"})]
+
+
+def test_stream_pushes_published_deltas(monkeypatch):
+    events = DashboardEvents()
+    monkeypatch.setattr(stream, "dashboard_events", events)
+    start, end = stream._get_time_range("this_week")
+    today = datetime.now(timezone.utc).date().isoformat()
+
+    async def load(user_id):
+        return stream._StreamState(start, end, events.last_seq(), [], [], [])
+
+    monkeypatch.setattr(stream._StreamState, "load", load)
+
+    async def main():
+        gen = stream._events(_Request(), "u1", None)
+        assert (await gen.__anext__()).startswith("retry:")
+        events.publish("u1", ACTIVITY, {"sessions": [_session(today, 12.0)]})
+        message = await asyncio.wait_for(gen.__anext__(), timeout=1)
+        await gen.aclose()
+        return message
+
+    message = asyncio.run(main())
+    assert message.startswith(f"id: {events.event_id(1)}\nevent: activity\n")
+    assert '"social":12' in message
@@ -0,0 +1,166 @@
+"""
+Dashboard Aggregates
+Thin wrappers over the SQL functions in docs/dashboard_functions.sql and the
+user_daily_rollups table (docs/dashboard_rollups.sql). The database does the
+per-session work (timestamps, durations, categorisation) and the handlers
+only receive a few aggregated rows per period. Queries are awaited on the
+shared async PostgREST client (app/core/database.py), or run as prepared
+statements on the direct backend's pool; pass `client=` to run them
+against another PostgREST client.
+"""
+
+from datetime import date, datetime
+from typing import Callable, Dict, List, Optional, Tuple
+
+from fastapi import HTTPException
+from loguru import logger
+
+from app.core.database import db
+
+# PostgREST caps every response (RPCs included) at max-rows; page through anything larger
+RPC_PAGE_SIZE = 1000
+
+ROLLUP_COLUMNS = "day,category,seconds,sessions,docs,happy_sum,sad_sum,angry_sum,neutral_sum"
+
+# The same reads on the direct backend. asyncpg prepares each fixed text once per connection
+CATEGORY_SECONDS_SQL = (
+    "SELECT day, category, seconds, sessions FROM public.dashboard_category_seconds($1::uuid, $2, $3, $4)"
+    " ORDER BY day, category"
+)
+DOMAIN_SECONDS_SQL = (
+    "SELECT day, domain, seconds, sessions FROM public.dashboard_domain_seconds($1::uuid, $2, $3)"
+    " ORDER BY day, domain"
+)
+CONTENT_SUMMARY_SQL = (
+    "SELECT category, docs, happy, sad, angry, neutral FROM public.dashboard_content_summary($1::uuid, $2, $3)"
+    " ORDER BY category"
+)
+ROLLUPS_SQL = (
+    f"SELECT {ROLLUP_COLUMNS.replace(',', ', ')} FROM public.user_daily_rollups"
+    " WHERE user_id = $1::uuid AND day >= $2 AND day < $3 ORDER BY day, category"
+)
+
+
+def _client_or_default(client=None):
+    """`client`, else the shared one; 503 when none is configured"""
+    if client is not None:
+        return client
+    if not db.configured:
+        raise HTTPException(status_code=503, detail="Supabase client not configured")
+    return db.client
+
+
+async def _paged_rows(name: str, make_query: Callable, order: List[str], client=None) -> List[Dict]:
+    client = _client_or_default(client)
+    rows: List[Dict] = []
+    offset = 0
+    while True:
+        query = make_query(client)
+        for column in order:
+            query = query.order(column)
+        try:
+            resp = await query.range(offset, offset + RPC_PAGE_SIZE - 1).execute()
+        except Exception as e:
+            logger.warning(f"Dashboard aggregate {name} failed: {e}")
+            raise HTTPException(status_code=502, detail="Failed to fetch dashboard aggregates")
+        page = getattr(resp, "data", []) or []
+        rows.extend(page)
+        if len(page) < RPC_PAGE_SIZE:
+            return rows
+        offset += RPC_PAGE_SIZE
+
+
+def _direct(client) -> bool:
+    return client is None and db.direct
+
+
+async def _direct_rows(name: str, sql: str, *args) -> List[Dict]:
+    try:
+        return await db.pg.fetch(sql, *args)
+    except Exception as e:
+        logger.warning(f"Dashboard aggregate {name} failed: {e}")
+        raise HTTPException(status_code=502, detail="Failed to fetch dashboard aggregates")
+
+
+async def _rpc_rows(fn: str, params: Dict, order: List[str], client=None) -> List[Dict]:
+    return await _paged_rows(fn, lambda c: c.rpc(fn, params), order, client)
+
+
+def _period(user_id: str, start: datetime, end: datetime) -> Dict:
+    return {"p_user_id": user_id, "p_start": start.isoformat(), "p_end": end.isoformat()}
+
+
+async def category_seconds(user_id: str, start: datetime, end: datetime, use_analysis: bool = True, client=None) -> List[Dict]:
+    """[{day, category, seconds, sessions}] per UTC day x fine category"""
+    if _direct(client):
+        return await _direct_rows("dashboard_category_seconds", CATEGORY_SECONDS_SQL, user_id, start, end, use_analysis)
+    params = dict(_period(user_id, start, end), p_use_analysis=use_analysis)
+    return await _rpc_rows("dashboard_category_seconds", params, ["day", "category"], client)
+
+
+async def domain_seconds(user_id: str, start: datetime, end: datetime, client=None) -> List[Dict]:
+    """[{day, domain, seconds, sessions}] per UTC day x lowercased domain"""
+    if _direct(client):
+        return await _direct_rows("dashboard_domain_seconds", DOMAIN_SECONDS_SQL, user_id, start, end)
+    return await _rpc_rows("dashboard_domain_seconds", _period(user_id, start, end), ["day", "domain"], client)
+
+
+async def content_summary(user_id: str, start: datetime, end: datetime, client=None) -> List[Dict]:
+    """[{category, docs, happy, sad, angry, neutral}] per lowercased content category"""
+    if _direct(client):
+        return await _direct_rows("dashboard_content_summary", CONTENT_SUMMARY_SQL, user_id, start, end)
+    return await _rpc_rows("dashboard_content_summary", _period(user_id, start, end), ["category"], client)
+
+
+async def daily_rollups(user_id: str, start: datetime, end: datetime, client=None) -> List[Dict]:
+    """
+    [{day, category, seconds, sessions, docs, happy_sum, ...}] from
+    user_daily_rollups for the UTC days in [start, end). Sessions are counted
+    under the category they had when written (see docs/dashboard_rollups.sql).
+    """
+    if _direct(client):
+        return await _direct_rows("user_daily_rollups", ROLLUPS_SQL, user_id, start.date(), end.date())
+
+    def make_query(c):
+        return (
+            c.table("user_daily_rollups")
+            .select(ROLLUP_COLUMNS)
+            .eq("user_id", user_id)
+            .gte("day", start.date().isoformat())
+            .lt("day", end.date().isoformat())
+        )
+
+    return await _paged_rows("user_daily_rollups", make_query, ["day", "category"], client)
+
+
+def split_at(rows: List[Dict], boundary: datetime) -> Tuple[List[Dict], List[Dict]]:
+    """(rows before the boundary's day, rows from it on)"""
+    cut = boundary.date()
+    before: List[Dict] = []
+    after: List[Dict] = []
+    for r in rows:
+        day = day_of(r)
+        (after if day is not None and day >= cut else before).append(r)
+    return before, after
+
+
+def content_from_rollups(rows: List[Dict]) -> List[Dict]:
+    """Rollup rows folded into content_summary's shape (per lowercased category)"""
+    out: Dict[str, Dict] = {}
+    for r in rows:
+        docs = int(r.get("docs") or 0)
+        if docs <= 0:
+            continue
+        cat = (r.get("category") or "other").lower()
+        acc = out.setdefault(cat, {"category": cat, "docs": 0, "happy": 0.0, "sad": 0.0, "angry": 0.0, "neutral": 0.0})
+        acc["docs"] += docs
+        for emotion in ("happy", "sad", "angry", "neutral"):
+            acc[emotion] += float(r.get(f"{emotion}_sum") or 0)
+    return list(out.values())
+
+
+def day_of(row: Dict) -> Optional[date]:
+    try:
+        return date.fromisoformat(row["day"])
+    except (KeyError, TypeError, ValueError):
+        return None
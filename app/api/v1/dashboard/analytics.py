@@ -0,0 +1,77 @@
+"""
+Dashboard Analytics
+Vectorised aggregation for dashboard result sets. The aggregated per-day x
+category rows are converted to NumPy arrays once (seconds, a day index into
+the period, a bucket code from a lookup done once per distinct category), and
+totals and per-day stacks are computed with bincount instead of per-row
+Python loops.
+"""
+
+from datetime import datetime
+from typing import Callable, Dict, List, NamedTuple, Optional, Sequence, Tuple
+
+import numpy as np
+
+BUCKETS = ("productive", "social", "entertainment")
+NO_BUCKET = -1
+
+BucketFor = Callable[[str], Optional[str]]
+
+
+class Usage(NamedTuple):
+    """Column view of a result set, one element per row"""
+
+    seconds: np.ndarray  # float64, never negative
+    day: np.ndarray  # int64 day offset from the period start (outside [0, days) is not charted)
+    bucket: np.ndarray  # int8 index into BUCKETS, NO_BUCKET when the category maps to none
+
+
+def bucket_codes(categories: Sequence[Optional[str]], bucket_for: BucketFor) -> np.ndarray:
+    """Bucket code per row; `bucket_for` runs once per distinct category"""
+    inverse, uniq = factorize(categories)
+    lookup = {name: code for code, name in enumerate(BUCKETS)}
+    table = np.array([lookup.get(bucket_for(c or "uncategorized"), NO_BUCKET) for c in uniq], dtype=np.int8)
+    return table[inverse]
+
+
+def factorize(values: Sequence) -> Tuple[np.ndarray, List]:
+    """(code per value, distinct values in first-seen order); a dict pass beats np.unique on strings"""
+    index: Dict = {}
+    codes = np.fromiter((index.setdefault(v, len(index)) for v in values), dtype=np.int64, count=len(values))
+    return codes, list(index)
+
+
+def from_rows(rows: Sequence[Dict], start: datetime, bucket_for: BucketFor) -> Usage:
+    """Aggregated rows ({day: 'YYYY-MM-DD', category, seconds}, as from aggregates)"""
+    seconds = np.fromiter((float(r.get("seconds") or 0) for r in rows), dtype=np.float64, count=len(rows))
+    day = day_offsets([r.get("day") for r in rows], start)
+    return Usage(seconds, day, bucket_codes([r.get("category") for r in rows], bucket_for))
+
+
+def day_offsets(days: Sequence[Optional[str]], start: datetime) -> np.ndarray:
+    """'YYYY-MM-DD' strings -> int64 days since the start's date (-1 when missing)"""
+    offset = np.array([d or "NaT" for d in days], dtype="datetime64[D]") - np.datetime64(start.date(), "D")
+    return np.where(np.isnat(offset), -1, offset.astype(np.int64))
+
+
+def totals(usage: Usage) -> Dict[str, float]:
+    """{"total", "productive", "social", "entertainment"} seconds"""
+    mask = usage.bucket >= 0
+    per_bucket = np.bincount(usage.bucket[mask], weights=usage.seconds[mask], minlength=len(BUCKETS))
+    out = {"total": float(usage.seconds.sum())}
+    out.update({name: float(per_bucket[i]) for i, name in enumerate(BUCKETS)})
+    return out
+
+
+def daily(usage: Usage, days: int) -> np.ndarray:
+    """(days, len(BUCKETS)) seconds per day offset x bucket"""
+    mask = (usage.bucket >= 0) & (usage.day >= 0) & (usage.day < days)
+    idx = usage.day[mask] * len(BUCKETS) + usage.bucket[mask]
+    return np.bincount(idx, weights=usage.seconds[mask], minlength=days * len(BUCKETS)).reshape(days, len(BUCKETS))
+
+
+def pct_change(cur: float, prev: float) -> float:
+    """Percent change from `prev` to `cur`, 0.0 when there is no previous value"""
+    if prev <= 0:
+        return 0.0
+    return round(((cur - prev) / prev) * 100.0, 2)
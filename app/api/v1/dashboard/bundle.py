@@ -0,0 +1,71 @@
+"""
+Dashboard Bundle
+GET /dashboard/bundle returns the /dashboard, /dashboard/insights and
+/dashboard/settings payloads in one response: one authentication, and one
+RequestLoader shared by the sections so reads they have in common (the
+rollup rows, the user's limits) run once. Sections come from the same
+response cache as the individual endpoints, and the bundle's ETag is
+derived from theirs.
+"""
+
+import asyncio
+import hashlib
+import json
+from typing import Awaitable, Callable, Dict, Tuple
+
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response
+
+from app.api.v1.auth.auth import get_current_user
+from .caching import cached_body, etag_response
+from .dal import RequestLoader
+from .dashboard import _dashboard_body, _get_time_range
+from .insights import _insights_body
+from .settings import _settings_body
+
+router = APIRouter()
+
+SECTIONS = ("dashboard", "insights", "settings")
+
+
+def _parse_sections(sections: str) -> Tuple[str, ...]:
+    wanted = {s.strip() for s in sections.split(",") if s.strip()}
+    unknown = wanted - set(SECTIONS)
+    if unknown or not wanted:
+        raise HTTPException(status_code=400, detail=f"sections must be a comma-separated subset of {', '.join(SECTIONS)}")
+    return tuple(s for s in SECTIONS if s in wanted)
+
+
+@router.get("")
+async def dashboard_bundle(
+    request: Request,
+    timeRange: str = "this_week",
+    sections: str = Query(",".join(SECTIONS), description="Comma-separated subset of dashboard,insights,settings"),
+    current_user=Depends(get_current_user),
+) -> Response:
+    """Return {"timeRange", <section>: <that endpoint's payload>, ...} for the requested sections."""
+    user_id = current_user["id"]
+    if not user_id:
+        raise HTTPException(status_code=400, detail="Unable to determine user id from auth payload")
+
+    names = _parse_sections(sections)
+    start, end = _get_time_range(timeRange)
+    range_key = (timeRange, start.date().isoformat())
+    loader = RequestLoader()
+
+    builders: Dict[str, Callable[[], Awaitable[Tuple[str, bytes]]]] = {
+        "dashboard": lambda: cached_body(
+            user_id, "dashboard", lambda: _dashboard_body(current_user, user_id, timeRange, start, end, loader), range_key, end
+        ),
+        "insights": lambda: cached_body(
+            user_id, "insights", lambda: _insights_body(user_id, timeRange, start, end, loader), range_key, end
+        ),
+        "settings": lambda: cached_body(user_id, "settings", lambda: _settings_body(user_id, loader)),
+    }
+    parts = await asyncio.gather(*(builders[name]() for name in names))
+
+    # Section bodies are already JSON: splice them instead of re-encoding
+    body = b'{"timeRange":' + json.dumps(timeRange).encode() + b"".join(
+        b',"' + name.encode() + b'":' + part_body for name, (_, part_body) in zip(names, parts)
+    ) + b"}"
+    etag = '"' + hashlib.sha1("|".join([timeRange, *names, *(tag for tag, _ in parts)]).encode()).hexdigest() + '"'
+    return etag_response(request, etag, body)
@@ -0,0 +1,94 @@
+"""
+Dashboard Response Caching
+Serves the dashboard endpoints through the per-user response cache
+(app/core/response_cache.py) with ETag validators: a request whose
+If-None-Match matches the current body gets 304 Not Modified.
+
+Open periods (and /dashboard/settings) are keyed on the user's ACTIVITY and
+SETTINGS versions with a short TTL. A period that ended more than the grace
+interval ago no longer changes with new activity, so it is keyed on SETTINGS
+only (limits feed the insights alerts) and kept much longer.
+"""
+
+import hashlib
+from datetime import datetime, timedelta, timezone
+from typing import Awaitable, Callable, Dict, Hashable, Optional, Tuple
+
+from fastapi import Request, Response
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse
+
+from app.core.config import settings
+from app.core.metrics import metrics
+from app.core.response_cache import ACTIVITY, SETTINGS, dashboard_cache, data_versions
+
+# Browsers may store the body but must revalidate (If-None-Match) before reusing it
+CACHE_CONTROL = "private, no-cache"
+
+
+def _etag(body: bytes) -> str:
+    return '"' + hashlib.sha1(body).hexdigest() + '"'
+
+
+def _etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    if not if_none_match:
+        return False
+    tags = [t.strip() for t in if_none_match.split(",")]
+    return "*" in tags or any(t.removeprefix("W/") == etag for t in tags)
+
+
+def _period_closed(end: Optional[datetime]) -> bool:
+    if end is None:
+        return False
+    grace = timedelta(seconds=settings.DASHBOARD_CACHE_CLOSED_GRACE_SECONDS)
+    return datetime.now(timezone.utc) >= end + grace
+
+
+async def cached_body(
+    user_id: str,
+    endpoint: str,
+    build: Callable[[], Awaitable[Dict]],
+    range_key: Hashable = None,
+    period_end: Optional[datetime] = None,
+) -> Tuple[str, bytes]:
+    """(etag, JSON body) from the cache when still current, else from `await build()`"""
+    if _period_closed(period_end):
+        versions = (data_versions.get(user_id, SETTINGS),)
+        ttl = settings.DASHBOARD_CACHE_CLOSED_SECONDS
+    else:
+        versions = (data_versions.get(user_id, ACTIVITY), data_versions.get(user_id, SETTINGS))
+        ttl = settings.DASHBOARD_CACHE_SECONDS
+    enabled = settings.DASHBOARD_CACHE_SECONDS > 0
+    key = (user_id, endpoint, range_key)
+
+    entry = dashboard_cache.get(key, versions) if enabled else None
+    if entry is not None:
+        return entry.etag, entry.body
+    # Versions were read before building, so a write landing meanwhile invalidates this entry
+    body = JSONResponse(jsonable_encoder(await build())).body
+    etag = _etag(body)
+    if enabled:
+        dashboard_cache.put(key, versions, ttl, etag, body)
+    return etag, body
+
+
+def etag_response(request: Request, etag: str, body: bytes) -> Response:
+    """The JSON body with its validators, or 304 when the client's copy matches"""
+    headers = {"ETag": etag, "Cache-Control": CACHE_CONTROL}
+    if _etag_matches(request.headers.get("if-none-match"), etag):
+        metrics.inc("dashboard_cache.not_modified")
+        return Response(status_code=304, headers=headers)
+    return Response(content=body, media_type="application/json", headers=headers)
+
+
+async def cached_response(
+    request: Request,
+    user_id: str,
+    endpoint: str,
+    build: Callable[[], Awaitable[Dict]],
+    range_key: Hashable = None,
+    period_end: Optional[datetime] = None,
+) -> Response:
+    """Body from the cache when still current, else `await build()`; 304 when the client's copy matches"""
+    etag, body = await cached_body(user_id, endpoint, build, range_key, period_end)
+    return etag_response(request, etag, body)
@@ -0,0 +1,87 @@
+"""
+Dashboard Data Access
+Async front for the dashboard's database reads. A QueryBatch fires one
+request's independent queries concurrently with asyncio.gather, with at
+most `limit` of them in flight, so a request costs about its slowest query
+rather than the sum while no single request can take over the shared
+connection pool. Queries are awaited on the configured database backend
+(app/core/database.py); plain blocking functions passed to `run` still go
+to a worker thread.
+"""
+
+import asyncio
+import inspect
+from typing import Any, Callable, Dict, Hashable, List, Optional
+
+from fastapi import HTTPException
+
+from app.core.config import settings
+from app.core.metrics import metrics
+from app.core.database import Database, db
+
+
+class QueryBatch:
+    """Per-request runner for queries (create one per request)"""
+
+    def __init__(self, limit: Optional[int] = None):
+        self.limit = max(1, int(limit if limit is not None else settings.DASHBOARD_QUERY_CONCURRENCY))
+        self._slots = asyncio.Semaphore(self.limit)
+
+    async def run(self, fn: Callable, *args, **kwargs) -> Any:
+        async with self._slots:
+            if inspect.iscoroutinefunction(fn):
+                return await fn(*args, **kwargs)
+            return await asyncio.to_thread(fn, *args, **kwargs)
+
+    async def gather(self, *calls: Any) -> List[Any]:
+        """
+        Run awaitables (e.g. `batch.run(...)` calls) concurrently and return
+        their results in order. The first failure propagates; queries already
+        running finish and their results are dropped.
+        """
+        return list(await asyncio.gather(*calls))
+
+
+class RequestLoader(QueryBatch):
+    """
+    QueryBatch shared by several sections of one request (the dashboard
+    bundle): each distinct (query, arguments) runs once, and every section
+    asking for it - concurrently or later - gets the same result.
+    """
+
+    def __init__(self, limit: Optional[int] = None):
+        super().__init__(limit)
+        self._loads: Dict[Hashable, asyncio.Future] = {}
+
+    async def run(self, fn: Callable, *args, **kwargs) -> Any:
+        key = (fn, args, tuple(sorted(kwargs.items())))
+        load = self._loads.get(key)
+        if load is None:
+            load = asyncio.ensure_future(super().run(fn, *args, **kwargs))
+            self._loads[key] = load
+            metrics.inc("dashboard_loader.queries")
+        else:
+            metrics.inc("dashboard_loader.deduped")
+        # shield: one section giving up must not cancel a read the others share
+        return await asyncio.shield(load)
+
+
+def _require() -> Database:
+    if not db.configured:
+        raise HTTPException(status_code=503, detail="Supabase client not configured")
+    return db
+
+
+async def domain_limits(user_id: str) -> List[Dict]:
+    """[{domain, allowed_minutes}] from user_domain_limits"""
+    return await _require().domain_limits.for_user(user_id)
+
+
+async def domain_patterns(user_id: str) -> List[Dict]:
+    """[{domain_pattern, category}] from user_domain_categories"""
+    return await _require().domain_categories.for_user(user_id)
+
+
+async def recent_session_domains(user_id: str, limit: int = 1000) -> List[Dict]:
+    """[{domain, start_time}] of the user's most recent sessions"""
+    return await _require().sessions.recent_domains(user_id, limit)
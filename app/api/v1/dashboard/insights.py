@@ -1,78 +1,85 @@
 from datetime import datetime, timedelta, timezone
-from typing import List, Dict
+from typing import Dict, Optional
 
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Request, Response
 
 from app.core.config import settings
-from app.core.supabase_client import supabase
 from app.api.v1.auth.auth import get_current_user
 from .dashboard import _get_time_range
+from . import aggregates, analytics, dal
+from . import limits as domain_limits
+from .caching import cached_response
+from .dal import QueryBatch
 
 router = APIRouter()
 
+SOCIAL_NAMES = ("social", "social_media", "socialmedia", "social-media")
+
+
+def _bucket_by_name(cat: str) -> Optional[str]:
+    """Insights count a category toward a bucket only when it is named after it"""
+    lc = cat.lower()
+    if lc in ("productive", "entertainment"):
+        return lc
+    if lc in SOCIAL_NAMES:
+        return "social"
+    return None
+
+
 @router.get("")
-async def dashboard_insights(timeRange: str = "this_week", current_user=Depends(get_current_user)) -> Dict:
-    user_id = current_user.get("id") if isinstance(current_user, dict) else getattr(current_user, "id", None)
+async def dashboard_insights(request: Request, timeRange: str = "this_week", current_user=Depends(get_current_user)) -> Response:
+    user_id = current_user["id"]
     if not user_id:
         raise HTTPException(status_code=400, detail="Unable to determine user id from auth payload")
 
     start, end = _get_time_range(timeRange)
+    return await cached_response(
+        request,
+        user_id,
+        "insights",
+        lambda: _insights_body(user_id, timeRange, start, end),
+        range_key=(timeRange, start.date().isoformat()),
+        period_end=end,
+    )
+
+
+async def _insights_body(
+    user_id: str, timeRange: str, start: datetime, end: datetime, batch: Optional[QueryBatch] = None
+) -> Dict:
     prev_start = start - (end - start)
     prev_end = start
 
-    s_cur = supabase.table("page_view_sessions").select("domain,start_time,end_time").eq("user_id", user_id).gte("start_time", start.isoformat()).lt("start_time", end.isoformat()).execute()
-    s_prev = supabase.table("page_view_sessions").select("domain,start_time,end_time").eq("user_id", user_id).gte("start_time", prev_start.isoformat()).lt("start_time", prev_end.isoformat()).execute()
-    sessions = getattr(s_cur, "data", []) or []
-    prev_sessions = getattr(s_prev, "data", []) or []
-
-    cat_resp = supabase.table("user_domain_categories").select("domain_pattern,category").eq("user_id", user_id).execute()
-    categories = getattr(cat_resp, "data", []) or []
-
-    def categorize(domain: str) -> str:
-        if not domain:
-            return "uncategorized"
-        domain_l = domain.lower()
-        for c in categories:
-            pattern = (c.get("domain_pattern") or "").lower()
-            if pattern and pattern in domain_l:
-                return (c.get("category") or "uncategorized").lower()
-        return "uncategorized"
-
-    def aggregate_times(s_list: List[Dict]):
-        totals = {"total": 0.0, "productive": 0.0, "social": 0.0, "entertainment": 0.0}
-        for s in s_list:
-            try:
-                st = datetime.fromisoformat(s.get("start_time"))
-                et = datetime.fromisoformat(s.get("end_time"))
-            except Exception:
-                continue
-            seconds = max(0.0, (et - st).total_seconds())
-            totals["total"] += seconds
-            cat = categorize(s.get("domain"))
-            if cat == "productive":
-                totals["productive"] += seconds
-            elif cat in ("social", "social_media", "socialmedia", "social-media"):
-                totals["social"] += seconds
-            elif cat == "entertainment":
-                totals["entertainment"] += seconds
-        return totals
-
-    cur_totals = aggregate_times(sessions)
-    prev_totals = aggregate_times(prev_sessions)
-
-    def pct_change(cur: float, prev: float) -> float:
-        if prev <= 0:
-            return 0.0
-        return round(((cur - prev) / prev) * 100.0, 2)
-
-    ca_cur = supabase.table("content_analysis").select("happy_score,sad_score,angry_score,neutral_score,dominant_emotion,system_suggested_category,scraped_at").eq("user_id", user_id).gte("scraped_at", start.isoformat()).lt("scraped_at", end.isoformat()).execute()
-    ca_prev = supabase.table("content_analysis").select("happy_score,sad_score,angry_score,neutral_score,dominant_emotion,system_suggested_category,scraped_at").eq("user_id", user_id).gte("scraped_at", prev_start.isoformat()).lt("scraped_at", prev_end.isoformat()).execute()
-    ca_rows = getattr(ca_cur, "data", []) or []
-    ca_prev_rows = getattr(ca_prev, "data", []) or []
-
-    pos = sum(float(r.get("happy_score") or 0) for r in ca_rows)
-    neg = sum(float(r.get("sad_score") or 0) + float(r.get("angry_score") or 0) for r in ca_rows)
-    neu = sum(float(r.get("neutral_score") or 0) for r in ca_rows)
+    # Every read is independent: run them together (domain seconds are only
+    # used when the user has limits, but fetching them alongside saves a round trip)
+    batch = batch or QueryBatch()
+    limits_q = batch.run(dal.domain_limits, user_id)
+    domains_q = batch.run(aggregates.domain_seconds, user_id, start, end)
+    if settings.DASHBOARD_USE_ROLLUPS:
+        # Time and content for both periods from one read of user_daily_rollups
+        rollups, limits, domain_rows = await batch.gather(
+            batch.run(aggregates.daily_rollups, user_id, prev_start, end), limits_q, domains_q,
+        )
+        prev_rows, cur_rows = aggregates.split_at(rollups, start)
+        ca_rows = aggregates.content_from_rollups(cur_rows)
+        ca_prev_rows = aggregates.content_from_rollups(prev_rows)
+    else:
+        # Per-day x category seconds (domain patterns only), and analysed pages
+        # and emotion sums per content category, aggregated in Postgres
+        cur_rows, prev_rows, ca_rows, ca_prev_rows, limits, domain_rows = await batch.gather(
+            batch.run(aggregates.category_seconds, user_id, start, end, use_analysis=False),
+            batch.run(aggregates.category_seconds, user_id, prev_start, prev_end, use_analysis=False),
+            batch.run(aggregates.content_summary, user_id, start, end),
+            batch.run(aggregates.content_summary, user_id, prev_start, prev_end),
+            limits_q,
+            domains_q,
+        )
+
+    cur_totals = analytics.totals(analytics.from_rows(cur_rows, start, _bucket_by_name))
+    prev_totals = analytics.totals(analytics.from_rows(prev_rows, prev_start, _bucket_by_name))
+
+    pos = sum(float(r.get("happy") or 0) for r in ca_rows)
+    neg = sum(float(r.get("sad") or 0) + float(r.get("angry") or 0) for r in ca_rows)
+    neu = sum(float(r.get("neutral") or 0) for r in ca_rows)
     total_em = pos + neg + neu
     if total_em > 0:
         pos_pct = round(pos / total_em * 100.0, 2)
@@ -92,8 +99,8 @@ async def dashboard_insights(timeRange: str = "this_week", current_user=Depends(
 
     cat_counts: Dict[str, int] = {}
     for r in ca_rows:
-        c = (r.get("system_suggested_category") or "other").lower()
-        cat_counts[c] = cat_counts.get(c, 0) + 1
+        c = r.get("category") or "other"
+        cat_counts[c] = cat_counts.get(c, 0) + int(r.get("docs") or 0)
     total_docs = sum(cat_counts.values())
     content_categories = []
     if total_docs > 0:
@@ -113,9 +120,9 @@ async def dashboard_insights(timeRange: str = "this_week", current_user=Depends(
         "weeklyImprovementPercent": int(round(weekly_improvement)),
     }
 
-    prev_pos = sum(float(r.get("happy_score") or 0) for r in ca_prev_rows)
-    prev_neg = sum(float(r.get("sad_score") or 0) + float(r.get("angry_score") or 0) for r in ca_prev_rows)
-    prev_neu = sum(float(r.get("neutral_score") or 0) for r in ca_prev_rows)
+    prev_pos = sum(float(r.get("happy") or 0) for r in ca_prev_rows)
+    prev_neg = sum(float(r.get("sad") or 0) + float(r.get("angry") or 0) for r in ca_prev_rows)
+    prev_neu = sum(float(r.get("neutral") or 0) for r in ca_prev_rows)
     prev_total_em = prev_pos + prev_neg + prev_neu
     prev_neg_pct = round(prev_neg / prev_total_em * 100.0, 2) if prev_total_em > 0 else 0.0
     neg_increase = round(neg_pct - prev_neg_pct, 2)
@@ -147,34 +154,25 @@ async def dashboard_insights(timeRange: str = "this_week", current_user=Depends(
             "description": f"Great job! Your productive screen time increased by {int(round(weekly_improvement))}% compared to last period.",
         })
 
-    limits_resp = supabase.table("user_domain_limits").select("domain,allowed_minutes").eq("user_id", user_id).execute()
-    limits = getattr(limits_resp, "data", []) or []
     if limits:
         days_count = int((end - start).days)
-        for lim in limits:
-            dom = (lim.get("domain") or "").lower()
-            allowed_sec = int(lim.get("allowed_minutes") or 0) * 60 * max(1, days_count)
-            used_sec = 0
-            for s in sessions:
-                d = (s.get("domain") or "").lower()
-                if dom and dom in d:
-                    try:
-                        st = datetime.fromisoformat(s.get("start_time"))
-                        et = datetime.fromisoformat(s.get("end_time"))
-                        used_sec += max(0.0, (et - st).total_seconds())
-                    except Exception:
-                        continue
+        # One domain x day index for all limits (allowed_minutes is per day)
+        usage = domain_limits.usage_index(domain_rows, start, days_count)
+        for lim in domain_limits.evaluate(limits, usage):
+            allowed_sec = lim.allowed_seconds_per_day * max(1, days_count)
+            used_sec = lim.used_seconds
             if allowed_sec > 0 and used_sec > allowed_sec:
                 over_pct = int(round((used_sec - allowed_sec) * 100.0 / allowed_sec))
                 alerts.append({
                     "id": "alert_social_limit",
                     "type": "warning",
                     "title": "Social Media Limit",
-                    "description": f"Your usage for '{dom}' is {over_pct}% above your target for this period. Consider setting app limits.",
+                    "description": f"Your usage for '{lim.domain}' is {over_pct}% above your target for this period. Consider setting app limits.",
+                    "daysOverLimit": lim.days_over,
                 })
 
-    social_change = pct_change(cur_totals["social"], prev_totals["social"])
-    prod_change = pct_change(cur_totals["productive"], prev_totals["productive"])
+    social_change = analytics.pct_change(cur_totals["social"], prev_totals["social"])
+    prod_change = analytics.pct_change(cur_totals["productive"], prev_totals["productive"])
 
     def clamp01(x: float) -> float:
         return max(0.0, min(100.0, x))
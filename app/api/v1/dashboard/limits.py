@@ -0,0 +1,71 @@
+"""
+Domain Limits
+Evaluates user_domain_limits against a per-request domain usage index:
+seconds per distinct domain and per day, built once from the per-day x domain
+aggregates. A limit's domain matches every visited domain containing it
+(substring, as the settings page shows it); which limits match a domain is
+decided once per (limit set, domain) and cached, so evaluating all limits is
+one matrix product over the distinct domains rather than limits x rows.
+"""
+
+from datetime import datetime
+from functools import lru_cache
+from typing import Dict, List, NamedTuple, Sequence, Tuple
+
+import numpy as np
+
+from .analytics import day_offsets, factorize
+
+MATCH_CACHE_SIZE = 65536
+
+
+class DomainUsage(NamedTuple):
+    domains: List[str]  # distinct lowercased domains
+    daily: np.ndarray  # (len(domains), days) seconds per domain x day of the period
+
+
+class LimitUsage(NamedTuple):
+    domain: str  # the limit's (lowercased) domain pattern
+    allowed_seconds_per_day: int
+    used_seconds: float  # whole period
+    daily_seconds: np.ndarray  # (days,)
+
+    @property
+    def days_over(self) -> int:
+        """Days on which usage exceeded the daily allowance"""
+        if self.allowed_seconds_per_day <= 0:
+            return 0
+        return int((self.daily_seconds > self.allowed_seconds_per_day).sum())
+
+
+def usage_index(rows: Sequence[Dict], start: datetime, days: int) -> DomainUsage:
+    """Index aggregates.domain_seconds rows ({day, domain, seconds}); rows outside the period are dropped"""
+    codes, domains = factorize([(r.get("domain") or "").lower() for r in rows])
+    day = day_offsets([r.get("day") for r in rows], start)
+    seconds = np.fromiter((float(r.get("seconds") or 0) for r in rows), dtype=np.float64, count=len(rows))
+    days = max(1, int(days))
+    keep = (day >= 0) & (day < days)
+    flat = np.bincount(codes[keep] * days + day[keep], weights=seconds[keep], minlength=len(domains) * days)
+    return DomainUsage(domains, flat.reshape(len(domains), days))
+
+
+@lru_cache(maxsize=MATCH_CACHE_SIZE)
+def _matching(patterns: Tuple[str, ...], domain: str) -> np.ndarray:
+    """Mask over `patterns` of those contained in `domain` (empty patterns never match)"""
+    return np.fromiter((bool(p) and p in domain for p in patterns), dtype=bool, count=len(patterns))
+
+
+def evaluate(limits: Sequence[Dict], usage: DomainUsage) -> List[LimitUsage]:
+    """Usage per limit ({domain, allowed_minutes} rows), in the limits' order"""
+    patterns = tuple((lim.get("domain") or "").lower() for lim in limits)
+    if not patterns:
+        return []
+    if usage.domains:
+        matches = np.stack([_matching(patterns, d) for d in usage.domains], axis=1)  # (limits, domains)
+        daily = matches.astype(np.float64) @ usage.daily
+    else:
+        daily = np.zeros((len(patterns), usage.daily.shape[1]))
+    return [
+        LimitUsage(pattern, int(lim.get("allowed_minutes") or 0) * 60, float(daily[i].sum()), daily[i])
+        for i, (pattern, lim) in enumerate(zip(patterns, limits))
+    ]
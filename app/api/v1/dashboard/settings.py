@@ -1,9 +1,11 @@
 from typing import Dict, List, Optional, Set
 
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Request, Response
 
 from app.api.v1.auth.auth import get_current_user
-from app.core.supabase_client import supabase
+from . import dal
+from .caching import cached_response
+from .dal import QueryBatch
 
 router = APIRouter()
 
@@ -19,35 +21,30 @@ def _unique(seq: List[str]) -> List[str]:
 
 
 @router.get("")
-async def dashboard_settings(current_user=Depends(get_current_user)) -> Dict:
+async def dashboard_settings(request: Request, current_user=Depends(get_current_user)) -> Response:
     """Return settings view: union of domains the user has activity on, plus
     domains present in user limits and patterns, with nullable category and limit.
     """
-    user_id = current_user.get("id") if isinstance(current_user, dict) else getattr(current_user, "id", None)
+    user_id = current_user["id"]
     if not user_id:
         raise HTTPException(status_code=400, detail="Unable to determine user id from auth payload")
 
-    # 1) Distinct domains from recent sessions (cap to 1000 recent rows for practicality)
-    sess_resp = (
-        supabase
-        .table("page_view_sessions")
-        .select("domain,start_time")
-        .eq("user_id", user_id)
-        .order("start_time", desc=True)
-        .limit(1000)
-        .execute()
+    return await cached_response(request, user_id, "settings", lambda: _settings_body(user_id))
+
+
+async def _settings_body(user_id: str, batch: Optional[QueryBatch] = None) -> Dict:
+    # Sessions, limits and patterns are independent reads: run them together
+    batch = batch or QueryBatch()
+    sessions, limits_rows, category_rows = await batch.gather(
+        # 1) Distinct domains from recent sessions (cap to 1000 recent rows for practicality)
+        batch.run(dal.recent_session_domains, user_id, 1000),
+        # 2) User limits domains
+        batch.run(dal.domain_limits, user_id),
+        # 3) User categories patterns (this may include patterns not present in sessions yet)
+        batch.run(dal.domain_patterns, user_id),
     )
-    sessions = getattr(sess_resp, "data", []) or []
     session_domains = [str((row.get("domain") or "").lower()) for row in sessions if row.get("domain")]  # type: ignore
-
-    # 2) User limits domains
-    lim_resp = supabase.table("user_domain_limits").select("domain,allowed_minutes").eq("user_id", user_id).execute()
-    limits_rows = getattr(lim_resp, "data", []) or []
     limit_map = {str((r.get("domain") or "").lower()): int(r.get("allowed_minutes") or 0) for r in limits_rows if r.get("domain")}
-
-    # 3) User categories patterns (this may include patterns not present in sessions yet)
-    cat_resp = supabase.table("user_domain_categories").select("domain_pattern,category").eq("user_id", user_id).execute()
-    category_rows = getattr(cat_resp, "data", []) or []
     patterns = [str((r.get("domain_pattern") or "").lower()) for r in category_rows if r.get("domain_pattern")]
 
     # Build the union set of names to show
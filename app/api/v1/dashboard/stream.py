@@ -0,0 +1,179 @@
+"""
+Dashboard Stream
+GET /dashboard/stream is a server-sent events stream of small dashboard
+updates for the authenticated user, fed by app/core/dashboard_events.py as
+the sessionizer writes sessions:
+
+    event: activity   {"added": [{day, bucket, seconds}], "totals": {...}, "shares": {...}}
+    event: alert      a daily domain limit was just exceeded (same shape as insights alerts)
+    event: refresh    {"reason"}: refetch the full payloads (settings changed, the
+                      week rolled over, or the missed events are no longer buffered)
+
+Each stream reads the current week's totals and today's limit usage once
+when it opens and then only adds deltas; it never recomputes a dashboard.
+Reconnecting with Last-Event-ID (header, or ?lastEventId=) replays what
+was missed.
+"""
+
+import asyncio
+import json
+from datetime import datetime, timedelta, timezone
+from typing import AsyncIterator, Dict, List, Optional, Tuple
+
+from fastapi import APIRouter, Depends, Header, HTTPException, Query, Request
+from fastapi.responses import StreamingResponse
+
+from app.api.v1.auth.auth import get_current_user
+from app.core.config import settings
+from app.core.dashboard_events import ACTIVITY, REFRESH, dashboard_events
+from . import aggregates, analytics, dal
+from . import limits as domain_limits
+from .dal import QueryBatch
+from .dashboard import _bucket_for, _get_time_range
+
+router = APIRouter()
+
+ALERT = "alert"
+RETRY_MILLISECONDS = 5000  # EventSource reconnect delay
+
+
+class _StreamState:
+    """This week's bucket totals and today's usage per limit, as seen by one stream"""
+
+    def __init__(self, start: datetime, end: datetime, seeded_seq: int, rows: List[Dict], limits: List[Dict], today_rows: List[Dict]):
+        self.start = start
+        self.end = end
+        self.seeded_seq = seeded_seq  # events up to this one are already in the seed reads
+        self.totals = analytics.totals(analytics.from_rows(rows, start, _bucket_for))
+        self.today = datetime.now(timezone.utc).date().isoformat()
+        today_start = datetime.fromisoformat(self.today).replace(tzinfo=timezone.utc)
+        usage = domain_limits.evaluate(limits, domain_limits.usage_index(today_rows, today_start, 1))
+        self.limits = [(lim.domain, lim.allowed_seconds_per_day) for lim in usage]
+        self.used = [lim.used_seconds for lim in usage]
+        self.alerted = {i for i, (_, allowed) in enumerate(self.limits) if 0 < allowed < self.used[i]}
+
+    @classmethod
+    async def load(cls, user_id: str) -> "_StreamState":
+        start, end = _get_time_range("this_week")
+        today = datetime.now(timezone.utc).replace(hour=0, minute=0, second=0, microsecond=0)
+        seeded_seq = dashboard_events.last_seq()
+        batch = QueryBatch()
+        if settings.DASHBOARD_USE_ROLLUPS:
+            rows_q = batch.run(aggregates.daily_rollups, user_id, start, end)
+        else:
+            rows_q = batch.run(aggregates.category_seconds, user_id, start, end, use_analysis=True)
+        rows, limits, today_rows = await batch.gather(
+            rows_q,
+            batch.run(dal.domain_limits, user_id),
+            batch.run(aggregates.domain_seconds, user_id, today, today + timedelta(days=1)),
+        )
+        return cls(start, end, seeded_seq, rows, limits, today_rows)
+
+    def apply(self, seq: int, sessions: List[Dict]) -> List[Tuple[str, Dict]]:
+        """Messages for one activity event; an event already in the seed is reported but not counted again"""
+        if any(s["day"] >= self.end.date().isoformat() for s in sessions):
+            return [(REFRESH, {"reason": "period"})]
+        # Late sessions from before this week do not change what the stream shows
+        sessions = [s for s in sessions if s["day"] >= self.start.date().isoformat()]
+        if not sessions:
+            return []
+        count = seq > self.seeded_seq
+        added: Dict[Tuple[str, Optional[str]], float] = {}
+        alerts = []
+        for s in sessions:
+            seconds = float(s["seconds"])
+            bucket = _bucket_for(s.get("category") or "uncategorized")
+            added[(s["day"], bucket)] = added.get((s["day"], bucket), 0.0) + seconds
+            if not count:
+                continue
+            self.totals["total"] += seconds
+            if bucket:
+                self.totals[bucket] += seconds
+            alerts.extend(self._track_limits(s["day"], (s.get("domain") or "").lower(), seconds))
+
+        total = self.totals["total"]
+        messages = [(ACTIVITY, {
+            "added": [{"day": day, "bucket": bucket, "seconds": round(sec, 2)} for (day, bucket), sec in added.items()],
+            "totals": {k: int(v) for k, v in self.totals.items()},
+            "shares": {b: (round(self.totals[b] * 100.0 / total, 2) if total > 0 else 0.0) for b in analytics.BUCKETS},
+        })]
+        return messages + [(ALERT, alert) for alert in alerts]
+
+    def _track_limits(self, day: str, domain: str, seconds: float) -> List[Dict]:
+        if day < self.today:
+            return []
+        if day > self.today:
+            self.today, self.used, self.alerted = day, [0.0] * len(self.limits), set()
+        alerts = []
+        for i, (pattern, allowed) in enumerate(self.limits):
+            if not pattern or pattern not in domain:
+                continue
+            self.used[i] += seconds
+            if 0 < allowed < self.used[i] and i not in self.alerted:
+                self.alerted.add(i)
+                alerts.append({
+                    "id": "alert_social_limit",
+                    "type": "warning",
+                    "title": "Social Media Limit",
+                    "description": f"You have passed your daily target of {allowed // 60} minutes for '{pattern}' today.",
+                    "domain": pattern,
+                })
+        return alerts
+
+
+def _sse(kind: str, data: Dict, seq: int) -> str:
+    return f"id: {dashboard_events.event_id(seq)}\nevent: {kind}\ndata: {json.dumps(data, separators=(',', ':'))}\n\n"
+
+
+async def _events(request: Request, user_id: str, last_event_id: Optional[str]) -> AsyncIterator[str]:
+    with dashboard_events.subscribe(user_id) as wakeup:
+        seq = dashboard_events.parse_id(last_event_id)
+        resumed = seq is not None and dashboard_events.since(user_id, seq)[1]
+        if not resumed:
+            seq = dashboard_events.last_seq()
+        state = await _StreamState.load(user_id)
+
+        yield f"retry: {RETRY_MILLISECONDS}\n\n"
+        if last_event_id and not resumed:
+            yield _sse(REFRESH, {"reason": "resume"}, seq)
+
+        while not await request.is_disconnected():
+            # Cleared before reading, so a publish from now on wakes the wait below
+            wakeup.clear()
+            events, complete = dashboard_events.since(user_id, seq)
+            if not complete:
+                seq = dashboard_events.last_seq()
+                state = await _StreamState.load(user_id)
+                yield _sse(REFRESH, {"reason": "resume"}, seq)
+                continue
+            for event in events:
+                seq = event.seq
+                messages = state.apply(seq, event.data["sessions"]) if event.kind == ACTIVITY else [(event.kind, event.data)]
+                for kind, data in messages:
+                    yield _sse(kind, data, seq)
+                if any(kind == REFRESH for kind, _ in messages):
+                    # Limits or the week changed: start over from fresh reads
+                    state = await _StreamState.load(user_id)
+            try:
+                await asyncio.wait_for(wakeup.wait(), timeout=settings.DASHBOARD_STREAM_KEEPALIVE_SECONDS)
+            except asyncio.TimeoutError:
+                yield ": keepalive\n\n"
+
+
+@router.get("")
+async def dashboard_stream(
+    request: Request,
+    current_user=Depends(get_current_user),
+    last_event_id: Optional[str] = Header(None),
+    lastEventId: Optional[str] = Query(None, description="Last-Event-ID for clients that cannot set headers"),
+) -> StreamingResponse:
+    """Server-sent events with the user's dashboard deltas (see module docstring)"""
+    user_id = current_user["id"]
+    if not user_id:
+        raise HTTPException(status_code=400, detail="Unable to determine user id from auth payload")
+
+    return StreamingResponse(
+        _events(request, user_id, last_event_id or lastEventId),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
@@ -9,10 +9,13 @@ from fastapi import APIRouter
 from loguru import logger
 
 from app.api.v1 import content
+from app.api.v1.dashboard.bundle import router as bundle_router
 from app.api.v1.dashboard.dashboard import router as dashboard_router
 from app.api.v1.dashboard.insights import router as insights_router
 from app.api.v1.dashboard.settings import router as settings_router
+from app.api.v1.dashboard.stream import router as stream_router
 from app.api.v1 import tracking, categories, user_domain_category
+from app.core.metrics import metrics
 
 from pathlib import Path
 dashboard_file = Path(__file__).parent / "dashboard.py"
@@ -29,6 +32,8 @@ api_router.include_router(content.router, prefix="/content", tags=["Content Anal
 api_router.include_router(dashboard_router, prefix="/dashboard", tags=["Dashboard"])
 api_router.include_router(insights_router, prefix="/dashboard/insights", tags=["Dashboard Insights"])
 api_router.include_router(settings_router, prefix="/dashboard/settings", tags=["Dashboard Settings"])
+api_router.include_router(bundle_router, prefix="/dashboard/bundle", tags=["Dashboard Bundle"])
+api_router.include_router(stream_router, prefix="/dashboard/stream", tags=["Dashboard Stream"])
 api_router.include_router(categories.router, prefix="/categories", tags=["Categories"])
 api_router.include_router(tracking.router, prefix="/tracking", tags=["Tracking"])
 api_router.include_router(user_domain_category.router, prefix="/user-domain-category", tags=["User Domain Category"])
@@ -40,3 +45,9 @@ api_router.include_router(v1_dashboard_summary.router, prefix="/dashboard-summar
 async def ping():
     """Simple API health check"""
     return {"message": "pong", "api_version": "v1"}
+
+
+@api_router.get("/metrics")
+async def get_metrics():
+    """In-process counters and hit rates (dedupe, caches, coalescing)"""
+    return metrics.snapshot()
@@ -1,30 +1,73 @@
 """
 Tracking API Endpoints
 Receives activity and engagement data from browser extension and stores for analysis.
-Phase 1: in-memory store (replace with DB in future)
+Phase 1: bounded in-memory store (see app.core.activity_store) alongside Supabase persistence
 """
 
 # Remove deprecated methods from the code
 
-from fastapi import APIRouter, HTTPException, Query
-from pydantic import BaseModel, Field
-from typing import Optional, List
+import asyncio
+import hashlib
+from fastapi import APIRouter, File, Form, HTTPException, Query, UploadFile
+from fastapi.exceptions import RequestValidationError
+from pydantic import BaseModel, Field, ValidationError
+from typing import Dict, Literal, NamedTuple, Optional, List, Tuple
 from time import time
 from loguru import logger
-from urllib.parse import urlparse
 from datetime import datetime, timezone, timedelta
 
 from app.ml.sentiment_analyzer import SentimentAnalyzer
 from app.ml.zero_shot_classifier import ZeroShotClassifier
 from app.ml.emotion_detector import EmotionDetector
-from app.core.supabase_client import supabase
+from app.core.config import settings
+from app.core.domains import host_of
+from app.core.database import db
+from app.core.activity_store import ActivityRecord, ActivityStore
+from app.core.sessionizer import sessionizer
+from app.core.dedupe import DedupeWindow
+from app.core.metrics import metrics
+from app.core.response_cache import ACTIVITY, data_versions
+from app.core.dashboard_events import ACTIVITY as ACTIVITY_EVENT, dashboard_events
+from app.core.singleflight import SingleFlight
+from app.core.analysis_cache import RecentAnalyses
 from app.api.v1.content import analyze_content as analyze_content_route
-from app.scraper.scraper import extract_visible_text_and_metadata
+from app.scraper.scraper import async_scraper, clean_visible_text, extract_from_html
+from app.scraper import payload as page_payload
 
 router = APIRouter()
 
-# Simple in-memory activity store: {user_id: [activities...]}
-ACTIVITY_STORE: dict[str, list[dict]] = {}
+# Bounded in-memory activity store: per-user ring buffers under a global memory budget
+ACTIVITY_STORE = ActivityStore(
+    max_records_per_user=settings.ACTIVITY_STORE_MAX_RECORDS_PER_USER,
+    max_bytes=settings.ACTIVITY_STORE_MAX_BYTES,
+    text_mode=settings.ACTIVITY_STORE_TEXT_MODE,
+)
+
+# Recently seen (user_id, event_id) idempotency keys
+INGEST_DEDUPE = DedupeWindow(
+    window_seconds=settings.INGEST_DEDUPE_WINDOW_SECONDS,
+    max_keys=settings.INGEST_DEDUPE_MAX_KEYS,
+)
+
+# Events being ingested right now, by idempotency key
+_INGESTING: Dict[str, asyncio.Event] = {}
+
+# Scrape + analysis results shared by concurrent ingests of the same page
+PAGE_ANALYSIS = SingleFlight("page_analysis", ttl_seconds=settings.PAGE_ANALYSIS_CACHE_SECONDS)
+
+# URLs analysed within ANALYSIS_REUSE_SECONDS reuse their content_analysis row
+RECENT_ANALYSES = RecentAnalyses(
+    fresh_seconds=settings.ANALYSIS_REUSE_SECONDS,
+    max_entries=settings.ANALYSIS_REUSE_MAX_URLS,
+)
+
+# content_analysis score columns, by emotion label
+EMOTION_COLUMNS = {
+    "joy": "happy_score",
+    "sadness": "sad_score",
+    "anger": "angry_score",
+    "neutral": "neutral_score",
+}
 
 # ML services (lightweight per-process instances)
 sentiment_analyzer = SentimentAnalyzer()
@@ -32,6 +75,13 @@ zero_shot = ZeroShotClassifier()
 emotion_detector = EmotionDetector()
 
 
+class PagePayload(BaseModel):
+    data: str = Field(..., description="Base64 page body, compressed per `encoding`")
+    encoding: Literal["identity", "gzip", "zstd"] = "gzip"
+    kind: Literal["html", "text"] = Field("html", description="Raw page HTML, or DOM text already extracted by the extension")
+    charset: Optional[str] = Field(None, description="Body charset (default UTF-8)")
+
+
 class ActivityIn(BaseModel):
     user_id: str = Field(..., description="User identifier")
     url: str = Field(..., description="URL of the active tab")
@@ -43,6 +93,16 @@ class ActivityIn(BaseModel):
     clicks: int = 0
     keypresses: int = 0
     engagement_score: Optional[float] = None
+    event_id: Optional[str] = Field(None, max_length=128, description="Client idempotency key; retries with the same key are acknowledged without reprocessing")
+    page: Optional[PagePayload] = Field(None, description="Page captured by the extension; parsed here instead of refetching the URL")
+
+
+class _PageBody(NamedTuple):
+    """Client-supplied page body, still compressed"""
+    body: bytes
+    encoding: str
+    kind: str
+    charset: Optional[str]
 
 
 @router.post("/ingest")
@@ -51,11 +111,73 @@ async def ingest_activity(payload: ActivityIn):
 
     Performs optional lightweight analysis for quick dashboard insights and stores the record.
     """
+    page_body = None
+    if payload.page is not None:
+        try:
+            body = page_payload.decode_base64(payload.page.data, settings.INGEST_PAGE_MAX_COMPRESSED_BYTES)
+        except page_payload.PagePayloadTooLarge as e:
+            raise HTTPException(status_code=413, detail=str(e))
+        except page_payload.PagePayloadError as e:
+            raise HTTPException(status_code=400, detail=str(e))
+        page_body = _PageBody(body, payload.page.encoding, payload.page.kind, payload.page.charset)
+    return await _ingest(payload, page_body)
+
+
+@router.post("/ingest/upload")
+async def ingest_activity_upload(
+    activity: str = Form(..., description="ActivityIn as JSON (without `page`)"),
+    page: UploadFile = File(..., description="Raw page body, compressed per `page_encoding`"),
+    page_encoding: Literal["identity", "gzip", "zstd"] = Form("gzip"),
+    page_kind: Literal["html", "text"] = Form("html"),
+    page_charset: Optional[str] = Form(None),
+):
+    """Multipart variant of /ingest: the page body is sent as a binary part instead of base64."""
+    try:
+        payload = ActivityIn.model_validate_json(activity)
+    except ValidationError as e:
+        raise RequestValidationError(e.errors())
+    limit = settings.INGEST_PAGE_MAX_COMPRESSED_BYTES
+    body = await page.read(limit + 1)
+    if len(body) > limit:
+        raise HTTPException(status_code=413, detail=f"page payload exceeds {limit} bytes")
+    return await _ingest(payload, _PageBody(body, page_encoding, page_kind, page_charset))
+
+
+async def _ingest(payload: ActivityIn, page_body: Optional[_PageBody]):
     if not payload.user_id or not payload.url:
         raise HTTPException(status_code=400, detail="user_id and url required")
+    if not payload.event_id:
+        response, _ = await _ingest_event(payload, page_body)
+        return response
+
+    # Idempotency: a retried/duplicated event is acknowledged without scraping or analysis.
+    # A retry that races the first delivery waits for its outcome, and the key is
+    # dropped when a delivery lost its session write, so a retry can write it.
+    key = f"{payload.user_id}:{payload.event_id}"
+    while (pending := _INGESTING.get(key)) is not None:
+        await pending.wait()
+    if INGEST_DEDUPE.check_and_add(key):
+        metrics.inc("ingest.dedupe.hits")
+        logger.debug(f"Duplicate ingest user={payload.user_id} event_id={payload.event_id}")
+        return {"status": "ok", "ingested": 0, "duplicate": True}
+    metrics.inc("ingest.dedupe.misses")
+
+    done = _INGESTING[key] = asyncio.Event()
+    retry = True
+    try:
+        response, retry = await _ingest_event(payload, page_body)
+        return response
+    finally:
+        if retry:
+            INGEST_DEDUPE.discard(key)
+        del _INGESTING[key]
+        done.set()
+
 
+async def _ingest_event(payload: ActivityIn, page_body: Optional[_PageBody]) -> Tuple[dict, bool]:
+    """(response, whether a retry should be processed again: the session was not written)"""
     now = time()
-    record = payload.dict()
+    record = payload.dict(exclude={"page"})
     record.setdefault("received_at", now)
 
     # Basic duration inference
@@ -66,13 +188,11 @@ async def ingest_activity(payload: ActivityIn):
             record["duration_seconds"] = None
 
     # Determine domain and any user-configured category override
-    parsed = urlparse(record["url"]) if record.get("url") else None
-    domain = (parsed.netloc or "").lower() if parsed else None
+    domain = host_of(record.get("url"))
     override_category: Optional[str] = None
     try:
-        if supabase is not None and record.get("user_id") and domain:
-            rules_resp = supabase.table("user_domain_categories").select("domain_pattern,category,priority").eq("user_id", record["user_id"]).execute()
-            rules = getattr(rules_resp, "data", []) or []
+        if db.configured and record.get("user_id") and domain:
+            rules = await db.domain_categories.for_user(record["user_id"], "domain_pattern,category,priority")
 
             def pattern_matches(d: str, pat: str) -> bool:
                 p = (pat or "").lower().strip()
@@ -90,17 +210,114 @@ async def ingest_activity(payload: ActivityIn):
     except Exception as e:
         logger.debug(f"Failed to resolve category override: {e}")
 
+    # A recent stored analysis of this URL is reused: no decompression, scrape or inference
+    analyze_category = not override_category
+    stored = await RECENT_ANALYSES.lookup(record["url"])
+    if stored is not None:
+        page = _reused_page(stored, record.get("text"))
+    else:
+        page = await _analyze_page(record, page_body, analyze_category)
+
+    page_text: Optional[str] = page["text"]
+    record["text"] = page_text
+    if not record.get("title") and page.get("title"):
+        record["title"] = page["title"]
+    record.update(page["fields"])
+    # The classifier's category, before the user's own rule replaces it: only this one is shared with other users
+    system_category = page["fields"].get("classified_category")
+    if override_category and (page_text or page.get("reused")):
+        record["classified_category"] = override_category
+    analysis_result = page["analysis"]
+
+    # Store (text is kept, compressed or dropped per ACTIVITY_STORE_TEXT_MODE now that analysis is done)
+    ACTIVITY_STORE.append(payload.user_id, record)
+    logger.info(f"Ingested activity for user={payload.user_id} url={payload.url}")
+    
+    # Persist to database via Supabase if configured
+    _persist_errors: Dict[str, str] = {}
+    try:
+        _persist_errors = await _persist_to_database(record, analysis_result, system_category, reused_analysis=stored)
+    except Exception as e:
+        logger.warning(f"DB persistence failed: {e}")
+        _persist_errors["database"] = str(e)
+
+    response = {"status": "ok", "ingested": 1}
+    if _persist_errors:
+        response["warnings"] = {"database": list(_persist_errors.values())}
+    # Without a database nothing is lost; the analysis upsert is not worth a duplicate session
+    retry = db.configured and ("page_view_sessions" in _persist_errors or "database" in _persist_errors)
+    return response, retry
+
+
+async def _analyze_page(record: dict, page_body: Optional[_PageBody], analyze_category: bool) -> dict:
+    """Text, title and analysis for the ingested page (see _scrape_and_analyze)"""
+    # Page body captured by the extension: DOM text is normalised and capped like extracted text, HTML goes to the extractor
+    text: Optional[str] = record.get("text")
+    html: Optional[str] = None
+    if not text and page_body is not None:
+        try:
+            raw = await asyncio.to_thread(page_payload.decompress, page_body.body, page_body.encoding, settings.INGEST_PAGE_MAX_BYTES)
+            decoded = page_payload.to_text(raw, page_body.charset)
+        except page_payload.PagePayloadError as e:
+            raise HTTPException(status_code=400, detail=str(e))
+        if page_body.kind == "text":
+            text = clean_visible_text(decoded)
+        else:
+            html = decoded
+
+    # Scrape (if neither text nor HTML provided) and analyze the page. Concurrent ingests
+    # of the same URL/text/HTML share one in-flight run and a short-lived cached result.
+    if text:
+        key = f"text:{hashlib.sha1(text.encode('utf-8')).hexdigest()}:{int(analyze_category)}"
+    elif html:
+        key = f"html:{hashlib.sha1(page_body.body).hexdigest()}:{int(analyze_category)}"
+    else:
+        key = f"url:{record['url']}:{int(analyze_category)}"
+    return await PAGE_ANALYSIS.do(key, lambda: _scrape_and_analyze(record["url"], text, analyze_category, html))
+
+
+def _reused_page(row: dict, text: Optional[str]) -> dict:
+    """Page result (as from _scrape_and_analyze) rebuilt from a stored content_analysis row.
+
+    Sentiment has no column, so only rows remembered by this process carry it.
+    """
+    emotions = [{"label": label, "score": float(row.get(column) or 0.0)} for label, column in EMOTION_COLUMNS.items()]
+    emotions.sort(key=lambda e: e["score"], reverse=True)
+    fields: dict = {"emotions": emotions}
+    if row.get("sentiment"):
+        fields["sentiment"] = row["sentiment"]
+    if row.get("system_suggested_category"):
+        fields["classified_category"] = row["system_suggested_category"]
+    return {"text": text, "title": None, "analysis": None, "fields": fields, "reused": True}
+
+
+async def _scrape_and_analyze(url: str, text: Optional[str], analyze_category: bool, html: Optional[str] = None) -> dict:
+    """Extract page text (from client HTML, else by fetching the URL) when not supplied and run the ML analysis for one page.
+
+    Returns {"text", "title", "analysis", "fields"} where `fields` are the record
+    fields derived from the analysis. The result may be shared between users by
+    PAGE_ANALYSIS, so callers must not mutate it.
+    """
+    page_text: Optional[str] = text
+    title: Optional[str] = None
+    fields: dict = {}
+
+    # Parse the HTML the extension sent; only fetch the URL when that yields nothing
+    if not page_text and html:
+        scraped = await asyncio.to_thread(extract_from_html, url, html)
+        page_text = scraped.get("visible_text")
+        title = scraped.get("title")
+        metrics.inc("ingest.page.client_html")
+
     # Fetch page content (if text not already provided) using the scraper service
-    page_text: Optional[str] = record.get("text")
     if not page_text:
+        metrics.inc("ingest.page.server_fetch")
         try:
-            scraped = extract_visible_text_and_metadata(record["url"]) or {}
+            scraped = await async_scraper.extract_visible_text_and_metadata(url) or {}
             page_text = scraped.get("visible_text")
-            if not record.get("title") and scraped.get("title"):
-                record["title"] = scraped.get("title")
-            record["text"] = page_text
+            title = scraped.get("title")
         except Exception as e:
-            logger.debug(f"Scrape failed for url={record['url']}: {e}")
+            logger.debug(f"Scrape failed for url={url}: {e}")
             page_text = None
 
     # Run unified analysis via the content analyzer route function
@@ -109,23 +326,21 @@ async def ingest_activity(payload: ActivityIn):
         try:
             analysis_result = await analyze_content_route(
                 text=page_text,
-                url=record.get("url"),
+                url=url,
                 analyze_sentiment=True,
-                analyze_category=False if override_category else True,
+                analyze_category=analyze_category,
                 analyze_emotions=True,
             )
             print(f"AnalysisResult {analysis_result}")
             # Attach key fields back into the record for immediate use/echo
             if isinstance(analysis_result, dict):
                 if "sentiment" in analysis_result:
-                    record["sentiment"] = analysis_result["sentiment"]
-                if override_category:
-                    record["classified_category"] = override_category
-                elif "category" in analysis_result:
-                    record["classified_category"] = analysis_result["category"].get("primary")
-                    record["classified_scores"] = analysis_result["category"].get("all_categories", [])
+                    fields["sentiment"] = analysis_result["sentiment"]
+                if "category" in analysis_result:
+                    fields["classified_category"] = analysis_result["category"].get("primary")
+                    fields["classified_scores"] = analysis_result["category"].get("all_categories", [])
                 if "emotions" in analysis_result:
-                    record["emotions"] = analysis_result["emotions"].get("all_emotions")
+                    fields["emotions"] = analysis_result["emotions"].get("all_emotions")
         except HTTPException as he:
             # If the analyzer raises HTTPException, log and proceed with local lightweight analysis as fallback
             logger.debug(f"Route analyzer failed: {he}")
@@ -135,80 +350,124 @@ async def ingest_activity(payload: ActivityIn):
             analysis_result = None
 
     # Fallback: quick local analysis if unified analyzer was unavailable
-    if not analysis_result and record.get("text"):
+    if not analysis_result and page_text:
         try:
-            sentiment = sentiment_analyzer.analyze(record["text"])
+            sentiment = sentiment_analyzer.analyze(page_text)
             print("ONLY LOCAL RUN")
             print(f"sentiment: {sentiment}")
-            record["sentiment"] = sentiment
+            fields["sentiment"] = sentiment
         except Exception as e:
             logger.debug(f"Sentiment analysis failed: {e}")
 
-        if override_category:
-            record["classified_category"] = override_category
-        else:
+        if analyze_category:
             try:
-                cat = zero_shot.classify_with_group(record["text"])
+                cat = zero_shot.classify_with_group(page_text)
                 print(f"CATEGORY: {cat}")
                 if not cat.get("error"):
-                    record["classified_category"] = cat.get("labels", [None])[0]
-                    record["category_group"] = cat.get("category_group")
-                    record["classified_scores"] = cat.get("scores", [])
+                    fields["classified_category"] = cat.get("labels", [None])[0]
+                    fields["category_group"] = cat.get("category_group")
+                    fields["classified_scores"] = cat.get("scores", [])
             except Exception as e:
                 logger.debug(f"Category classification failed: {e}")
 
         try:
-            emotions = emotion_detector.detect(record["text"])
+            emotions = emotion_detector.detect(page_text)
             print(f"EMOTION: {emotions}")
-            record["emotions"] = emotions
+            fields["emotions"] = emotions
         except Exception as e:
             logger.debug(f"Emotion detection failed: {e}")
 
-    # Store
-    ACTIVITY_STORE.setdefault(payload.user_id, []).append(record)
-    logger.info(f"Ingested activity for user={payload.user_id} url={payload.url}")
-    
-    # Persist to database via Supabase if configured
-    _persist_errors: List[str] = []
-    try:
-        await _persist_to_database(record, analysis_result)
-    except Exception as e:
-        logger.warning(f"DB persistence failed: {e}")
-        _persist_errors.append(str(e))
+    return {"text": page_text, "title": title, "analysis": analysis_result, "fields": fields}
 
-    response = {"status": "ok", "ingested": 1}
-    if _persist_errors:
-        response["warnings"] = {"database": _persist_errors}
-    return response
+
+def _record_fields(fields: Optional[str], default: Tuple[str, ...]) -> Tuple[str, ...]:
+    """Comma-separated ActivityRecord field names -> tuple (400 on unknown names)"""
+    if fields is None:
+        return default
+    names = tuple(dict.fromkeys(f.strip() for f in fields.split(",") if f.strip()))
+    unknown = [n for n in names if n not in ActivityRecord.FIELDS]
+    if unknown:
+        raise HTTPException(status_code=400, detail=f"Unknown fields: {', '.join(unknown)}")
+    return names
+
+
+def _parse_cursor(cursor: Optional[str]) -> Optional[int]:
+    """Sequence number of a cursor issued by this process's store, else None (forces a reset)"""
+    epoch, _, seq = (cursor or "").partition("-")
+    if epoch != ACTIVITY_STORE.epoch or not seq.isdigit():
+        return None
+    return int(seq)
 
 
 @router.get("/activity/{user_id}")
-async def get_activity(user_id: str, limit: int = Query(100, ge=1, le=1000)):
+async def get_activity(
+    user_id: str,
+    limit: int = Query(100, ge=1, le=1000),
+    fields: Optional[str] = Query(None, description="Comma-separated record fields (default: all)"),
+):
     """Fetch recent activity records for a user (in-memory)."""
-    items = ACTIVITY_STORE.get(user_id, [])
+    names = _record_fields(fields, ActivityRecord.FIELDS)
     # return last `limit` items
-    return {"user_id": user_id, "count": len(items), "items": items[-limit:]}
+    items = ACTIVITY_STORE.recent(user_id, limit)
+    return {"user_id": user_id, "count": ACTIVITY_STORE.count(user_id), "items": [r.to_dict(names) for r in items]}
+
+
+@router.get("/activity/{user_id}/changes")
+async def get_activity_changes(
+    user_id: str,
+    cursor: Optional[str] = Query(None, description="`cursor` from the previous response; omit for a full sync"),
+    fields: Optional[str] = Query(None, description="Comma-separated record fields (default: all but text, classified_scores, emotions)"),
+):
+    """Records added since `cursor`, with what they add to the per-site/category/sentiment aggregates.
+
+    `reset: true` means the client's copy is stale (first sync, records trimmed
+    or evicted since the cursor, or a server restart): replace it with `items`.
+    """
+    names = _record_fields(fields, tuple(f for f in ActivityRecord.FIELDS if f not in ActivityRecord.HEAVY_FIELDS))
+    changes = ACTIVITY_STORE.changes(user_id, _parse_cursor(cursor))
+    win = changes.window
+    aggregates = None
+    if win is not None:
+        aggregates = {
+            "records": int(len(win.seq)),
+            "time_seconds": float(win.duration.sum()),
+            "sites": win.sum_by(win.site, win.duration),
+            "categories": win.sum_by(win.category, win.duration),
+            "sentiments": {k: int(v) for k, v in win.sum_by(win.sentiment).items()},
+        }
+    return {
+        "user_id": user_id,
+        "cursor": f"{ACTIVITY_STORE.epoch}-{changes.cursor}",
+        "reset": changes.reset,
+        "count": len(changes.records),
+        "items": [r.to_dict(names) for r in changes.records],
+        "aggregates": aggregates,
+    }
 
 
 @router.delete("/activity/{user_id}")
 async def delete_activity(user_id: str):
     """Clear activity for a user (useful in dev/testing)."""
-    removed = ACTIVITY_STORE.pop(user_id, None)
-    return {"status": "ok", "removed": 0 if removed is None else len(removed)}
+    removed = ACTIVITY_STORE.pop(user_id)
+    return {"status": "ok", "removed": removed}
 
 
-async def _persist_to_database(record: dict, analysis_result: Optional[dict]):
+async def _persist_to_database(
+    record: dict, analysis_result: Optional[dict], system_category: Optional[str] = None, reused_analysis: Optional[dict] = None
+) -> Dict[str, str]:
     """Persist session and analysis results into Supabase tables.
 
-    Tables: page_view_sessions, content_analysis
+    Tables: page_view_sessions, content_analysis (a reused analysis is only re-attributed to this user)
+    Returns the errors of the writes that failed by table (each is logged).
     """
-    if supabase is None:
+    if not db.configured:
         raise RuntimeError("Supabase client not configured")
 
+    errors: Dict[str, str] = {}
+
     user_id = record.get("user_id")
     url = record.get("url")
-    parsed = urlparse(url) if url else None
-    domain = (parsed.netloc or "").lower() if parsed else None
+    domain = host_of(url)
 
     # Build start/end times
     now_dt = datetime.now(timezone.utc)
@@ -241,41 +500,80 @@ async def _persist_to_database(record: dict, analysis_result: Optional[dict]):
         start_dt = now_dt
         end_dt = now_dt
 
-    # Insert session row
-    try:
-        session_payload = {
-            "user_id": user_id,
-            "url": url,
-            "domain": domain,
-            "start_time": start_dt.isoformat(),
-            "end_time": end_dt.isoformat(),
-        }
-        supabase.table("page_view_sessions").insert(session_payload).execute()
-    except Exception as e:
-        logger.warning(f"Failed to insert page_view_sessions: {e}")
+    # Analysis before the session: the session insert trigger categorises from this user's content_analysis row
+    # A reused analysis keeps its scores and scraped_at (so the freshness window is not extended)
+    # but is attributed to this user: the dashboard reads content_analysis rows by user_id
+    if reused_analysis is not None:
+        if reused_analysis.get("user_id") != user_id:
+            try:
+                await db.analyses.upsert({
+                    "user_id": user_id,
+                    "page_url": url,
+                    **{column: reused_analysis.get(column) for column in EMOTION_COLUMNS.values()},
+                    "dominant_emotion": reused_analysis.get("dominant_emotion"),
+                    "system_suggested_category": reused_analysis.get("system_suggested_category"),
+                    "scraped_at": reused_analysis.get("scraped_at"),
+                })
+                data_versions.bump(user_id, ACTIVITY)
+                RECENT_ANALYSES.attribute(url, user_id)
+            except Exception as e:
+                logger.warning(f"Failed to upsert content_analysis: {e}")
+                errors["content_analysis"] = str(e)
 
     # Prepare content_analysis upsert if analysis available
-    if (analysis_result and isinstance(analysis_result, dict)) or record.get("classified_category"):
+    elif (analysis_result and isinstance(analysis_result, dict)) or system_category:
         try:
             emotions = ((analysis_result or {}).get("emotions") or {}).get("all_emotions") or []
             # index by label
             emo_map = {str(e.get("label")).lower(): float(e.get("score", 0.0)) for e in emotions if isinstance(e, dict)}
             dom = ((analysis_result or {}).get("emotions") or {}).get("dominant") or {}
             dominant_label = dom.get("label") if isinstance(dom, dict) else None
-            category_primary = ((analysis_result or {}).get("category") or {}).get("primary") or record.get("classified_category")
 
             analysis_payload = {
                 "user_id": user_id,
                 "page_url": url,
-                "happy_score": emo_map.get("joy", 0.0),
-                "sad_score": emo_map.get("sadness", 0.0),
-                "angry_score": emo_map.get("anger", 0.0),
-                "neutral_score": emo_map.get("neutral", 0.0),
+                **{column: emo_map.get(label, 0.0) for label, column in EMOTION_COLUMNS.items()},
                 "dominant_emotion": dominant_label,
-                "system_suggested_category": category_primary,
+                # Refreshed on every re-analysis so RECENT_ANALYSES can tell how old the row is
+                "scraped_at": now_dt.isoformat(),
             }
+            # The row is shared by everyone visiting the URL: a user's own rule never lands in it
+            # (with one, the classifier did not run and the stored category is left as it is)
+            if system_category:
+                analysis_payload["system_suggested_category"] = system_category
             # Upsert on page_url uniqueness
-            supabase.table("content_analysis").upsert(analysis_payload, on_conflict="page_url").execute()
+            await db.analyses.upsert(analysis_payload)
+            data_versions.bump(user_id, ACTIVITY)
+            # Sentiment is kept with the cached row only (content_analysis has no column for it)
+            RECENT_ANALYSES.remember(url, dict(analysis_payload, sentiment=record.get("sentiment")), now_dt.timestamp())
         except Exception as e:
             logger.warning(f"Failed to upsert content_analysis: {e}")
+            errors["content_analysis"] = str(e)
+
+    # Coalesce into the user's open session for this URL; rows are written on close/flush
+    if sessionizer.enabled:
+        sessionizer.add(user_id, url, domain, start_dt, end_dt)
+    else:
+        try:
+            session_payload = {
+                "user_id": user_id,
+                "url": url,
+                "domain": domain,
+                "start_time": start_dt.isoformat(),
+                "end_time": end_dt.isoformat(),
+            }
+            inserted = await db.sessions.insert([session_payload])
+            data_versions.bump(user_id, ACTIVITY)
+            written = (inserted or [{}])[0]
+            dashboard_events.publish(user_id, ACTIVITY_EVENT, {"sessions": [{
+                "day": start_dt.date().isoformat(),
+                "category": written.get("rollup_category") or "uncategorized",
+                "domain": domain,
+                "seconds": max(0.0, (end_dt - start_dt).total_seconds()),
+            }]})
+        except Exception as e:
+            logger.warning(f"Failed to insert page_view_sessions: {e}")
+            errors["page_view_sessions"] = str(e)
+
+    return errors
 
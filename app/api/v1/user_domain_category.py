@@ -1,13 +1,20 @@
 from fastapi import APIRouter, HTTPException, Request
-from app.core.supabase_client import supabase
+from postgrest import APIError
+from loguru import logger
+from app.core.config import settings
+from app.core.response_cache import SETTINGS, data_versions
+from app.core.dashboard_events import REFRESH, dashboard_events
+from app.core.database import db
 
 router = APIRouter()
 
+UNIQUE_VIOLATION = "23505"
+
 
 @router.post("/user_domain_category/save")
 async def save_user_domain_data(request: Request):
 
-    if supabase is None:
+    if not db.configured:
         raise HTTPException(status_code=500, detail="Supabase client not initialized")
 
     body = await request.json()
@@ -28,56 +35,52 @@ async def save_user_domain_data(request: Request):
 
     # ----------- INSERT INTO user_domain_categories -----------
     try:
-        category_response = (
-            supabase
-            .table("user_domain_categories")
-            .insert({
+        category_response = {
+            "data": await db.domain_categories.insert({
                 "user_id": user_id,
                 "domain_pattern": domain_pattern,
                 "category": category,
                 "priority": priority
             })
-            .execute()
-        )
-
-        if category_response.error:
-            msg = category_response.error.message
-
-            if "duplicate key" in msg.lower():
-                category_response = {
-                    "warning": f"Category already exists for pattern '{domain_pattern}'"
-                }
-            else:
-                raise HTTPException(status_code=400, detail=msg)
-
+        }
+    except APIError as e:
+        if e.code != UNIQUE_VIOLATION:
+            raise HTTPException(status_code=400, detail=e.message)
+        category_response = {
+            "warning": f"Category already exists for pattern '{domain_pattern}'"
+        }
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
     try:
-        limit_response = (
-            supabase
-            .table("user_domain_limits")
-            .insert({
+        limit_response = {
+            "data": await db.domain_limits.insert({
                 "user_id": user_id,
                 "domain": domain_pattern,
                 "allowed_minutes": allowed_minutes
             })
-            .execute()
-        )
-
-        if limit_response.error:
-            msg = limit_response.error.message
-
-            if "duplicate key" in msg.lower():
-                limit_response = {
-                    "warning": f"Limit already exists for domain '{domain_pattern}'"
-                }
-            else:
-                raise HTTPException(status_code=400, detail=msg)
-
+        }
+    except APIError as e:
+        if e.code != UNIQUE_VIOLATION:
+            raise HTTPException(status_code=400, detail=e.message)
+        limit_response = {
+            "warning": f"Limit already exists for domain '{domain_pattern}'"
+        }
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
+    # Sessions keep the category they were counted under until rebuilt
+    if settings.DASHBOARD_USE_ROLLUPS:
+        try:
+            await db.rollups.rebuild(user_id)
+        except Exception as e:
+            logger.error(f"Rollup rebuild failed for {user_id}: {e}")
+            raise HTTPException(status_code=500, detail=str(e))
+
+    # Cached dashboards built from the old rules/limits are stale now
+    data_versions.bump(user_id, SETTINGS)
+    dashboard_events.publish(user_id, REFRESH, {"reason": "settings"})
+
     return {
         "success": True,
         "category_result": category_response,
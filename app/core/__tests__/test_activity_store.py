@@ -0,0 +1,45 @@
+from app.core.activity_store import ActivityRecord, ActivityStore
+
+
+def _event(i, category="news"):
+    return {
+        "url": f"https://site{i % 2}.com/{i}",
+        "text": "page text " * 50,
+        "duration_seconds": 10.0,
+        "received_at": 1000.0 + i,
+        "classified_category": category,
+        "sentiment": {"label": "positive"},
+    }
+
+
+def test_changes_after_cursor_and_reset_when_trimmed():
+    store = ActivityStore(max_records_per_user=3)
+    for i in range(2):
+        store.append("u1", _event(i))
+
+    first = store.changes("u1", None)
+    assert first.reset and len(first.records) == 2
+
+    store.append("u2", _event(9))  # other users' records do not show up
+    store.append("u1", _event(2, category="social"))
+    delta = store.changes("u1", first.cursor)
+    assert not delta.reset and [r.url for r in delta.records] == ["https://site0.com/2"]
+    assert delta.window.sum_by(delta.window.category, delta.window.duration) == {"social": 10.0}
+    assert store.changes("u1", delta.cursor).records == []
+
+    for i in range(3, 7):
+        store.append("u1", _event(i))
+    stale = store.changes("u1", delta.cursor)  # record 3 was trimmed before the client saw it
+    assert stale.reset and [r.url for r in stale.records] == [f"https://site{i % 2}.com/{i}" for i in range(4, 7)]
+
+    store.pop("u1")
+    assert store.changes("u1", stale.cursor).reset
+
+
+def test_to_dict_projection_skips_heavy_fields():
+    store = ActivityStore(text_mode="compress")
+    record = store.append("u1", dict(_event(0), user_id="u1", event_id="e0"))
+    light = [f for f in ActivityRecord.FIELDS if f not in ActivityRecord.HEAVY_FIELDS]
+    assert set(record.to_dict(light)) == set(light)
+    assert record.to_dict(("text",))["text"].startswith("page text")
+    assert record.to_dict(("user_id", "event_id")) == {"user_id": "u1", "event_id": "e0"}
@@ -0,0 +1,168 @@
+import asyncio
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+from fastapi import Depends, FastAPI
+from fastapi.testclient import TestClient
+from cryptography.hazmat.primitives import serialization
+from cryptography.hazmat.primitives.asymmetric import ec, rsa
+from jose import jwk, jwt
+
+from app.api.v1.auth import auth
+from app.core.auth_tokens import KeyUnavailable, TokenError, TokenVerifier
+from app.core.config import settings
+
+ISSUER = "http://issuer.test/auth/v1"
+
+
+class StubIssuer:
+    """Local JWKS endpoint whose signing keys can be rotated"""
+
+    def __init__(self):
+        self.keys = {}
+        self.fetches = 0
+        issuer = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                issuer.fetches += 1
+                body = json.dumps({"keys": [public for _, public in issuer.keys.values()]}).encode()
+                self.send_response(200)
+                self.send_header("Content-Type", "application/json")
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, *args):
+                pass
+
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self.url = f"http://127.0.0.1:{self.server.server_port}/auth/v1/.well-known/jwks.json"
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+
+    def add_key(self, kid, alg="RS256"):
+        private = rsa.generate_private_key(65537, 2048) if alg == "RS256" else ec.generate_private_key(ec.SECP256R1())
+        pem = private.private_bytes(serialization.Encoding.PEM, serialization.PrivateFormat.PKCS8, serialization.NoEncryption())
+        public_pem = private.public_key().public_bytes(serialization.Encoding.PEM, serialization.PublicFormat.SubjectPublicKeyInfo)
+        public = {**jwk.construct(public_pem, alg).to_dict(), "kid": kid, "alg": alg, "use": "sig"}
+        self.keys[kid] = (pem, public)
+
+    def unpublished_token(self):
+        """Signed with a key the issuer never published"""
+        self.add_key("rogue")
+        token = self.token("rogue")
+        del self.keys["rogue"]
+        return token
+
+    def token(self, kid, alg="RS256", expires_in=3600, signed_by=None, **claims):
+        payload = {"sub": "user-1", "aud": "authenticated", "iss": ISSUER, "exp": int(time.time()) + expires_in, **claims}
+        return jwt.encode(payload, self.keys[signed_by or kid][0], algorithm=alg, headers={"kid": kid})
+
+
+@pytest.fixture
+def issuer():
+    stub = StubIssuer()
+    yield stub
+    stub.server.shutdown()
+
+
+def _verifier(issuer, **kwargs):
+    return TokenVerifier(jwks_url=issuer.url, issuer=ISSUER, jwks_min_refresh_seconds=0, **kwargs)
+
+
+def test_verifies_locally_and_caches_keys_and_claims(issuer):
+    issuer.add_key("k1")
+    issuer.add_key("k2", alg="ES256")
+    verifier = _verifier(issuer)
+
+    async def main():
+        first = await verifier.verify(issuer.token("k1", email="a@example.com"))
+        es = await verifier.verify(issuer.token("k2", alg="ES256"))
+        return first, es
+
+    first, es = asyncio.run(main())
+    assert first["sub"] == "user-1" and first["email"] == "a@example.com" and es["sub"] == "user-1"
+    assert issuer.fetches == 1
+
+
+def test_rotation_refetches_for_unknown_kid(issuer):
+    issuer.add_key("old")
+    verifier = _verifier(issuer)
+    asyncio.run(verifier.verify(issuer.token("old")))
+
+    issuer.add_key("new")
+    claims = asyncio.run(verifier.verify(issuer.token("new")))
+    assert claims["sub"] == "user-1" and issuer.fetches == 2
+
+    with pytest.raises(KeyUnavailable):
+        asyncio.run(verifier.verify(issuer.unpublished_token()))
+
+
+def test_rejects_expired_wrong_audience_and_bad_signature(issuer):
+    issuer.add_key("k1")
+    verifier = _verifier(issuer)
+
+    with pytest.raises(TokenError, match="expired"):
+        asyncio.run(verifier.verify(issuer.token("k1", expires_in=-60)))
+    with pytest.raises(TokenError):
+        asyncio.run(verifier.verify(issuer.token("k1", aud="someone-else")))
+    header, payload, signature = issuer.token("k1").split(".")
+    with pytest.raises(TokenError):
+        asyncio.run(verifier.verify(f"{header}.{payload}.{signature[::-1]}"))
+
+
+def test_key_not_header_decides_the_algorithm(issuer):
+    issuer.add_key("rsa")
+    issuer.add_key("ec", alg="ES256")
+    verifier = _verifier(issuer)
+    # RS256 header pointing at the EC key
+    with pytest.raises(TokenError):
+        asyncio.run(verifier.verify(issuer.token("ec", signed_by="rsa")))
+    # A published key without an `alg` falls back to its key type
+    del issuer.keys["ec"][1]["alg"]
+    verifier = _verifier(issuer)
+    assert asyncio.run(verifier.verify(issuer.token("ec", alg="ES256")))["sub"] == "user-1"
+
+
+def test_secret_tokens_and_missing_secret():
+    token = jwt.encode({"sub": "user-2", "aud": "authenticated", "exp": int(time.time()) + 60}, "s3cret", algorithm="HS256")
+    assert asyncio.run(TokenVerifier(secret="s3cret").verify(token))["sub"] == "user-2"
+    with pytest.raises(KeyUnavailable):
+        asyncio.run(TokenVerifier().verify(token))
+
+
+def test_get_current_user_falls_back_to_remote_only_when_needed(issuer, monkeypatch):
+    issuer.add_key("k1")
+    remote_calls = []
+
+    class FakeAuth:
+        def get_user(self, token):
+            remote_calls.append(token)
+            user = type("User", (), {"id": "user-1", "email": None, "aud": "authenticated", "role": "authenticated"})()
+            return type("Resp", (), {"user": user})()
+
+    monkeypatch.setattr(auth, "token_verifier", _verifier(issuer))
+    monkeypatch.setattr(auth, "supabase", type("Client", (), {"auth": FakeAuth()})())
+    monkeypatch.setattr(settings, "SUPABASE_URL", "http://issuer.test")
+    monkeypatch.setattr(settings, "SUPABASE_KEY", "anon")
+    app = FastAPI()
+
+    @app.get("/me")
+    async def me(user=Depends(auth.get_current_user)):
+        return user
+
+    client = TestClient(app)
+    local = client.get("/me", headers={"Authorization": f"Bearer {issuer.token('k1', role='authenticated')}"})
+    assert local.json()["id"] == "user-1" and not remote_calls
+
+    expired = client.get("/me", headers={"Authorization": f"Bearer {issuer.token('k1', expires_in=-60)}"})
+    assert expired.status_code == 401 and not remote_calls
+
+    unknown = issuer.unpublished_token()
+    # Same payload whichever path verified the token
+    assert client.get("/me", headers={"Authorization": f"Bearer {unknown}"}).json() == local.json()
+    monkeypatch.setattr(settings, "AUTH_REMOTE_FALLBACK", False)
+    assert client.get("/me", headers={"Authorization": f"Bearer {unknown}"}).status_code == 401
+    assert remote_calls == [unknown]
@@ -0,0 +1,45 @@
+import asyncio
+
+import httpx
+from postgrest import AsyncPostgrestClient
+
+from app.core.database import Database
+
+
+def _db(handler):
+    http = httpx.AsyncClient(transport=httpx.MockTransport(handler))
+    return Database.using(AsyncPostgrestClient("http://rest.test/rest/v1", headers={"apikey": "k"}, http_client=http))
+
+
+def test_session_writes_insert_then_upsert_by_id():
+    seen = []
+
+    def handler(request):
+        seen.append(request)
+        return httpx.Response(201, json=[{"session_id": 1, "rollup_category": "social"}])
+
+    db = _db(handler)
+
+    async def main():
+        inserted = await db.sessions.insert([{"url": "https://a.test/"}])
+        await db.sessions.update([{"session_id": 1, "url": "https://a.test/"}])
+        return inserted
+
+    assert asyncio.run(main()) == [{"session_id": 1, "rollup_category": "social"}]
+    insert, update = seen
+    assert insert.method == update.method == "POST"
+    assert "on_conflict" not in insert.url.params and update.url.params["on_conflict"] == "session_id"
+    assert "resolution=merge-duplicates" in update.headers["prefer"]
+
+
+def test_pool_is_configured_and_lazily_created():
+    db = Database("https://proj.supabase.co/", "anon", max_connections=7, timeout=3.0, http2=False)
+    assert not Database("", "").configured
+
+    client = db.client
+    assert db.client is client and str(client.base_url) == "https://proj.supabase.co/rest/v1"
+    assert client.session.timeout.read == 3.0
+    assert client.headers["Authorization"] == "Bearer anon"
+    asyncio.run(db.aclose())
+    assert db.configured and db.client is not client  # reopened on the next use
+    asyncio.run(db.aclose())
@@ -0,0 +1,474 @@
+"""
+In-memory Activity Store
+Bounded per-user ring buffers of compact activity records.
+Keeps the tracking API's recent-activity view and the in-memory dashboard
+summaries without letting a busy worker's memory grow without limit.
+
+Alongside the records, each user has a time-indexed columnar copy of the
+fields the summaries aggregate (timestamp, duration, interned site/category/
+sentiment codes) so period queries bisect to the window start and aggregate
+with NumPy instead of walking every record.
+"""
+
+import sys
+import time
+import zlib
+from collections import OrderedDict, deque
+from threading import RLock
+from typing import Any, Deque, Dict, List, NamedTuple, Optional, Sequence
+
+import numpy as np
+from loguru import logger
+
+
+TEXT_MODES = ("keep", "compress", "drop")
+
+
+class ActivityRecord:
+    """Compact activity record (one ingest event) stored per user"""
+
+    __slots__ = (
+        "user_id",
+        "url",
+        "title",
+        "_text",
+        "start_ts",
+        "end_ts",
+        "duration_seconds",
+        "clicks",
+        "keypresses",
+        "engagement_score",
+        "event_id",
+        "received_at",
+        "sentiment",
+        "classified_category",
+        "category_group",
+        "classified_scores",
+        "emotions",
+        "nbytes",
+        "seq",
+    )
+
+    # Record fields exposed through to_dict(), in API output order
+    FIELDS = (
+        "user_id",
+        "url",
+        "title",
+        "text",
+        "start_ts",
+        "end_ts",
+        "duration_seconds",
+        "clicks",
+        "keypresses",
+        "engagement_score",
+        "event_id",
+        "received_at",
+        "sentiment",
+        "classified_category",
+        "category_group",
+        "classified_scores",
+        "emotions",
+    )
+    # Large per-record payloads that list views usually leave out
+    HEAVY_FIELDS = ("text", "classified_scores", "emotions")
+
+    def __init__(self, data: Dict[str, Any], text_mode: str = "keep"):
+        self.user_id = data.get("user_id")
+        self.url = data.get("url")
+        self.title = data.get("title")
+        self.start_ts = data.get("start_ts")
+        self.end_ts = data.get("end_ts")
+        self.duration_seconds = data.get("duration_seconds")
+        self.clicks = int(data.get("clicks") or 0)
+        self.keypresses = int(data.get("keypresses") or 0)
+        self.engagement_score = data.get("engagement_score")
+        self.event_id = data.get("event_id")
+        self.received_at = data.get("received_at")
+        self.sentiment = data.get("sentiment")
+        self.classified_category = data.get("classified_category")
+        self.category_group = data.get("category_group")
+        self.classified_scores = data.get("classified_scores")
+        self.emotions = data.get("emotions")
+
+        text = data.get("text")
+        if not text or text_mode == "drop":
+            self._text = None
+        elif text_mode == "compress":
+            self._text = zlib.compress(text.encode("utf-8"), 6)
+        else:
+            self._text = text
+
+        self.nbytes = self._estimate_size()
+        self.seq = 0  # set by ActivityStore.append
+
+    @property
+    def text(self) -> Optional[str]:
+        """Page text, transparently decompressed when stored compressed"""
+        if isinstance(self._text, bytes):
+            return zlib.decompress(self._text).decode("utf-8")
+        return self._text
+
+    def to_dict(self, fields: Sequence[str] = FIELDS) -> Dict[str, Any]:
+        """Expand the record back into a plain dict for API responses (only `fields`; text is decompressed only if asked for)"""
+        return {name: getattr(self, name) for name in fields}
+
+    def _estimate_size(self) -> int:
+        """Approximate bytes held by this record (object + owned payloads).
+
+        Small cached objects (ints, interned strings) are counted anyway, so
+        the estimate errs on the high side which is what a budget wants.
+        """
+        size = sys.getsizeof(self)
+        for name in ("user_id", "url", "title", "_text", "event_id", "classified_category", "category_group"):
+            value = getattr(self, name)
+            if value is not None:
+                size += sys.getsizeof(value)
+        for name in ("sentiment", "classified_scores", "emotions"):
+            size += _deep_sizeof(getattr(self, name))
+        return size
+
+
+def _sentiment_label(sentiment: Any) -> Optional[str]:
+    if isinstance(sentiment, dict):
+        return sentiment.get("label") or sentiment.get("sentiment")
+    if isinstance(sentiment, str):
+        return sentiment
+    return None
+
+
+def _deep_sizeof(obj: Any) -> int:
+    """Size of small nested analysis payloads (dicts/lists of scalars)"""
+    if obj is None:
+        return 0
+    size = sys.getsizeof(obj)
+    if isinstance(obj, dict):
+        for k, v in obj.items():
+            size += sys.getsizeof(k) + _deep_sizeof(v)
+    elif isinstance(obj, (list, tuple)):
+        for v in obj:
+            size += _deep_sizeof(v)
+    return size
+
+
+class _Interner:
+    """Maps strings to small integer codes (-1 for missing values)"""
+
+    __slots__ = ("_codes", "labels")
+
+    def __init__(self, labels: Optional[List[str]] = None):
+        # `labels` is only ever appended to, or replaced wholesale on rebuild,
+        # so a window can keep a reference to decode its codes later
+        self.labels: List[str] = labels or []
+        self._codes: Dict[str, int] = {v: i for i, v in enumerate(self.labels)}
+
+    def __len__(self) -> int:
+        return len(self.labels)
+
+    def code(self, value: Optional[str]) -> int:
+        if not value:
+            return -1
+        code = self._codes.get(value)
+        if code is None:
+            code = len(self.labels)
+            self._codes[value] = code
+            self.labels.append(value)
+        return code
+
+
+class ActivityWindow(NamedTuple):
+    """Columnar slice of a user's activity, ordered by timestamp"""
+
+    ts: np.ndarray
+    duration: np.ndarray
+    site: np.ndarray
+    category: np.ndarray
+    sentiment: np.ndarray
+    labels: List[str]
+    seq: np.ndarray
+
+    def label(self, code: int) -> Optional[str]:
+        """Decode an interned site/category/sentiment code"""
+        return self.labels[code] if code >= 0 else None
+
+    def sum_by(self, codes: np.ndarray, weights: Optional[np.ndarray] = None) -> Dict[str, float]:
+        """{label: summed weight} over rows with a code (row counts when no weights)"""
+        mask = codes >= 0
+        sums = np.bincount(codes[mask], weights=None if weights is None else weights[mask], minlength=len(self.labels))
+        return {self.labels[i]: float(sums[i]) for i in np.flatnonzero(sums)}
+
+
+class _ActivityColumns:
+    """
+    Ring-aligned, timestamp-sorted columns for one user.
+
+    Rows are appended in ingest order and dropped from the head in step with
+    the record ring buffer. Timestamps are clamped to be non-decreasing so the
+    live region stays sorted and window starts can be found with a bisect.
+    Site/category/sentiment strings share one per-user interner, which is
+    rebuilt from the live rows on compaction so it cannot outgrow the ring.
+    """
+
+    __slots__ = ("ts", "duration", "site", "category", "sentiment", "seq", "labels", "head", "end")
+
+    # float64 ts + float64 duration + 3 x int32 codes + int64 seq
+    ROW_BYTES = 8 + 8 + 4 * 3 + 8
+
+    def __init__(self, capacity: int = 16):
+        self.ts = np.empty(capacity, dtype=np.float64)
+        self.duration = np.empty(capacity, dtype=np.float64)
+        self.site = np.empty(capacity, dtype=np.int32)
+        self.category = np.empty(capacity, dtype=np.int32)
+        self.sentiment = np.empty(capacity, dtype=np.int32)
+        self.seq = np.empty(capacity, dtype=np.int64)
+        self.labels = _Interner()
+        self.head = 0
+        self.end = 0
+
+    def __len__(self) -> int:
+        return self.end - self.head
+
+    def append(
+        self, ts: float, duration: float, site: str, category: Optional[str], sentiment: Optional[str], seq: int, max_rows: int
+    ) -> None:
+        if self.end == len(self.ts):
+            self._make_room(max_rows)
+        if self.end > self.head and ts < self.ts[self.end - 1]:
+            ts = float(self.ts[self.end - 1])
+        i = self.end
+        self.ts[i] = ts
+        self.duration[i] = duration
+        self.site[i] = self.labels.code(site)
+        self.category[i] = self.labels.code(category)
+        self.sentiment[i] = self.labels.code(sentiment)
+        self.seq[i] = seq
+        self.end += 1
+
+    def drop_oldest(self) -> None:
+        if self.end > self.head:
+            self.head += 1
+
+    def window(self, since: Optional[float] = None, after_seq: Optional[int] = None) -> ActivityWindow:
+        """Copy of the rows with ts >= since and seq > after_seq (all rows when both are None)"""
+        start = self.head
+        if since is not None:
+            start += int(np.searchsorted(self.ts[self.head:self.end], since, side="left"))
+        if after_seq is not None:
+            start = max(start, self.head + int(np.searchsorted(self.seq[self.head:self.end], after_seq, side="right")))
+        sl = slice(start, self.end)
+        return ActivityWindow(
+            ts=self.ts[sl].copy(),
+            duration=self.duration[sl].copy(),
+            site=self.site[sl].copy(),
+            category=self.category[sl].copy(),
+            sentiment=self.sentiment[sl].copy(),
+            labels=self.labels.labels,
+            seq=self.seq[sl].copy(),
+        )
+
+    def _make_room(self, max_rows: int) -> None:
+        live = self.end - self.head
+        # Compact in place when the dropped head frees enough space, else grow.
+        # Capacity settles at ~2x the ring size, so compaction is amortised O(1).
+        if self.head and live <= len(self.ts) // 2:
+            new_cap = len(self.ts)
+        else:
+            new_cap = max(16, min(2 * len(self.ts), 2 * max_rows))
+            new_cap = max(new_cap, live + 1)
+        for name in ("ts", "duration", "site", "category", "sentiment", "seq"):
+            old = getattr(self, name)
+            new = old if new_cap == len(old) else np.empty(new_cap, dtype=old.dtype)
+            new[:live] = old[self.head:self.end]
+            setattr(self, name, new)
+        self.head = 0
+        self.end = live
+        if len(self.labels) > 4 * max_rows:
+            self._rebuild_labels()
+
+    def _rebuild_labels(self) -> None:
+        """Drop labels no live row refers to and renumber the code columns"""
+        n = self.end
+        codes = np.concatenate([self.site[:n], self.category[:n], self.sentiment[:n]])
+        used = np.unique(codes[codes >= 0])
+        remap = np.full(len(self.labels), -1, dtype=np.int32)
+        remap[used] = np.arange(len(used), dtype=np.int32)
+        for col in (self.site, self.category, self.sentiment):
+            live = col[:n]
+            col[:n] = np.where(live >= 0, remap[live], -1)
+        old = self.labels.labels
+        self.labels = _Interner([old[i] for i in used])
+
+
+class _UserHistory:
+    """Record ring buffer plus its columnar index for one user"""
+
+    __slots__ = ("records", "columns", "nbytes", "floor")
+
+    def __init__(self, floor: int):
+        self.records: Deque[ActivityRecord] = deque()
+        self.columns = _ActivityColumns()
+        self.nbytes = 0
+        self.floor = floor  # records up to this sequence number are not (or no longer) retained
+
+
+class ActivityChanges(NamedTuple):
+    """Records appended after a cursor, oldest first, with their columns"""
+
+    records: List[ActivityRecord]
+    window: Optional[ActivityWindow]
+    cursor: int  # pass back as `after` to get what comes next
+    reset: bool  # records before the cursor are gone: `records` is the full retained history
+
+
+class ActivityStore:
+    """
+    Per-user ring buffers of ActivityRecord with a global memory budget.
+
+    - Each user keeps at most `max_records_per_user` records (oldest dropped).
+    - Total estimated bytes are kept under `max_bytes`; when exceeded, the
+      least recently active users are evicted first. The user being written
+      to is only trimmed (oldest records) if it alone exceeds the budget.
+    - `text_mode` controls page text retention once analysis is done:
+      "keep" stores it as-is, "compress" zlib-compresses it, "drop" discards it.
+    - `window()` serves the dashboard summaries from per-user columns.
+    - Every record gets a sequence number, increasing across the store (and
+      so per user); `changes()` returns what a user gained after one.
+    """
+
+    def __init__(self, max_records_per_user: int = 500, max_bytes: int = 64 * 1024 * 1024, text_mode: str = "compress"):
+        if text_mode not in TEXT_MODES:
+            raise ValueError(f"text_mode must be one of {TEXT_MODES}, got {text_mode!r}")
+        self.max_records_per_user = max(1, int(max_records_per_user))
+        self.max_bytes = max(1, int(max_bytes))
+        self.text_mode = text_mode
+        # user_id -> history; ordering is least -> most recently active
+        self._users: "OrderedDict[str, _UserHistory]" = OrderedDict()
+        self._total_bytes = 0
+        self._seq = 0
+        # Distinguishes this process's sequence numbers from those of a restarted one
+        self.epoch = format(int(time.time()), "x")
+        self._lock = RLock()
+
+    # ------------------------------------------------------------------ writes
+
+    def append(self, user_id: str, data: Dict[str, Any]) -> ActivityRecord:
+        """Store one activity record for a user and enforce the bounds"""
+        record = ActivityRecord(data, text_mode=self.text_mode)
+        record.nbytes += _ActivityColumns.ROW_BYTES
+
+        ts = record.received_at or record.end_ts or record.start_ts
+        try:
+            ts = float(ts) if ts is not None else time.time()
+        except (TypeError, ValueError):
+            ts = time.time()
+        try:
+            duration = float(record.duration_seconds or 0.0)
+        except (TypeError, ValueError):
+            duration = 0.0
+
+        with self._lock:
+            history = self._users.get(user_id)
+            if history is None:
+                history = _UserHistory(floor=self._seq)
+                self._users[user_id] = history
+            else:
+                self._users.move_to_end(user_id)
+
+            if len(history.records) >= self.max_records_per_user:
+                self._drop_oldest(history)
+            self._seq += 1
+            record.seq = self._seq
+            history.records.append(record)
+            history.columns.append(
+                ts,
+                duration,
+                record.url or "unknown",
+                record.classified_category,
+                _sentiment_label(record.sentiment),
+                record.seq,
+                self.max_records_per_user,
+            )
+            history.nbytes += record.nbytes
+            self._total_bytes += record.nbytes
+
+            self._enforce_budget(user_id)
+        return record
+
+    def pop(self, user_id: str) -> int:
+        """Remove all records for a user, returning how many were dropped"""
+        with self._lock:
+            history = self._users.pop(user_id, None)
+            if history is None:
+                return 0
+            self._total_bytes -= history.nbytes
+            return len(history.records)
+
+    def _drop_oldest(self, history: _UserHistory) -> None:
+        old = history.records.popleft()
+        history.columns.drop_oldest()
+        history.floor = old.seq
+        history.nbytes -= old.nbytes
+        self._total_bytes -= old.nbytes
+
+    def _enforce_budget(self, active_user: str) -> None:
+        # Evict whole inactive users, least recently active first
+        while self._total_bytes > self.max_bytes and len(self._users) > 1:
+            victim = next(iter(self._users))
+            if victim == active_user:
+                break
+            dropped = self.pop(victim)
+            logger.debug(f"Activity store evicted user={victim} ({dropped} records) to stay within budget")
+
+        # A single user over the whole budget: trim its own history
+        history = self._users.get(active_user)
+        while history and self._total_bytes > self.max_bytes and len(history.records) > 1:
+            self._drop_oldest(history)
+
+    # ------------------------------------------------------------------- reads
+
+    def recent(self, user_id: str, limit: int) -> List[ActivityRecord]:
+        """The last `limit` records for a user, oldest first"""
+        with self._lock:
+            history = self._users.get(user_id)
+            if not history:
+                return []
+            return list(history.records)[-limit:]
+
+    def window(self, user_id: str, since: Optional[float] = None) -> Optional[ActivityWindow]:
+        """Columnar view of a user's records with timestamp >= since.
+
+        Cost is proportional to the window, not the user's full history.
+        Returns None when the user has no records at all.
+        """
+        with self._lock:
+            history = self._users.get(user_id)
+            if not history:
+                return None
+            return history.columns.window(since)
+
+    def changes(self, user_id: str, after: Optional[int]) -> ActivityChanges:
+        """Records a user gained after sequence number `after`; cost is proportional to the changes.
+
+        With no cursor, or one older than the oldest retained record (trimmed,
+        evicted or cleared since), `reset` is set and every retained record is
+        returned.
+        """
+        with self._lock:
+            history = self._users.get(user_id)
+            if history is None:
+                return ActivityChanges([], None, 0, after != 0)
+            reset = after is None or after < history.floor
+            if reset:
+                after = history.floor
+            records: List[ActivityRecord] = []
+            for record in reversed(history.records):
+                if record.seq <= after:
+                    break
+                records.append(record)
+            records.reverse()
+            cursor = records[-1].seq if records else after
+            return ActivityChanges(records, history.columns.window(after_seq=after), cursor, reset)
+
+    def count(self, user_id: str) -> int:
+        with self._lock:
+            history = self._users.get(user_id)
+            return len(history.records) if history else 0
@@ -0,0 +1,144 @@
+"""
+Recent Analysis Reuse
+Answers "was this URL analysed within the freshness window?" so ingest can
+reuse the stored `content_analysis` scores and category instead of scraping
+and running the models again. A local LRU of recently analysed URLs serves
+most checks; misses are looked up in `content_analysis`, with concurrent
+lookups coalesced into one batched query.
+"""
+
+import asyncio
+import time
+from collections import OrderedDict
+from datetime import datetime, timezone
+from typing import Dict, List, Optional, Set, Tuple
+
+from loguru import logger
+
+from app.core.metrics import metrics
+from app.core.database import db
+
+ANALYSIS_COLUMNS = "user_id,page_url,scraped_at,happy_score,sad_score,angry_score,neutral_score,dominant_emotion,system_suggested_category"
+
+
+async def _fetch_fresh_rows(urls: List[str], cutoff: float) -> List[dict]:
+    """content_analysis rows for `urls` analysed at or after `cutoff` (epoch seconds)"""
+    if not db.configured:
+        return []
+    since = datetime.fromtimestamp(cutoff, tz=timezone.utc)
+    return await db.analyses.analysed_since(urls, since, ANALYSIS_COLUMNS)
+
+
+def _parse_ts(value) -> Optional[float]:
+    try:
+        return datetime.fromisoformat(str(value).replace("Z", "+00:00")).timestamp()
+    except (TypeError, ValueError):
+        return None
+
+
+class RecentAnalyses:
+    """
+    URL -> stored analysis row, for analyses younger than `fresh_seconds`.
+
+    `lookup()` checks the LRU first; on a miss it joins the pending batch,
+    which is sent as one `page_url IN (...)` query after `batch_delay`
+    seconds or as soon as `batch_size` URLs are waiting. A failed lookup is
+    treated as a miss, so ingest falls back to analysing the page. Rows
+    without a classifier category (the analysing user's own rule replaced
+    the classifier) are not reused.
+    Counters: `analysis_reuse.hits` / `.misses` and `.db_lookups`.
+    """
+
+    def __init__(
+        self,
+        fresh_seconds: float,
+        max_entries: int = 50_000,
+        batch_size: int = 50,
+        batch_delay: float = 0.005,
+    ):
+        self.fresh_seconds = float(fresh_seconds)
+        self.max_entries = max(1, int(max_entries))
+        self.batch_size = max(1, int(batch_size))
+        self.batch_delay = float(batch_delay)
+        self._recent: "OrderedDict[str, Tuple[float, dict]]" = OrderedDict()
+        self._pending: Dict[str, asyncio.Future] = {}
+        self._flush_handle: Optional[asyncio.TimerHandle] = None
+        self._flushes: Set[asyncio.Task] = set()
+
+    @property
+    def enabled(self) -> bool:
+        return self.fresh_seconds > 0
+
+    async def lookup(self, url: str) -> Optional[dict]:
+        """Stored analysis row for `url` if it is still fresh, else None"""
+        if not self.enabled or not url:
+            return None
+        hit = self._recent.get(url)
+        if hit is not None:
+            if time.time() - hit[0] < self.fresh_seconds:
+                self._recent.move_to_end(url)
+                metrics.inc("analysis_reuse.hits")
+                return hit[1]
+            del self._recent[url]
+
+        row = await self._lookup_db(url) if db.configured else None
+        metrics.inc("analysis_reuse.hits" if row is not None else "analysis_reuse.misses")
+        return row
+
+    def remember(self, url: str, row: dict, analyzed_at: Optional[float] = None) -> None:
+        """Record a fresh analysis (called after it has been persisted)"""
+        if not self.enabled or not url:
+            return
+        if not row.get("system_suggested_category"):
+            self._recent.pop(url, None)
+            return
+        self._recent[url] = (analyzed_at if analyzed_at is not None else time.time(), row)
+        self._recent.move_to_end(url)
+        while len(self._recent) > self.max_entries:
+            self._recent.popitem(last=False)
+
+    def attribute(self, url: str, user_id: str) -> None:
+        """Record that the cached analysis of `url` now belongs to `user_id` (its age is unchanged)"""
+        hit = self._recent.get(url)
+        if hit is not None:
+            self._recent[url] = (hit[0], dict(hit[1], user_id=user_id))
+
+    async def _lookup_db(self, url: str) -> Optional[dict]:
+        future = self._pending.get(url)
+        if future is None:
+            loop = asyncio.get_running_loop()
+            future = loop.create_future()
+            self._pending[url] = future
+            if len(self._pending) >= self.batch_size:
+                self._start_flush()
+            elif self._flush_handle is None:
+                self._flush_handle = loop.call_later(self.batch_delay, self._start_flush)
+        # shield: a cancelled ingest must not cancel the lookup other ingests share
+        return await asyncio.shield(future)
+
+    def _start_flush(self) -> None:
+        if self._flush_handle is not None:
+            self._flush_handle.cancel()
+            self._flush_handle = None
+        batch, self._pending = self._pending, {}
+        if batch:
+            task = asyncio.create_task(self._flush(batch))
+            self._flushes.add(task)
+            task.add_done_callback(self._flushes.discard)
+
+    async def _flush(self, batch: Dict[str, asyncio.Future]) -> None:
+        cutoff = time.time() - self.fresh_seconds
+        found: Dict[str, dict] = {}
+        try:
+            metrics.inc("analysis_reuse.db_lookups")
+            for row in await _fetch_fresh_rows(list(batch), cutoff):
+                url = row.get("page_url")
+                analyzed_at = _parse_ts(row.get("scraped_at"))
+                if url in batch and analyzed_at is not None and row.get("system_suggested_category"):
+                    found[url] = row
+                    self.remember(url, row, analyzed_at)
+        except Exception as e:
+            logger.debug(f"Recent analysis lookup failed for {len(batch)} urls: {e}")
+        for url, future in batch.items():
+            if not future.done():
+                future.set_result(found.get(url))
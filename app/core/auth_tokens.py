@@ -0,0 +1,194 @@
+"""
+Access Token Verification
+Verifies Supabase access tokens (JWTs) in-process instead of asking the auth
+server about every request: the signature is checked against the project's
+JWKS (asymmetric signing keys, fetched once and cached) or the configured
+JWT secret (legacy HS256 projects), along with expiry and audience.
+
+Signing keys rotate by publishing a new key id: a token whose `kid` is not
+in the cached set triggers a refetch (rate-limited), and the set is also
+refreshed periodically so retired keys drop out. Verified claims are kept
+briefly per token (keyed by its SHA-256, never past `exp`), so a client
+polling with the same token skips even the signature check.
+
+A token that cannot be checked locally (no key for its `kid`, no secret for
+HS256) raises KeyUnavailable so the caller can fall back to the auth server.
+"""
+
+import asyncio
+import hashlib
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Optional, Tuple
+
+import httpx
+from jose import jwt
+from jose.exceptions import ExpiredSignatureError, JOSEError
+from loguru import logger
+
+from app.core.config import settings
+from app.core.metrics import metrics
+
+ASYMMETRIC_ALGORITHMS = ("RS256", "ES256")
+SECRET_ALGORITHMS = ("HS256",)
+KEY_TYPE_ALGORITHMS = {"RSA": "RS256", "EC": "ES256"}  # For JWKs published without an `alg`
+
+
+class TokenError(Exception):
+    """The token is malformed, badly signed, expired or not meant for us"""
+
+
+class KeyUnavailable(Exception):
+    """No local key can check this token"""
+
+
+class ClaimsCache:
+    """LRU of verified claims per token digest; an entry never outlives the token"""
+
+    def __init__(self, ttl_seconds: float, max_entries: int = 10_000):
+        self.ttl_seconds = float(ttl_seconds)
+        self.max_entries = max(1, int(max_entries))
+        self._entries: "OrderedDict[bytes, Tuple[float, Dict[str, Any]]]" = OrderedDict()
+
+    def get(self, digest: bytes) -> Optional[Dict[str, Any]]:
+        entry = self._entries.get(digest)
+        if entry is not None:
+            if entry[0] > time.time():
+                self._entries.move_to_end(digest)
+                metrics.inc("auth_claims_cache.hits")
+                return entry[1]
+            del self._entries[digest]
+        metrics.inc("auth_claims_cache.misses")
+        return None
+
+    def put(self, digest: bytes, claims: Dict[str, Any]) -> None:
+        expires_at = min(time.time() + self.ttl_seconds, float(claims.get("exp") or 0))
+        if expires_at <= time.time():
+            return
+        self._entries[digest] = (expires_at, claims)
+        self._entries.move_to_end(digest)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+
+class TokenVerifier:
+    """
+    Local JWT verification for one issuer. `jwks_url` serves the asymmetric
+    keys; `secret` checks HS256 tokens. Either may be empty.
+    """
+
+    def __init__(
+        self,
+        jwks_url: str = "",
+        secret: str = "",
+        audience: Optional[str] = "authenticated",
+        issuer: Optional[str] = None,
+        jwks_cache_seconds: float = 600.0,
+        jwks_min_refresh_seconds: float = 30.0,
+        claims_cache_seconds: float = 60.0,
+        claims_cache_max_entries: int = 10_000,
+        timeout_seconds: float = 5.0,
+    ):
+        self.jwks_url = jwks_url
+        self.secret = secret
+        self.audience = audience or None
+        self.issuer = issuer or None
+        self.jwks_cache_seconds = float(jwks_cache_seconds)
+        self.jwks_min_refresh_seconds = float(jwks_min_refresh_seconds)
+        self.timeout_seconds = float(timeout_seconds)
+        self.claims = ClaimsCache(claims_cache_seconds, claims_cache_max_entries)
+        self._keys: Dict[str, Dict[str, Any]] = {}
+        self._fetched_at = float("-inf")  # monotonic time of the last fetch attempt
+        self._fetch_lock = asyncio.Lock()
+
+    async def verify(self, token: str) -> Dict[str, Any]:
+        """Claims of a valid token; raises TokenError or KeyUnavailable"""
+        digest = hashlib.sha256(token.encode()).digest()
+        claims = self.claims.get(digest)
+        if claims is not None:
+            return claims
+
+        try:
+            header = jwt.get_unverified_header(token)
+        except JOSEError as e:
+            raise TokenError(f"malformed token: {e}") from e
+        alg = header.get("alg")
+        if alg in SECRET_ALGORITHMS:
+            if not self.secret:
+                raise KeyUnavailable("no JWT secret configured")
+            key: Any = self.secret
+        elif alg in ASYMMETRIC_ALGORITHMS:
+            key = await self._signing_key(header.get("kid"))
+            # The key decides the algorithm; a header naming another one fails the decode
+            alg = key.get("alg") or KEY_TYPE_ALGORITHMS.get(key.get("kty"))
+            if alg not in ASYMMETRIC_ALGORITHMS:
+                raise TokenError(f"unsupported signing key algorithm {alg!r}")
+        else:
+            raise TokenError(f"unsupported algorithm {alg!r}")
+
+        try:
+            claims = jwt.decode(
+                token,
+                key,
+                algorithms=[alg],
+                audience=self.audience,
+                issuer=self.issuer,
+                options={"verify_aud": self.audience is not None, "require_exp": True, "require_sub": True},
+            )
+        except ExpiredSignatureError as e:
+            raise TokenError("token expired") from e
+        except JOSEError as e:
+            raise TokenError(str(e)) from e
+        self.claims.put(digest, claims)
+        return claims
+
+    async def _signing_key(self, kid: Optional[str]) -> Dict[str, Any]:
+        if not self.jwks_url:
+            raise KeyUnavailable("no JWKS URL configured")
+        age = time.monotonic() - self._fetched_at
+        # An unknown kid usually means the keys rotated: refetch, but not more often than the minimum interval
+        if age >= self.jwks_cache_seconds or (kid not in self._keys and age >= self.jwks_min_refresh_seconds):
+            await self._refresh(self._fetched_at)
+        key = self._keys.get(kid)
+        if key is None and kid is None and len(self._keys) == 1:
+            key = next(iter(self._keys.values()))
+        if key is None:
+            raise KeyUnavailable(f"no signing key with kid {kid!r}")
+        return key
+
+    async def _refresh(self, seen_at: float) -> None:
+        """Refetch the key set, unless another caller already did since `seen_at`"""
+        async with self._fetch_lock:
+            if self._fetched_at != seen_at:
+                return
+            self._fetched_at = time.monotonic()
+            try:
+                async with httpx.AsyncClient(timeout=self.timeout_seconds) as client:
+                    resp = await client.get(self.jwks_url)
+                    resp.raise_for_status()
+                    keys = resp.json().get("keys") or []
+            except (httpx.HTTPError, ValueError) as e:
+                # Keep verifying with the keys we have; retried after the refresh interval
+                logger.warning(f"JWKS fetch from {self.jwks_url} failed: {e}")
+                metrics.inc("auth_jwks.fetch_errors")
+                return
+            self._keys = {k["kid"]: k for k in keys if isinstance(k, dict) and k.get("kid")}
+            metrics.inc("auth_jwks.fetches")
+
+
+def _default_jwks_url() -> str:
+    if settings.AUTH_JWKS_URL:
+        return settings.AUTH_JWKS_URL
+    return f"{settings.SUPABASE_URL.rstrip('/')}/auth/v1/.well-known/jwks.json" if settings.SUPABASE_URL else ""
+
+
+token_verifier = TokenVerifier(
+    jwks_url=_default_jwks_url(),
+    secret=settings.SUPABASE_JWT_SECRET,
+    audience=settings.AUTH_JWT_AUDIENCE,
+    issuer=f"{settings.SUPABASE_URL.rstrip('/')}/auth/v1" if settings.SUPABASE_URL else None,
+    jwks_cache_seconds=settings.AUTH_JWKS_CACHE_SECONDS,
+    jwks_min_refresh_seconds=settings.AUTH_JWKS_MIN_REFRESH_SECONDS,
+    claims_cache_seconds=settings.AUTH_CLAIMS_CACHE_SECONDS,
+    claims_cache_max_entries=settings.AUTH_CLAIMS_CACHE_MAX_ENTRIES,
+)
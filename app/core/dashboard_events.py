@@ -0,0 +1,132 @@
+"""
+Dashboard Event Feed
+Per-user feed of small dashboard changes (sessions written by the
+sessionizer, settings saved), pushed to open dashboard streams
+(GET /api/v1/dashboard/stream) instead of having them poll full payloads.
+
+Each user with a stream keeps a bounded buffer of recent events with
+increasing sequence numbers, so a client that reconnects with Last-Event-ID
+gets what it missed. Publishing for a user nobody is watching is a no-op.
+Like the response cache versions, the feed lives in this process: event ids
+carry the process epoch, and an id from another epoch (a restart, another
+worker) or older than the buffer means the client must refetch.
+"""
+
+import asyncio
+import time
+from collections import OrderedDict, deque
+from contextlib import contextmanager
+from threading import Lock
+from typing import Deque, Dict, Iterator, List, NamedTuple, Optional, Set, Tuple
+
+from app.core.config import settings
+from app.core.metrics import metrics
+
+ACTIVITY = "activity"  # data: {"sessions": [{day, category, domain, seconds}]}, seconds added since the last write (negative when a re-categorised session moves out of a category)
+REFRESH = "refresh"  # data: {"reason"}; the client should refetch full payloads
+
+
+class DashboardEvent(NamedTuple):
+    seq: int
+    kind: str
+    data: Dict
+
+
+class _Channel:
+    __slots__ = ("events", "floor", "waiters")
+
+    def __init__(self, buffer_size: int, floor: int):
+        self.events: Deque[DashboardEvent] = deque(maxlen=buffer_size)
+        self.floor = floor  # events up to this sequence number are not (or no longer) buffered
+        self.waiters: Set[Tuple[asyncio.AbstractEventLoop, asyncio.Event]] = set()
+
+
+class DashboardEvents:
+    """
+    Thread-safe: publishers need not run on the event loop. Subscribers
+    hold an asyncio.Event that publish sets, then read what is new with
+    `since`; a publish costs one append and one wakeup per open stream.
+    Counters: `dashboard_events.published` / `.delivered_wakeups`.
+    """
+
+    def __init__(self, buffer_size: int = 256, max_users: int = 10_000):
+        self.buffer_size = max(1, int(buffer_size))
+        self.max_users = max(1, int(max_users))
+        self.epoch = format(int(time.time()), "x")
+        self._seq = 0  # shared by all users, so an id is never reused within the process
+        self._channels: "OrderedDict[str, _Channel]" = OrderedDict()
+        self._lock = Lock()
+
+    def publish(self, user_id: Optional[str], kind: str, data: Dict) -> None:
+        if not user_id:
+            return
+        with self._lock:
+            channel = self._channels.get(user_id)
+            if channel is None:
+                return
+            self._seq += 1
+            if len(channel.events) == channel.events.maxlen:
+                channel.floor = channel.events[0].seq
+            channel.events.append(DashboardEvent(self._seq, kind, data))
+            self._channels.move_to_end(user_id)
+            waiters = list(channel.waiters)
+        metrics.inc("dashboard_events.published")
+        for loop, wakeup in waiters:
+            try:
+                loop.call_soon_threadsafe(wakeup.set)
+                metrics.inc("dashboard_events.delivered_wakeups")
+            except RuntimeError:  # the subscriber's loop has closed
+                pass
+
+    @contextmanager
+    def subscribe(self, user_id: str) -> Iterator[asyncio.Event]:
+        """Register the running loop's stream; the event is set whenever something is published"""
+        wakeup = asyncio.Event()
+        waiter = (asyncio.get_running_loop(), wakeup)
+        with self._lock:
+            channel = self._channels.get(user_id)
+            if channel is None:
+                channel = self._channels[user_id] = _Channel(self.buffer_size, self._seq)
+                self._evict()
+            self._channels.move_to_end(user_id)
+            channel.waiters.add(waiter)
+        try:
+            yield wakeup
+        finally:
+            with self._lock:
+                channel.waiters.discard(waiter)
+
+    def _evict(self) -> None:
+        """Drop the least recently active users nobody is watching (lock held)"""
+        excess = len(self._channels) - self.max_users
+        for user_id in [u for u, c in self._channels.items() if not c.waiters][:max(0, excess)]:
+            del self._channels[user_id]
+
+    def last_seq(self) -> int:
+        """Id to start a new stream from (nothing before it is replayed)"""
+        with self._lock:
+            return self._seq
+
+    def since(self, user_id: str, seq: int) -> Tuple[List[DashboardEvent], bool]:
+        """(events after `seq`, complete); complete is False when some were already dropped from the buffer"""
+        with self._lock:
+            channel = self._channels.get(user_id)
+            if channel is None or not channel.floor <= seq <= self._seq:
+                return [], False
+            return [e for e in channel.events if e.seq > seq], True
+
+    def event_id(self, seq: int) -> str:
+        return f"{self.epoch}-{seq}"
+
+    def parse_id(self, event_id: Optional[str]) -> Optional[int]:
+        """Sequence number of an id issued by this process, else None"""
+        epoch, _, seq = (event_id or "").strip().partition("-")
+        if epoch != self.epoch or not seq.isdigit():
+            return None
+        return int(seq)
+
+
+dashboard_events = DashboardEvents(
+    buffer_size=settings.DASHBOARD_STREAM_BUFFER_EVENTS,
+    max_users=settings.DASHBOARD_STREAM_MAX_USERS,
+)
@@ -0,0 +1,178 @@
+"""
+Database Access
+One async PostgREST client for the whole process, on a shared httpx
+connection pool (HTTP/2 when `h2` is installed, so concurrent queries are
+multiplexed over a few connections instead of opening one each). Handlers
+await queries on the event loop; nothing blocks a worker thread.
+
+The app lifespan opens the pool at startup and closes it at shutdown;
+scripts and tests get it created on first use. Table access goes through
+the repositories in app/core/repositories.py (`db.sessions`, `db.analyses`,
+...); `db.client` is there for RPCs and tables outside docs/schema.sql.
+Auth still uses the supabase client in app/core/supabase_client.py.
+
+With DATABASE_BACKEND=direct (and asyncpg installed) the repositories and
+the dashboard's aggregate queries run on an asyncpg pool on DATABASE_URL
+instead (app/core/postgres.py); `db.pg` is that pool, None otherwise.
+"""
+
+from typing import Optional
+
+import httpx
+from loguru import logger
+from postgrest import AsyncPostgrestClient
+
+from app.core.config import settings
+from app.core.postgres import ASYNCPG_AVAILABLE, PgPool
+from app.core.repositories import (
+    ContentAnalyses,
+    DailyRollups,
+    DomainCategories,
+    DomainLimits,
+    PageViewSessions,
+    PgContentAnalyses,
+    PgDailyRollups,
+    PgDomainCategories,
+    PgDomainLimits,
+    PgPageViewSessions,
+    PgProfiles,
+    Profiles,
+)
+
+
+class DatabaseUnavailable(RuntimeError):
+    """SUPABASE_URL / SUPABASE_KEY are not configured"""
+
+
+class Database:
+    """The shared PostgREST client (and direct pool, if any) and the table repositories built on them"""
+
+    def __init__(
+        self,
+        url: str,
+        key: str,
+        max_connections: int = 50,
+        max_keepalive_connections: int = 20,
+        keepalive_expiry: float = 30.0,
+        timeout: float = 10.0,
+        connect_timeout: float = 5.0,
+        pool_timeout: float = 5.0,
+        http2: bool = True,
+        client: Optional[AsyncPostgrestClient] = None,
+        pg: Optional[PgPool] = None,
+    ):
+        self.url = url.rstrip("/")
+        self.key = key
+        self.max_connections = max(1, int(max_connections))
+        self.max_keepalive_connections = max(0, int(max_keepalive_connections))
+        self.keepalive_expiry = float(keepalive_expiry)
+        self.timeout = float(timeout)
+        self.connect_timeout = float(connect_timeout)
+        self.pool_timeout = float(pool_timeout)
+        self.http2 = http2
+        self._client = client
+        self._owns_client = client is None
+        self.pg = pg
+
+        direct = pg is not None
+        self.profiles = (PgProfiles if direct else Profiles)(self)
+        self.sessions = (PgPageViewSessions if direct else PageViewSessions)(self)
+        self.analyses = (PgContentAnalyses if direct else ContentAnalyses)(self)
+        self.domain_categories = (PgDomainCategories if direct else DomainCategories)(self)
+        self.domain_limits = (PgDomainLimits if direct else DomainLimits)(self)
+        self.rollups = (PgDailyRollups if direct else DailyRollups)(self)
+
+    @classmethod
+    def using(cls, client: AsyncPostgrestClient) -> "Database":
+        """Repositories over an existing client (e.g. a test database); closing it stays with the caller"""
+        return cls("", "", client=client)
+
+    @property
+    def direct(self) -> bool:
+        return self.pg is not None
+
+    @property
+    def configured(self) -> bool:
+        """The repositories can reach a database"""
+        return self.direct or self._rest_configured
+
+    @property
+    def _rest_configured(self) -> bool:
+        return self._client is not None or bool(self.url and self.key)
+
+    @property
+    def client(self) -> AsyncPostgrestClient:
+        if self._client is None:
+            if not self._rest_configured:
+                raise DatabaseUnavailable("Supabase client not configured")
+            self._client = AsyncPostgrestClient(
+                f"{self.url}/rest/v1",
+                headers={"apikey": self.key, "Authorization": f"Bearer {self.key}"},
+                http_client=self._http_client(),
+            )
+        return self._client
+
+    def _http_client(self) -> httpx.AsyncClient:
+        kwargs = dict(
+            limits=httpx.Limits(
+                max_connections=self.max_connections,
+                max_keepalive_connections=self.max_keepalive_connections,
+                keepalive_expiry=self.keepalive_expiry,
+            ),
+            timeout=httpx.Timeout(self.timeout, connect=self.connect_timeout, pool=self.pool_timeout),
+        )
+        try:
+            return httpx.AsyncClient(http2=self.http2, **kwargs)
+        except ImportError:
+            # http2 needs the optional `h2` package
+            logger.warning("h2 not installed - database client falling back to HTTP/1.1")
+            return httpx.AsyncClient(**kwargs)
+
+    async def start(self) -> None:
+        """Open the connection pools (called from the app lifespan)"""
+        if self.direct:
+            await self.pg.pool()
+        if not self._rest_configured:
+            if not self.direct:
+                logger.warning("Database client disabled - missing SUPABASE_URL/SUPABASE_KEY")
+            return
+        self.client  # created here rather than by the first request
+        logger.info(f"Database client ready ({self.max_connections} connections, http2={self.http2})")
+
+    async def aclose(self) -> None:
+        """Close the pools; a later query opens new ones"""
+        client, self._client = self._client, None
+        if client is not None and self._owns_client:
+            await client.aclose()
+        if self.pg is not None:
+            await self.pg.aclose()
+
+
+def _direct_pool() -> Optional[PgPool]:
+    if settings.DATABASE_BACKEND != "direct":
+        return None
+    if not ASYNCPG_AVAILABLE:
+        logger.warning("asyncpg not installed - DATABASE_BACKEND=direct falling back to PostgREST")
+        return None
+    return PgPool(
+        settings.DATABASE_URL,
+        min_size=settings.DATABASE_POOL_MIN_SIZE,
+        max_size=settings.DATABASE_POOL_MAX_SIZE,
+        command_timeout=settings.DATABASE_COMMAND_TIMEOUT_SECONDS,
+        statement_cache_size=settings.DATABASE_STATEMENT_CACHE_SIZE,
+        copy_min_rows=settings.DATABASE_COPY_MIN_ROWS,
+    )
+
+
+db = Database(
+    url=settings.SUPABASE_URL,
+    key=settings.SUPABASE_KEY,
+    max_connections=settings.POSTGREST_MAX_CONNECTIONS,
+    max_keepalive_connections=settings.POSTGREST_MAX_KEEPALIVE_CONNECTIONS,
+    keepalive_expiry=settings.POSTGREST_KEEPALIVE_EXPIRY_SECONDS,
+    timeout=settings.POSTGREST_TIMEOUT_SECONDS,
+    connect_timeout=settings.POSTGREST_CONNECT_TIMEOUT_SECONDS,
+    pool_timeout=settings.POSTGREST_POOL_TIMEOUT_SECONDS,
+    http2=settings.POSTGREST_HTTP2,
+    pg=_direct_pool(),
+)
@@ -0,0 +1,80 @@
+"""
+Time-windowed Dedupe Set
+Remembers client idempotency keys for a bounded window so retried or
+duplicated ingests can be acknowledged without being processed again.
+"""
+
+import time
+from threading import Lock
+from typing import Dict, List, Optional, Set
+
+
+class DedupeWindow:
+    """
+    Hash set of keys with a timing-wheel expiry.
+
+    The window is split into `slots` buckets; a key lives in the bucket for
+    the tick it was first seen and is forgotten when the wheel comes back
+    round to that bucket, i.e. after `window_seconds` (plus at most one tick).
+    Expiry costs O(keys expired) per tick instead of a scan of the whole set.
+    At most `max_keys` are kept; past that the oldest buckets are dropped early.
+    """
+
+    def __init__(self, window_seconds: float, max_keys: int, slots: int = 60):
+        self.window_seconds = float(window_seconds)
+        self.max_keys = max(1, int(max_keys))
+        self.slots = max(1, int(slots))
+        self.tick_seconds = max(self.window_seconds / self.slots, 1e-3)
+        self._wheel: List[Set[str]] = [set() for _ in range(self.slots)]
+        self._slot_of: Dict[str, int] = {}
+        self._tick: Optional[int] = None
+        self._lock = Lock()
+
+    def __len__(self) -> int:
+        return len(self._slot_of)
+
+    def check_and_add(self, key: str, now: Optional[float] = None) -> bool:
+        """Return True if `key` was already seen within the window, else record it"""
+        now = time.monotonic() if now is None else now
+        with self._lock:
+            self._advance(int(now // self.tick_seconds))
+            if key in self._slot_of:
+                return True
+            slot = self._tick % self.slots
+            self._wheel[slot].add(key)
+            self._slot_of[key] = slot
+            if len(self._slot_of) > self.max_keys:
+                self._evict_oldest()
+            return False
+
+    def discard(self, key: str) -> None:
+        """Forget a key (e.g. its first delivery failed and should be retried)"""
+        with self._lock:
+            slot = self._slot_of.pop(key, None)
+            if slot is not None:
+                self._wheel[slot].discard(key)
+
+    def _advance(self, tick: int) -> None:
+        if self._tick is None:
+            self._tick = tick
+            return
+        steps = min(tick - self._tick, self.slots)
+        for i in range(1, steps + 1):
+            self._clear_slot((self._tick + i) % self.slots)
+        self._tick = max(self._tick, tick)
+
+    def _clear_slot(self, slot: int) -> None:
+        bucket = self._wheel[slot]
+        for key in bucket:
+            self._slot_of.pop(key, None)
+        bucket.clear()
+
+    def _evict_oldest(self) -> None:
+        # Buckets after the current tick hold the oldest keys
+        for i in range(1, self.slots + 1):
+            slot = (self._tick + i) % self.slots
+            bucket = self._wheel[slot]
+            while bucket and len(self._slot_of) > self.max_keys:
+                self._slot_of.pop(bucket.pop(), None)
+            if len(self._slot_of) <= self.max_keys:
+                return
@@ -0,0 +1,44 @@
+"""
+Domain Normalization
+One place to turn a URL into its host and registrable domain (eTLD+1).
+Public suffixes come from the snapshot bundled with tldextract: the list is
+never fetched and no cache directory is written, so the first call cannot
+block on the network. Results are memoized per URL, since the same few
+thousand URLs are seen over and over by ingest, persistence and the scraper.
+"""
+
+from functools import lru_cache
+from typing import NamedTuple, Optional
+from urllib.parse import urlsplit
+
+import tldextract
+
+DOMAIN_CACHE_SIZE = 65536
+
+# Bundled public-suffix snapshot only (ICANN section, as tldextract.extract uses)
+_suffixes = tldextract.TLDExtract(suffix_list_urls=(), cache_dir=None, fallback_to_snapshot=True)
+
+
+class DomainParts(NamedTuple):
+    host: str  # lowercased hostname without userinfo, port or trailing dot
+    registrable: str  # e.g. "bbc.co.uk"; the host itself for IPs, localhost, etc.
+
+
+@lru_cache(maxsize=DOMAIN_CACHE_SIZE)
+def parse_url(url: str) -> DomainParts:
+    """url -> (host, registrable domain); empty strings when the URL has no host"""
+    try:
+        host = (urlsplit(url).hostname or "").rstrip(".")
+    except ValueError:  # e.g. malformed IPv6 literal
+        host = ""
+    if not host:
+        return DomainParts("", "")
+    parts = _suffixes.extract_str(host)
+    registrable = f"{parts.domain}.{parts.suffix}" if parts.domain and parts.suffix else host
+    return DomainParts(host, registrable)
+
+
+def host_of(url: Optional[str]) -> Optional[str]:
+    """Normalised host of `url`, or None when there isn't one"""
+    return (parse_url(url).host or None) if url else None
+
@@ -0,0 +1,43 @@
+"""
+In-process Metrics
+Thread-safe named counters for cache/dedupe/coalescing hit rates,
+exposed through `GET /api/v1/metrics`.
+"""
+
+from collections import defaultdict
+from threading import Lock
+from typing import Dict
+
+
+class Metrics:
+    """Registry of monotonically increasing counters"""
+
+    def __init__(self):
+        self._counters: Dict[str, int] = defaultdict(int)
+        self._lock = Lock()
+
+    def inc(self, name: str, value: int = 1) -> None:
+        with self._lock:
+            self._counters[name] += value
+
+    def hit_rate(self, prefix: str) -> float:
+        """`<prefix>.hits / (<prefix>.hits + <prefix>.misses)`, 0.0 when unused"""
+        with self._lock:
+            hits = self._counters.get(f"{prefix}.hits", 0)
+            misses = self._counters.get(f"{prefix}.misses", 0)
+        total = hits + misses
+        return round(hits / total, 4) if total else 0.0
+
+    def snapshot(self) -> Dict[str, object]:
+        """All counters, plus a hit rate for every `<prefix>.hits` counter"""
+        with self._lock:
+            counters = dict(sorted(self._counters.items()))
+        prefixes = [name[: -len(".hits")] for name in counters if name.endswith(".hits")]
+        return {
+            "counters": counters,
+            "hit_rates": {p: self.hit_rate(p) for p in prefixes},
+        }
+
+
+# Global metrics instance
+metrics = Metrics()
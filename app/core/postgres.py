@@ -0,0 +1,172 @@
+"""
+Direct Postgres Backend
+Optional fast path for DATABASE_BACKEND=direct: an asyncpg connection pool
+on DATABASE_URL in place of the PostgREST round trips.
+
+- Bulk writes are one statement per batch: a multi-row
+  `INSERT ... SELECT FROM unnest($1, $2, ...) ON CONFLICT ...` (one
+  prepared statement whatever the batch size), or, from
+  DATABASE_COPY_MIN_ROWS rows, COPY into a temporary staging table
+  followed by the same INSERT ... SELECT.
+- asyncpg prepares every statement and keeps it per connection (up to
+  DATABASE_STATEMENT_CACHE_SIZE), so the dashboard's fixed queries are
+  parsed and planned once per connection. Behind a transaction-mode pooler
+  (Supabase's port 6543) set the cache size to 0.
+
+Values are passed as text and cast in SQL, so rows have the same shape as
+the PostgREST JSON bodies; results come back JSON-shaped too (ISO
+timestamps and dates, string UUIDs, float numerics). Statement errors are
+raised as postgrest.APIError with the SQLSTATE as `code`, like the
+PostgREST backend.
+"""
+
+import re
+from contextlib import asynccontextmanager
+from datetime import date, datetime
+from decimal import Decimal
+from typing import Any, Dict, List, Optional, Sequence
+from uuid import UUID
+
+from loguru import logger
+from postgrest import APIError
+
+try:
+    import asyncpg
+    ASYNCPG_AVAILABLE = True
+except ImportError:
+    ASYNCPG_AVAILABLE = False
+    asyncpg = None
+
+Rows = List[Dict[str, Any]]
+
+_IDENTIFIER = re.compile(r"^[a-z_][a-z0-9_]*$")
+
+
+def identifiers(columns: str) -> List[str]:
+    """Column names from a PostgREST-style select list; anything else is refused"""
+    names = [c.strip() for c in columns.split(",") if c.strip()]
+    for name in names:
+        if not _IDENTIFIER.match(name):
+            raise ValueError(f"not a plain column name: {name!r}")
+    return names
+
+
+def _json_value(value: Any) -> Any:
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    if isinstance(value, Decimal):
+        return float(value)
+    if isinstance(value, UUID):
+        return str(value)
+    return value
+
+
+def _json_rows(records) -> Rows:
+    return [{k: _json_value(v) for k, v in r.items()} for r in records]
+
+
+def _text(value: Any) -> Optional[str]:
+    return None if value is None else str(value)
+
+
+def _api_error(e: "asyncpg.PostgresError") -> APIError:
+    return APIError({"code": e.sqlstate, "message": str(e), "details": getattr(e, "detail", None), "hint": getattr(e, "hint", None)})
+
+
+class PgPool:
+    """asyncpg pool on one DSN, created at startup (or on first use)"""
+
+    def __init__(
+        self,
+        dsn: str,
+        min_size: int = 1,
+        max_size: int = 10,
+        command_timeout: float = 10.0,
+        statement_cache_size: int = 256,
+        copy_min_rows: int = 500,
+    ):
+        self.dsn = dsn
+        self.min_size = max(0, int(min_size))
+        self.max_size = max(1, int(max_size), self.min_size)
+        self.command_timeout = float(command_timeout)
+        self.statement_cache_size = max(0, int(statement_cache_size))
+        self.copy_min_rows = max(1, int(copy_min_rows))
+        self._pool = None
+
+    async def pool(self):
+        if self._pool is None:
+            self._pool = await asyncpg.create_pool(
+                self.dsn,
+                min_size=self.min_size,
+                max_size=self.max_size,
+                command_timeout=self.command_timeout,
+                statement_cache_size=self.statement_cache_size,
+            )
+            logger.info(f"Postgres pool ready ({self.min_size}-{self.max_size} connections)")
+        return self._pool
+
+    async def aclose(self) -> None:
+        pool, self._pool = self._pool, None
+        if pool is not None:
+            await pool.close()
+
+    @asynccontextmanager
+    async def connection(self):
+        """A pooled connection; statement errors surface as postgrest.APIError"""
+        async with (await self.pool()).acquire() as conn:
+            try:
+                yield conn
+            except asyncpg.PostgresError as e:
+                raise _api_error(e) from e
+
+    async def fetch(self, sql: str, *args) -> Rows:
+        async with self.connection() as conn:
+            return _json_rows(await conn.fetch(sql, *args))
+
+    async def fetchval(self, sql: str, *args) -> Any:
+        async with self.connection() as conn:
+            return _json_value(await conn.fetchval(sql, *args))
+
+    async def write(
+        self,
+        table: str,
+        rows: Sequence[Dict],
+        types: Dict[str, str],
+        conflict: Optional[str] = None,
+        returning: Optional[str] = None,
+    ) -> Rows:
+        """
+        Insert `rows` into `table` in one statement, keeping their order.
+        Every row has the keys of the first; `types` maps each column to
+        its SQL type. With `conflict`, rows whose conflict column already
+        exists update every other given column instead.
+        """
+        if not rows:
+            return []
+        columns = identifiers(",".join(rows[0]))
+        casts = ", ".join(f"c{i}::{types[c]}" for i, c in enumerate(columns))
+        aliases = ", ".join(f"c{i}" for i in range(len(columns)))
+        sql = f"INSERT INTO public.{table} ({', '.join(columns)}) SELECT {casts} FROM {{source}} ORDER BY ord"
+        if conflict:
+            updates = ", ".join(f"{c} = EXCLUDED.{c}" for c in columns if c != conflict)
+            sql += f" ON CONFLICT ({conflict}) DO UPDATE SET {updates}" if updates else f" ON CONFLICT ({conflict}) DO NOTHING"
+        if returning:
+            sql += f" RETURNING {returning if returning == '*' else ', '.join(identifiers(returning))}"
+
+        async with self.connection() as conn:
+            if len(rows) < self.copy_min_rows:
+                arrays = [[_text(r.get(c)) for r in rows] for c in columns]
+                params = ", ".join(f"${i + 1}::text[]" for i in range(len(columns)))
+                source = f"unnest({params}) WITH ORDINALITY AS t({aliases}, ord)"
+                return _json_rows(await conn.fetch(sql.format(source=source), *arrays))
+            async with conn.transaction():
+                stage = f"stage_{table}"
+                await conn.execute(
+                    f"CREATE TEMP TABLE {stage} ({', '.join(f'c{i} text' for i in range(len(columns)))}, ord bigint) ON COMMIT DROP"
+                )
+                await conn.copy_records_to_table(
+                    stage,
+                    records=[tuple(_text(r.get(c)) for c in columns) + (n,) for n, r in enumerate(rows)],
+                    columns=[f"c{i}" for i in range(len(columns))] + ["ord"],
+                )
+                return _json_rows(await conn.fetch(sql.format(source=stage)))
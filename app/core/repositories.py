@@ -0,0 +1,197 @@
+"""
+Table Repositories
+The reads and writes the API makes against the tables in docs/schema.sql,
+one small class per table. The plain classes go through the shared async
+PostgREST client (app/core/database.py); the `Pg*` subclasses run the same
+queries directly on the asyncpg pool (app/core/postgres.py) when
+DATABASE_BACKEND=direct. Methods return JSON-shaped rows either way;
+PostgREST, statement and transport errors (postgrest.APIError,
+httpx.HTTPError, OSError) propagate to the caller, which decides whether a
+failure is fatal.
+"""
+
+from datetime import datetime
+from typing import TYPE_CHECKING, Any, Dict, List, Sequence
+
+from app.core.postgres import identifiers
+
+if TYPE_CHECKING:
+    from app.core.database import Database
+
+Rows = List[Dict[str, Any]]
+
+SESSION_TYPES = {
+    "session_id": "bigint",
+    "user_id": "uuid",
+    "url": "text",
+    "domain": "text",
+    "start_time": "timestamptz",
+    "end_time": "timestamptz",
+}
+ANALYSIS_TYPES = {
+    "user_id": "uuid",
+    "page_url": "text",
+    "scraped_at": "timestamptz",
+    "happy_score": "numeric",
+    "sad_score": "numeric",
+    "angry_score": "numeric",
+    "neutral_score": "numeric",
+    "dominant_emotion": "text",
+    "system_suggested_category": "text",
+}
+CATEGORY_TYPES = {"user_id": "uuid", "domain_pattern": "text", "category": "text", "priority": "int"}
+LIMIT_TYPES = {"user_id": "uuid", "domain": "text", "allowed_minutes": "int"}
+
+
+def _rows(resp) -> Rows:
+    return getattr(resp, "data", None) or []
+
+
+class Repository:
+    """Queries against one table; `table` is set by each subclass"""
+
+    table = ""
+
+    def __init__(self, db: "Database"):
+        self._db = db
+
+    def query(self):
+        """A fresh request builder for this table"""
+        return self._db.client.table(self.table)
+
+
+class Profiles(Repository):
+    table = "profiles"
+
+    async def ids(self, offset: int, limit: int) -> Rows:
+        """[{id}] in id order"""
+        return _rows(await self.query().select("id").order("id").range(offset, offset + limit - 1).execute())
+
+
+class PageViewSessions(Repository):
+    table = "page_view_sessions"
+
+    async def insert(self, rows: Sequence[Dict]) -> Rows:
+        """Insert new sessions; the returned rows carry session_id and rollup_category"""
+        return _rows(await self.query().insert(list(rows)).execute())
+
+    async def update(self, rows: Sequence[Dict]) -> Rows:
+        """Rewrite sessions already inserted (rows include their session_id); returns their current rollup_category"""
+        return _rows(await self.query().upsert(list(rows), on_conflict="session_id").execute())
+
+    async def recent_domains(self, user_id: str, limit: int = 1000) -> Rows:
+        """[{domain, start_time}] of the user's most recent sessions"""
+        return _rows(
+            await self.query()
+            .select("domain,start_time")
+            .eq("user_id", user_id)
+            .order("start_time", desc=True)
+            .limit(limit)
+            .execute()
+        )
+
+
+class ContentAnalyses(Repository):
+    table = "content_analysis"
+
+    async def upsert(self, row: Dict) -> Rows:
+        """Insert or replace the analysis of one page (unique on page_url)"""
+        return _rows(await self.query().upsert(row, on_conflict="page_url").execute())
+
+    async def analysed_since(self, urls: Sequence[str], since: datetime, columns: str) -> Rows:
+        """Rows for `urls` analysed at or after `since`"""
+        return _rows(
+            await self.query()
+            .select(columns)
+            .in_("page_url", list(urls))
+            .gte("scraped_at", since.isoformat())
+            .execute()
+        )
+
+
+class DomainCategories(Repository):
+    table = "user_domain_categories"
+
+    async def for_user(self, user_id: str, columns: str = "domain_pattern,category") -> Rows:
+        return _rows(await self.query().select(columns).eq("user_id", user_id).execute())
+
+    async def insert(self, row: Dict) -> Rows:
+        return _rows(await self.query().insert(row).execute())
+
+
+class DomainLimits(Repository):
+    table = "user_domain_limits"
+
+    async def for_user(self, user_id: str, columns: str = "domain,allowed_minutes") -> Rows:
+        return _rows(await self.query().select(columns).eq("user_id", user_id).execute())
+
+    async def insert(self, row: Dict) -> Rows:
+        return _rows(await self.query().insert(row).execute())
+
+
+class DailyRollups(Repository):
+    table = "user_daily_rollups"
+
+    async def rebuild(self, user_id: str) -> int:
+        """Recount the user's rollups under their current rules (docs/dashboard_rollups.sql); returns rows written"""
+        resp = await self._db.client.rpc("rebuild_user_daily_rollups", {"p_user_id": user_id}).execute()
+        return int(getattr(resp, "data", 0) or 0)
+
+
+# Direct backend: same methods, SQL on the asyncpg pool
+
+
+class PgProfiles(Profiles):
+    async def ids(self, offset: int, limit: int) -> Rows:
+        return await self._db.pg.fetch("SELECT id FROM public.profiles ORDER BY id OFFSET $1 LIMIT $2", offset, limit)
+
+
+class PgPageViewSessions(PageViewSessions):
+    async def insert(self, rows: Sequence[Dict]) -> Rows:
+        return await self._db.pg.write(self.table, rows, SESSION_TYPES, returning="*")
+
+    async def update(self, rows: Sequence[Dict]) -> Rows:
+        return await self._db.pg.write(self.table, rows, SESSION_TYPES, conflict="session_id", returning="session_id,rollup_category")
+
+    async def recent_domains(self, user_id: str, limit: int = 1000) -> Rows:
+        return await self._db.pg.fetch(
+            "SELECT domain, start_time FROM public.page_view_sessions WHERE user_id = $1::uuid ORDER BY start_time DESC LIMIT $2",
+            user_id, limit,
+        )
+
+
+class PgContentAnalyses(ContentAnalyses):
+    async def upsert(self, row: Dict) -> Rows:
+        return await self._db.pg.write(self.table, [row], ANALYSIS_TYPES, conflict="page_url", returning="*")
+
+    async def analysed_since(self, urls: Sequence[str], since: datetime, columns: str) -> Rows:
+        return await self._db.pg.fetch(
+            f"SELECT {', '.join(identifiers(columns))} FROM public.content_analysis"
+            " WHERE page_url = ANY($1::text[]) AND scraped_at >= $2",
+            list(urls), since,
+        )
+
+
+class PgDomainCategories(DomainCategories):
+    async def for_user(self, user_id: str, columns: str = "domain_pattern,category") -> Rows:
+        return await _pg_for_user(self, user_id, columns)
+
+    async def insert(self, row: Dict) -> Rows:
+        return await self._db.pg.write(self.table, [row], CATEGORY_TYPES, returning="*")
+
+
+class PgDomainLimits(DomainLimits):
+    async def for_user(self, user_id: str, columns: str = "domain,allowed_minutes") -> Rows:
+        return await _pg_for_user(self, user_id, columns)
+
+    async def insert(self, row: Dict) -> Rows:
+        return await self._db.pg.write(self.table, [row], LIMIT_TYPES, returning="*")
+
+
+class PgDailyRollups(DailyRollups):
+    async def rebuild(self, user_id: str) -> int:
+        return int(await self._db.pg.fetchval("SELECT public.rebuild_user_daily_rollups($1::uuid)", user_id) or 0)
+
+
+async def _pg_for_user(repo: Repository, user_id: str, columns: str) -> Rows:
+    return await repo._db.pg.fetch(f"SELECT {', '.join(identifiers(columns))} FROM public.{repo.table} WHERE user_id = $1::uuid", user_id)
@@ -0,0 +1,83 @@
+"""
+Dashboard Response Cache
+Rendered dashboard responses per (user, endpoint, period), validated against
+per-user data versions. Writers bump a user's version once their rows have
+landed in the database (sessions, analyses -> ACTIVITY; domain rules and
+limits -> SETTINGS), which invalidates every cached response built from the
+older data. Versions live in this process, so entries also expire after a
+TTL to bound staleness from writes made elsewhere.
+"""
+
+import time
+from collections import OrderedDict
+from threading import Lock
+from typing import Dict, Hashable, NamedTuple, Optional, Tuple
+
+from app.core.config import settings
+from app.core.metrics import metrics
+
+ACTIVITY = "activity"
+SETTINGS = "settings"
+
+
+class DataVersions:
+    """Monotonic per-user counters, bumped by writers (thread-safe, so writers need not run on the event loop)"""
+
+    def __init__(self):
+        self._versions: Dict[Tuple[str, str], int] = {}
+        self._lock = Lock()
+
+    def get(self, user_id: str, kind: str) -> int:
+        return self._versions.get((user_id, kind), 0)
+
+    def bump(self, user_id: Optional[str], *kinds: str) -> None:
+        if not user_id:
+            return
+        with self._lock:
+            for kind in kinds:
+                self._versions[(user_id, kind)] = self._versions.get((user_id, kind), 0) + 1
+
+
+class CachedResponse(NamedTuple):
+    versions: Tuple[int, ...]
+    expires_at: float
+    etag: str
+    body: bytes
+
+
+class ResponseCache:
+    """
+    LRU of rendered bodies. An entry is served only while the versions it
+    was built from are current and its TTL has not run out.
+    Counters: `dashboard_cache.hits` / `.misses`.
+    """
+
+    def __init__(self, max_entries: int = 10_000):
+        self.max_entries = max(1, int(max_entries))
+        self._entries: "OrderedDict[Hashable, CachedResponse]" = OrderedDict()
+
+    def get(self, key: Hashable, versions: Tuple[int, ...]) -> Optional[CachedResponse]:
+        entry = self._entries.get(key)
+        if entry is not None:
+            if entry.versions == versions and entry.expires_at > time.monotonic():
+                self._entries.move_to_end(key)
+                metrics.inc("dashboard_cache.hits")
+                return entry
+            del self._entries[key]
+        metrics.inc("dashboard_cache.misses")
+        return None
+
+    def put(self, key: Hashable, versions: Tuple[int, ...], ttl_seconds: float, etag: str, body: bytes) -> None:
+        if ttl_seconds <= 0:
+            return
+        self._entries[key] = CachedResponse(versions, time.monotonic() + ttl_seconds, etag, body)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+
+data_versions = DataVersions()
+dashboard_cache = ResponseCache(max_entries=settings.DASHBOARD_CACHE_MAX_ENTRIES)
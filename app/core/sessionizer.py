@@ -0,0 +1,204 @@
+"""
+Session Coalescing
+Merges the extension's short heartbeat events for the same user and URL into
+one open page-view session, and writes `page_view_sessions` rows only when a
+session closes or on the periodic flush, instead of one row per event.
+"""
+
+import asyncio
+import time
+from datetime import datetime, timezone
+from threading import Lock
+from typing import Dict, List, Optional, Tuple
+
+from loguru import logger
+
+from app.core.config import settings
+from app.core.dashboard_events import ACTIVITY as ACTIVITY_EVENT, dashboard_events
+from app.core.response_cache import ACTIVITY, data_versions
+from app.core.database import db
+
+
+class OpenSession:
+    """An in-memory page-view session that may still be extended"""
+
+    __slots__ = ("user_id", "url", "domain", "start", "end", "last_seen", "session_id", "dirty", "category", "written_seconds")
+
+    def __init__(self, user_id: str, url: str, domain: Optional[str], start: datetime, end: datetime):
+        self.user_id = user_id
+        self.url = url
+        self.domain = domain
+        self.start = start
+        self.end = end
+        self.last_seen = time.monotonic()
+        self.session_id: Optional[int] = None  # set once the row has been inserted
+        self.dirty = True
+        self.category: Optional[str] = None  # rollup_category, as returned by the last write
+        self.written_seconds = 0.0  # duration as of the last successful write
+
+    def row(self) -> dict:
+        payload = {
+            "user_id": self.user_id,
+            "url": self.url,
+            "domain": self.domain,
+            "start_time": self.start.isoformat(),
+            "end_time": self.end.isoformat(),
+        }
+        if self.session_id is not None:
+            payload["session_id"] = self.session_id
+        return payload
+
+
+class Sessionizer:
+    """
+    Coalesces consecutive events per (user, url).
+
+    An event whose interval starts within `gap_seconds` of the open session's
+    end is merged into it (end_time extended in memory). Otherwise the open
+    session is closed and a new one started. A session idle for longer than
+    `gap_seconds` is closed by the periodic flush, which also writes the
+    current state of still-open sessions so dashboards lag by at most one
+    flush interval.
+    """
+
+    def __init__(self, gap_seconds: float, flush_interval_seconds: float):
+        self.gap_seconds = float(gap_seconds)
+        self.flush_interval_seconds = float(flush_interval_seconds)
+        self._open: Dict[Tuple[str, str], OpenSession] = {}
+        self._closed: List[OpenSession] = []
+        self._lock = Lock()
+
+    @property
+    def enabled(self) -> bool:
+        return self.gap_seconds > 0
+
+    def add(self, user_id: str, url: str, domain: Optional[str], start: datetime, end: datetime) -> None:
+        """Record one event, merging it into the open session when the gap allows"""
+        key = (user_id, url)
+        with self._lock:
+            current = self._open.get(key)
+            if current is not None:
+                gap = (start - current.end).total_seconds()
+                overlaps_before = (current.start - end).total_seconds() <= self.gap_seconds
+                if gap <= self.gap_seconds and overlaps_before:
+                    current.start = min(current.start, start)
+                    current.end = max(current.end, end)
+                    current.last_seen = time.monotonic()
+                    current.dirty = True
+                    return
+                self._closed.append(current)
+            self._open[key] = OpenSession(user_id, url, domain, start, end)
+
+    async def flush(self, close_all: bool = False) -> int:
+        """Persist closed sessions and the current state of dirty open ones.
+
+        Sessions idle for longer than the gap (or all, when `close_all`) are
+        closed first. Returns the number of rows written.
+        """
+        now = time.monotonic()
+        with self._lock:
+            for key, s in list(self._open.items()):
+                if close_all or now - s.last_seen > self.gap_seconds:
+                    self._closed.append(self._open.pop(key))
+            closed, self._closed = self._closed, []
+            pending = [s for s in closed + list(self._open.values()) if s.dirty]
+            for s in pending:
+                s.dirty = False
+            # Snapshot rows under the lock; the writes happen outside it
+            new = [(s, s.row()) for s in pending if s.session_id is None]
+            existing = [(s, s.row()) for s in pending if s.session_id is not None]
+
+        if not pending:
+            return 0
+        if not db.configured:
+            logger.warning(f"Dropping {len(pending)} coalesced sessions: Supabase client not configured")
+            return 0
+
+        written = 0
+        # Sessions neither written nor requeued yet; a cancelled write (e.g. at shutdown) requeues them
+        unsettled = pending
+        try:
+            if new:
+                try:
+                    inserted = await db.sessions.insert([row for _, row in new])
+                    for (s, _), row in zip(new, inserted):
+                        s.session_id = row.get("session_id")
+                    written += len(new)
+                    self._bump_versions(new)
+                    self._publish_deltas(new, [row.get("rollup_category") for row in inserted])
+                except Exception as e:
+                    logger.warning(f"Failed to insert page_view_sessions: {e}")
+                    self._requeue([s for s, _ in new], closed)
+            unsettled = [s for s, _ in existing]
+            if existing:
+                try:
+                    updated = await db.sessions.update([row for _, row in existing])
+                    written += len(existing)
+                    self._bump_versions(existing)
+                    # The write re-runs the categorize trigger, so the category may have changed
+                    category_of = {row.get("session_id"): row.get("rollup_category") for row in updated}
+                    self._publish_deltas(existing, [category_of.get(s.session_id, s.category) for s, _ in existing])
+                except Exception as e:
+                    logger.warning(f"Failed to update page_view_sessions: {e}")
+                    self._requeue([s for s, _ in existing], closed)
+            unsettled = []
+        except BaseException:
+            self._requeue(unsettled, closed)
+            raise
+        return written
+
+    @staticmethod
+    def _bump_versions(written: List[Tuple[OpenSession, dict]]) -> None:
+        """Invalidate cached dashboards of users whose sessions just landed"""
+        for user_id in {s.user_id for s, _ in written}:
+            data_versions.bump(user_id, ACTIVITY)
+
+    @staticmethod
+    def _publish_deltas(written: List[Tuple[OpenSession, dict]], categories: List[Optional[str]]) -> None:
+        """Push the seconds each written session gained to the users' open dashboard streams
+
+        `categories` are the rollup_category values the write returned, one per
+        session. A session whose category changed has the seconds already
+        streamed moved out of its previous category.
+        """
+        per_user: Dict[str, List[dict]] = {}
+        for (s, row), category in zip(written, categories):
+            start = datetime.fromisoformat(row["start_time"])
+            seconds = max(0.0, (datetime.fromisoformat(row["end_time"]) - start).total_seconds())
+            category = category or "uncategorized"
+            day = start.astimezone(timezone.utc).date().isoformat()  # the rollup day
+            deltas = per_user.setdefault(s.user_id, [])
+            added = seconds - s.written_seconds
+            if s.category is not None and category != s.category and s.written_seconds > 0:
+                deltas.append({"day": day, "category": s.category, "domain": s.domain, "seconds": -s.written_seconds})
+                added = seconds
+            if added > 0:
+                deltas.append({"day": day, "category": category, "domain": s.domain, "seconds": added})
+            s.category, s.written_seconds = category, seconds
+        for user_id, sessions in per_user.items():
+            if sessions:
+                dashboard_events.publish(user_id, ACTIVITY_EVENT, {"sessions": sessions})
+
+    def _requeue(self, failed: List[OpenSession], closed: List[OpenSession]) -> None:
+        """Mark failed writes dirty again so the next flush retries them"""
+        closed_ids = {id(s) for s in closed}
+        with self._lock:
+            for s in failed:
+                s.dirty = True
+                if id(s) in closed_ids:
+                    self._closed.append(s)
+
+    async def run(self) -> None:
+        """Background flush loop (started from the app lifespan)"""
+        while True:
+            await asyncio.sleep(self.flush_interval_seconds)
+            try:
+                await self.flush()
+            except Exception as e:
+                logger.warning(f"Session flush failed: {e}")
+
+
+sessionizer = Sessionizer(
+    gap_seconds=settings.SESSION_GAP_SECONDS,
+    flush_interval_seconds=settings.SESSION_FLUSH_INTERVAL_SECONDS,
+)
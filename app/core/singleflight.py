@@ -0,0 +1,70 @@
+"""
+Single-flight Coalescing
+Concurrent callers asking for the same key share one in-flight computation,
+and the result is kept in a short-lived cache for callers that arrive just after.
+"""
+
+import asyncio
+import time
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Dict, Tuple
+
+from app.core.metrics import metrics
+
+
+class SingleFlight:
+    """
+    Per-key request coalescing with a small TTL cache.
+
+    Counters (prefixed with `name`): `.cache.hits` / `.cache.misses` for the
+    TTL cache and `.coalesced` for callers that joined an in-flight call.
+    Failures are propagated to every waiter and never cached. A call whose
+    callers have all been cancelled still runs to completion (and is cached).
+    """
+
+    def __init__(self, name: str, ttl_seconds: float, max_entries: int = 1024):
+        self.name = name
+        self.ttl_seconds = float(ttl_seconds)
+        self.max_entries = max(1, int(max_entries))
+        self._inflight: Dict[str, asyncio.Task] = {}
+        self._cache: "OrderedDict[str, Tuple[float, Any]]" = OrderedDict()
+
+    async def do(self, key: str, fn: Callable[[], Awaitable[Any]]) -> Any:
+        """Return the cached/in-flight result for `key`, or run `fn` to produce it"""
+        cached = self._cache.get(key)
+        if cached is not None:
+            if cached[0] > time.monotonic():
+                metrics.inc(f"{self.name}.cache.hits")
+                return cached[1]
+            del self._cache[key]
+
+        task = self._inflight.get(key)
+        if task is not None:
+            metrics.inc(f"{self.name}.coalesced")
+        else:
+            metrics.inc(f"{self.name}.cache.misses")
+            # The call runs in its own task, so the caller that started it can be
+            # cancelled without cancelling it for the others
+            task = asyncio.ensure_future(self._run(key, fn))
+            task.add_done_callback(_retrieve)
+            self._inflight[key] = task
+        # shield: a cancelled caller must not cancel the shared call
+        return await asyncio.shield(task)
+
+    async def _run(self, key: str, fn: Callable[[], Awaitable[Any]]) -> Any:
+        try:
+            result = await fn()
+        finally:
+            self._inflight.pop(key, None)
+        if self.ttl_seconds > 0:
+            self._cache[key] = (time.monotonic() + self.ttl_seconds, result)
+            self._cache.move_to_end(key)
+            while len(self._cache) > self.max_entries:
+                self._cache.popitem(last=False)
+        return result
+
+
+def _retrieve(task: asyncio.Task) -> None:
+    # Callers re-raise a failure; mark it retrieved so one nobody waited for is not logged
+    if not task.cancelled():
+        task.exception()
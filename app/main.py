@@ -3,12 +3,16 @@ CogniSense Backend - Digital Footprint Tracking & Analysis
 Main FastAPI application entry point
 """
 
-from contextlib import asynccontextmanager
+import asyncio
+from contextlib import asynccontextmanager, suppress
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 
 from app.core.config import settings
 from app.core.logging import setup_logging
+from app.core.database import db
+from app.core.sessionizer import sessionizer
+from app.scraper.scraper import async_scraper, scrape_cache
 from app.ml.model_manager import ModelManager
 from app.api.v1.router import api_router
 
@@ -22,10 +26,25 @@ async def lifespan(app: FastAPI):
     setup_logging()
     model_manager = ModelManager()
     await model_manager.load_models()
+
+    # Shared PostgREST connection pool
+    await db.start()
+
+    # Periodic flush of coalesced page-view sessions
+    session_flusher = asyncio.create_task(sessionizer.run()) if sessionizer.enabled else None
     
     yield  # Application runs
     
-    # Shutdown: Cleanup if needed
+    # Shutdown: write out every open session before exiting
+    if session_flusher is not None:
+        session_flusher.cancel()
+        with suppress(asyncio.CancelledError):
+            await session_flusher
+        await sessionizer.flush(True)
+    await db.aclose()
+    await async_scraper.aclose()
+    if scrape_cache is not None:
+        scrape_cache.close()
     # (Models will be garbage collected automatically)
 
 
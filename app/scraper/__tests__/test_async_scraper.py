@@ -0,0 +1,214 @@
+import asyncio
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+from app.scraper.cache import ScrapeCache
+from app.scraper.scraper import AsyncScraper, _extract_with_bs4, _extract_with_lxml, extract_visible_text_and_metadata
+from app.scraper.streaming import StreamingExtractor
+
+PAGE = b"""<html><head><title>Stub page</title>
+<meta name="description" content="A stub page">
+<script>var x = 1;</script></head>
+<body><header>nav</header><p>Hello from the stub server.</p><p>Second paragraph.</p></body></html>"""
+
+LATENCY = 0.05
+
+# ~4 MB, almost all of it inside <script>, so only the byte cap can stop the read
+BIG_PAGE = b"<html><body><p>Visible intro.</p><script>" + b"x" * (4 * 1024 * 1024) + b"</script><p>Never reached.</p></body></html>"
+
+
+class StubHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def do_GET(self):
+        server = self.server
+        with server.lock:
+            server.active += 1
+            server.requests += 1
+            server.max_active = max(server.max_active, server.active)
+        try:
+            if self.path.startswith("/big"):
+                self._send_big()
+                return
+            time.sleep(2.0 if self.path.startswith("/slow") else LATENCY)
+            if self.headers.get("If-None-Match") == '"v1"':
+                with server.lock:
+                    server.not_modified += 1
+                self.send_response(304)
+                self.send_header("ETag", '"v1"')
+                self.end_headers()
+                return
+            self.send_response(200)
+            self.send_header("ETag", '"v1"')
+            self.send_header("Content-Type", "text/html; charset=utf-8")
+            self.send_header("Content-Length", str(len(PAGE)))
+            self.end_headers()
+            self.wfile.write(PAGE)
+        finally:
+            with server.lock:
+                server.active -= 1
+
+    def _send_big(self):
+        self.send_response(200)
+        self.send_header("Content-Type", "text/html; charset=utf-8")
+        self.send_header("Content-Length", str(len(BIG_PAGE)))
+        self.end_headers()
+        try:
+            for i in range(0, len(BIG_PAGE), 65536):
+                self.wfile.write(BIG_PAGE[i:i + 65536])
+        except (BrokenPipeError, ConnectionResetError):
+            pass
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture
+def stub_server():
+    server = ThreadingHTTPServer(("127.0.0.1", 0), StubHandler)
+    server.daemon_threads = True
+    server.lock = threading.Lock()
+    server.active = server.max_active = server.requests = server.not_modified = 0
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield server, f"http://127.0.0.1:{server.server_address[1]}"
+    server.shutdown()
+    server.server_close()
+
+
+def _run(scraper: AsyncScraper, urls):
+    async def main():
+        try:
+            return await asyncio.gather(*[scraper.extract_visible_text_and_metadata(u) for u in urls])
+        finally:
+            await scraper.aclose()
+    return asyncio.run(main())
+
+
+def test_async_matches_sync_extraction(stub_server):
+    _, base = stub_server
+    sync_result = extract_visible_text_and_metadata(f"{base}/page")
+    [async_result] = _run(AsyncScraper(http2=False), [f"{base}/page"])
+    for key in ("title", "meta_description", "visible_text", "text_length"):
+        assert async_result[key] == sync_result[key]
+    assert async_result["visible_text"] == "Stub page Hello from the stub server. Second paragraph."
+
+
+def test_per_host_concurrency_limit(stub_server):
+    server, base = stub_server
+    scraper = AsyncScraper(max_concurrency=10, max_per_host=2, http2=False)
+    results = _run(scraper, [f"{base}/p{i}" for i in range(8)])
+    assert all("error" not in r for r in results)
+    assert server.max_active <= 2
+    assert scraper._per_host == {}  # idle hosts are not kept
+
+
+def test_busy_host_leaves_global_slots_to_others(stub_server):
+    _, base = stub_server
+    other = base.replace("127.0.0.1", "localhost") + "/other"
+    scraper = AsyncScraper(max_concurrency=2, max_per_host=1, http2=False)
+    finished = []
+
+    async def fetch(url):
+        await scraper.extract_visible_text_and_metadata(url)
+        finished.append(url)
+
+    async def main():
+        try:
+            await asyncio.gather(*[fetch(f"{base}/p{i}") for i in range(6)], fetch(other))
+        finally:
+            await scraper.aclose()
+
+    asyncio.run(main())
+    assert finished.index(other) <= 1  # not queued behind the other host's backlog
+
+
+def test_total_budget(stub_server):
+    _, base = stub_server
+    started = time.perf_counter()
+    [result] = _run(AsyncScraper(total_budget=0.3, http2=False), [f"{base}/slow"])
+    assert "budget" in result["error"]
+    assert time.perf_counter() - started < 1.5
+
+
+def test_throughput_against_blocking_scraper(stub_server):
+    _, base = stub_server
+    urls = [f"{base}/p{i}" for i in range(40)]
+
+    started = time.perf_counter()
+    for u in urls:
+        extract_visible_text_and_metadata(u)
+    sync_rate = len(urls) / (time.perf_counter() - started)
+
+    async def pooled():
+        scraper = AsyncScraper(max_concurrency=20, max_per_host=20, http2=False)
+        try:
+            # Warm the shared client (TLS context, pool) as a long-running worker would be
+            await scraper.extract_visible_text_and_metadata(urls[0])
+            started = time.perf_counter()
+            await asyncio.gather(*[scraper.extract_visible_text_and_metadata(u) for u in urls])
+            return len(urls) / (time.perf_counter() - started)
+        finally:
+            await scraper.aclose()
+
+    async_rate = asyncio.run(pooled())
+
+    print(f"\nblocking requests: {sync_rate:.1f} pages/s, pooled async: {async_rate:.1f} pages/s")
+    assert async_rate > 3 * sync_rate
+
+
+def test_scrape_cache_hit_and_revalidation(stub_server, tmp_path):
+    server, base = stub_server
+    url = f"{base}/cached"
+
+    stale = ScrapeCache(str(tmp_path / "cache.sqlite3"), max_bytes=1 << 20, fresh_seconds=0)
+    first, second = _run(AsyncScraper(http2=False, cache=stale), [url]), _run(AsyncScraper(http2=False, cache=stale), [url])
+    assert first == second
+    assert server.requests == 2 and server.not_modified == 1
+
+    fresh = ScrapeCache(str(tmp_path / "cache.sqlite3"), max_bytes=1 << 20, fresh_seconds=60)
+    [third] = _run(AsyncScraper(http2=False, cache=fresh), [url])
+    assert third == first[0]
+    assert server.requests == 2
+
+
+def test_scrape_cache_lru_eviction(tmp_path):
+    cache = ScrapeCache(str(tmp_path / "cache.sqlite3"), max_bytes=3000, fresh_seconds=60)
+    for i in range(5):
+        cache.put(f"https://e.com/{i}", {"visible_text": "x" * 900}, None, None)
+        time.sleep(0.01)
+        assert cache.get("https://e.com/0") is not None  # keep the first entry recently used
+    assert cache.get("https://e.com/0") is not None
+    assert cache.get("https://e.com/1") is None
+    assert cache.get("https://e.com/4") is not None
+
+
+def test_streaming_stops_once_enough_text_collected():
+    body = b"<html><head><title>Long</title></head><body>" + b"<p>word word word word</p>" * 200_000 + b"</body></html>"
+    extractor = StreamingExtractor(max_chars=3000)
+    for i in range(0, len(body), 16384):
+        if extractor.feed(body[i:i + 16384]):
+            break
+    extractor.close()
+    assert extractor.bytes_read < 64 * 1024 < len(body)
+    assert extractor.title == "Long"
+    assert len(extractor.cleaned_text) > 3000
+
+
+def test_streaming_byte_cap(stub_server):
+    _, base = stub_server
+    [result] = _run(AsyncScraper(http2=False, max_bytes=256 * 1024), [f"{base}/big"])
+    assert "error" not in result
+    assert result["visible_text"] == "Visible intro."
+
+
+def test_lxml_engine_matches_bs4_on_corpus():
+    from scripts.bench_scraper_engines import COMPARED, load_corpus
+
+    for name, html in load_corpus().items():
+        url = f"https://example.com/{name}"
+        expected, actual = _extract_with_bs4(url, html), _extract_with_lxml(url, html)
+        assert {k: actual[k] for k in COMPARED} == {k: expected[k] for k in COMPARED}, name
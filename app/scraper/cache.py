@@ -0,0 +1,126 @@
+"""
+Scrape Cache
+Persistent, size-bounded store of extracted page text/metadata together with
+the HTTP validators (ETag / Last-Modified) needed to revalidate it cheaply.
+Backed by a single SQLite file with LRU eviction by last access.
+"""
+
+import json
+import os
+import sqlite3
+import time
+from threading import Lock
+from typing import Dict, NamedTuple, Optional
+
+from loguru import logger
+
+
+class CacheEntry(NamedTuple):
+    data: dict
+    etag: Optional[str]
+    last_modified: Optional[str]
+    fetched_at: float
+
+    def conditional_headers(self) -> Dict[str, str]:
+        headers = {}
+        if self.etag:
+            headers["If-None-Match"] = self.etag
+        if self.last_modified:
+            headers["If-Modified-Since"] = self.last_modified
+        return headers
+
+
+class ScrapeCache:
+    """
+    URL -> extracted page data, with validators.
+
+    Entries younger than `fresh_seconds` are served as-is; older ones should
+    be revalidated with `conditional_headers()` and refreshed via `touch()`
+    on a 304. Total payload size is kept under `max_bytes` by evicting the
+    least recently used entries.
+    """
+
+    def __init__(self, path: str, max_bytes: int, fresh_seconds: float):
+        self.path = path
+        self.max_bytes = max(1, int(max_bytes))
+        self.fresh_seconds = float(fresh_seconds)
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._lock = Lock()
+        self._db = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute(
+            """
+            CREATE TABLE IF NOT EXISTS scrape_cache (
+                url TEXT PRIMARY KEY,
+                payload TEXT NOT NULL,
+                etag TEXT,
+                last_modified TEXT,
+                fetched_at REAL NOT NULL,
+                last_access REAL NOT NULL,
+                size INTEGER NOT NULL
+            )
+            """
+        )
+        self._db.execute("CREATE INDEX IF NOT EXISTS scrape_cache_lru ON scrape_cache (last_access)")
+        self._total_bytes = self._db.execute("SELECT COALESCE(SUM(size), 0) FROM scrape_cache").fetchone()[0]
+
+    def get(self, url: str) -> Optional[CacheEntry]:
+        with self._lock:
+            row = self._db.execute(
+                "SELECT payload, etag, last_modified, fetched_at FROM scrape_cache WHERE url = ?", (url,)
+            ).fetchone()
+            if row is None:
+                return None
+            self._db.execute("UPDATE scrape_cache SET last_access = ? WHERE url = ?", (time.time(), url))
+        return CacheEntry(json.loads(row[0]), row[1], row[2], row[3])
+
+    def is_fresh(self, entry: CacheEntry) -> bool:
+        return time.time() - entry.fetched_at < self.fresh_seconds
+
+    def put(self, url: str, data: dict, etag: Optional[str], last_modified: Optional[str]) -> None:
+        payload = json.dumps(data, ensure_ascii=False)
+        size = len(payload.encode("utf-8"))
+        if size > self.max_bytes:
+            return
+        now = time.time()
+        with self._lock:
+            old = self._db.execute("SELECT size FROM scrape_cache WHERE url = ?", (url,)).fetchone()
+            self._db.execute(
+                "INSERT OR REPLACE INTO scrape_cache (url, payload, etag, last_modified, fetched_at, last_access, size) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (url, payload, etag, last_modified, now, now, size),
+            )
+            self._total_bytes += size - (old[0] if old else 0)
+            if self._total_bytes > self.max_bytes:
+                self._evict()
+
+    def touch(self, url: str) -> None:
+        """Mark an entry revalidated (304 Not Modified) so it is fresh again"""
+        now = time.time()
+        with self._lock:
+            self._db.execute("UPDATE scrape_cache SET fetched_at = ?, last_access = ? WHERE url = ?", (now, now, url))
+
+    def _evict(self) -> None:
+        # Evict down to 90% of the budget so every put past the limit doesn't pay for eviction
+        target = int(self.max_bytes * 0.9)
+        evicted = 0
+        while self._total_bytes > target:
+            rows = self._db.execute("SELECT url, size FROM scrape_cache ORDER BY last_access ASC LIMIT 64").fetchall()
+            if not rows:
+                self._total_bytes = 0
+                break
+            victims = []
+            for url, size in rows:
+                if self._total_bytes <= target:
+                    break
+                victims.append((url,))
+                self._total_bytes -= size
+            self._db.executemany("DELETE FROM scrape_cache WHERE url = ?", victims)
+            evicted += len(victims)
+        logger.debug(f"Scrape cache evicted {evicted} entries")
+
+    def close(self) -> None:
+        with self._lock:
+            self._db.close()
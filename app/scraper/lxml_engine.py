@@ -0,0 +1,81 @@
+"""
+lxml Extraction Engine
+Drop-in alternative to the BeautifulSoup extractor built on `lxml.html`:
+non-visible subtrees are removed with one XPath query, then a single
+iterwalk collects visible text, <title> and <meta> tags together.
+Text building is bounded: past `max_chars` only the normalised length is
+tracked, so huge pages don't produce huge intermediate strings.
+"""
+
+from typing import List, NamedTuple, Optional
+
+import lxml.html
+from lxml import etree
+
+SKIP_XPATH = etree.XPath("//script | //style | //noscript | //svg | //video | //img | //iframe | //header | //footer")
+META_NAMES = ("description", "keywords", "author")
+
+
+class Extracted(NamedTuple):
+    title: Optional[str]
+    meta_description: Optional[str]
+    meta_keywords: Optional[str]
+    meta_author: Optional[str]
+    cleaned_text: str  # first `max_chars`+ characters, whitespace-normalised
+    text_length: int  # length of the full normalised text
+
+
+def extract(html_code: str, max_chars: int = 3000) -> Extracted:
+    """Visible text and metadata, matching the BeautifulSoup extractor's output"""
+    if not html_code or not html_code.strip():
+        return Extracted(None, None, None, None, "", 0)
+    try:
+        root = lxml.html.document_fromstring(html_code)
+    except (etree.ParserError, ValueError):
+        # e.g. str input with an XML encoding declaration
+        root = lxml.html.document_fromstring(html_code.encode("utf-8"))
+
+    for el in SKIP_XPATH(root):
+        el.drop_tree()  # keeps the element's tail text, like bs4's decompose()
+
+    words: List[str] = []
+    kept_chars = -1  # chars of " ".join(words)
+    total_chars = 0
+    total_words = 0
+    title: Optional[str] = None
+    seen_title = False
+    meta = dict.fromkeys(META_NAMES)
+
+    def add(text: Optional[str]) -> None:
+        nonlocal kept_chars, total_chars, total_words
+        if not text:
+            return
+        parts = text.split()
+        if not parts:
+            return
+        total_words += len(parts)
+        for w in parts:
+            total_chars += len(w)
+            if kept_chars <= max_chars:
+                words.append(w)
+                kept_chars += len(w) + 1
+
+    # Comments and processing instructions only get their own event: their body is not
+    # visible text, but the text after them (their tail) is
+    for event, el in etree.iterwalk(root, events=("start", "end", "comment", "pi")):
+        if event == "start":
+            if not isinstance(el.tag, str):
+                continue
+            if el.tag == "title" and not seen_title:
+                seen_title = True
+                title = el.text.strip() if el.text and len(el) == 0 else None
+            elif el.tag == "meta":
+                name = el.get("name")
+                if name in meta:
+                    meta[name] = (el.get("content") or "").strip()
+            add(el.text)
+        else:
+            add(el.tail)
+
+    text_length = total_chars + max(0, total_words - 1)
+    return Extracted(title, meta["description"], meta["keywords"], meta["author"], " ".join(words), text_length)
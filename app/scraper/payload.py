@@ -0,0 +1,78 @@
+"""
+Client-supplied Page Payloads
+Decoding of raw page HTML / DOM text captured by the browser extension, so
+the extraction stage can parse it directly instead of refetching the URL.
+Bodies may be gzip or zstd compressed and arrive base64 encoded (JSON ingest)
+or as raw bytes (multipart upload). Both the compressed and the decompressed
+size are bounded; decompression is incremental, so a small payload cannot
+expand past the limit in memory.
+"""
+
+import base64
+import binascii
+import gzip
+import io
+from typing import BinaryIO, Optional
+
+import zstandard
+
+ENCODINGS = ("identity", "gzip", "zstd")
+READ_CHUNK = 64 * 1024
+
+
+class PagePayloadError(ValueError):
+    """Malformed or unsupported page payload"""
+
+
+class PagePayloadTooLarge(PagePayloadError):
+    """Compressed payload exceeds the configured limit"""
+
+
+def decode_base64(data: str, max_bytes: int) -> bytes:
+    """Base64 body -> bytes, rejecting anything over `max_bytes` before decoding"""
+    if len(data) > 4 * ((max_bytes + 2) // 3):
+        raise PagePayloadTooLarge(f"page payload exceeds {max_bytes} bytes")
+    try:
+        return base64.b64decode(data, validate=True)
+    except (binascii.Error, ValueError) as e:
+        raise PagePayloadError(f"invalid base64 page payload: {e}") from e
+
+
+def _reader(body: bytes, encoding: str) -> BinaryIO:
+    if encoding == "identity":
+        return io.BytesIO(body)
+    if encoding == "gzip":
+        return gzip.GzipFile(fileobj=io.BytesIO(body))
+    if encoding == "zstd":
+        return zstandard.ZstdDecompressor().stream_reader(io.BytesIO(body))
+    raise PagePayloadError(f"unsupported page encoding {encoding!r}, expected one of {', '.join(ENCODINGS)}")
+
+
+def decompress(body: bytes, encoding: str, max_bytes: int) -> bytes:
+    """
+    Decompressed body, truncated to `max_bytes` (like the scraper's byte cap,
+    the rest of an oversized page is simply not read).
+    """
+    reader = _reader(body, encoding)
+    chunks = []
+    remaining = max_bytes
+    try:
+        while remaining > 0:
+            chunk = reader.read(min(READ_CHUNK, remaining))
+            if not chunk:
+                break
+            chunks.append(chunk)
+            remaining -= len(chunk)
+    except Exception as e:  # gzip.BadGzipFile, EOFError, zlib.error, zstandard.ZstdError
+        raise PagePayloadError(f"corrupt {encoding} page payload: {e}") from e
+    finally:
+        reader.close()
+    return b"".join(chunks)
+
+
+def to_text(body: bytes, charset: Optional[str] = None) -> str:
+    """Decoded page body; extensions send UTF-8 unless told otherwise"""
+    try:
+        return body.decode(charset or "utf-8", errors="replace")
+    except LookupError as e:
+        raise PagePayloadError(f"unknown charset {charset!r}") from e
@@ -1,69 +1,305 @@
 from bs4 import BeautifulSoup
 import requests
+import asyncio
+import re
+from contextlib import asynccontextmanager
 from datetime import datetime
-import tldextract
+from typing import Dict, Optional
+import httpx
+from loguru import logger
+
+from app.core.config import settings
+from app.core.domains import parse_url
+from app.core.metrics import metrics
+from app.scraper.cache import ScrapeCache
+from app.scraper.streaming import StreamingExtractor
+from app.scraper import lxml_engine
+
+# Visible text kept per page (longer text is truncated with "...")
+VISIBLE_TEXT_CHARS = 3000
+
+_WORD = re.compile(r"\S+")
+
+HEADERS = {
+    "User-Agent": (
+        "Mozilla/5.0 (Windows NT 10.0; Win64; x64) "
+        "AppleWebKit/537.36 (KHTML, like Gecko) "
+        "Chrome/120.0.0.0 Safari/537.36"
+    )
+}
+
+
+# Persistent scrape cache for async_scraper, with ETag/Last-Modified revalidation (None when disabled)
+scrape_cache: Optional[ScrapeCache] = None
+if settings.SCRAPE_CACHE_ENABLED:
+    try:
+        scrape_cache = ScrapeCache(
+            settings.SCRAPE_CACHE_PATH,
+            max_bytes=settings.SCRAPE_CACHE_MAX_BYTES,
+            fresh_seconds=settings.SCRAPE_CACHE_FRESH_SECONDS,
+        )
+    except Exception as e:
+        logger.warning(f"Scrape cache disabled - failed to open {settings.SCRAPE_CACHE_PATH}: {e}")
+
 
 def extract_visible_text_and_metadata(url: str) -> dict:
     '''Only for the visible content of the websites'''
 
-    headers = {
-        "User-Agent": (
-            "Mozilla/5.0 (Windows NT 10.0; Win64; x64) "
-            "AppleWebKit/537.36 (KHTML, like Gecko) "
-            "Chrome/120.0.0.0 Safari/537.36"
-        )
+    try:
+        response = requests.get(url, headers=HEADERS, timeout=10)
+        response.raise_for_status()
+        return _extract_from_html(url, response.text)
+
+    except Exception as e:
+        return _error_result(url, e)
+
+
+def extract_from_html(url: str, html_code: str) -> dict:
+    '''Visible text and metadata from page HTML supplied by the client (no fetch)'''
+    try:
+        return _extract_from_html(url, html_code)
+    except Exception as e:
+        return _error_result(url, e)
+
+
+def clean_visible_text(text: str) -> str:
+    '''DOM text supplied by the client, whitespace-normalised and truncated like extracted page text'''
+    # Only the words needed for the first VISIBLE_TEXT_CHARS are collected, however large the body
+    words = []
+    kept_chars = -1
+    for match in _WORD.finditer(text or ""):
+        if kept_chars > VISIBLE_TEXT_CHARS:
+            break
+        words.append(match.group())
+        kept_chars += len(words[-1]) + 1
+    cleaned = " ".join(words)
+    return cleaned[:VISIBLE_TEXT_CHARS] + ("..." if len(cleaned) > VISIBLE_TEXT_CHARS else "")
+
+
+def _extract_from_html(url: str, html_code: str) -> dict:
+    '''Visible text and metadata from an already downloaded page (engine per SCRAPER_ENGINE)'''
+    if settings.SCRAPER_ENGINE == "lxml":
+        return _extract_with_lxml(url, html_code)
+    return _extract_with_bs4(url, html_code)
+
+
+def _extract_with_lxml(url: str, html_code: str) -> dict:
+    e = lxml_engine.extract(html_code, max_chars=VISIBLE_TEXT_CHARS)
+    return _build_result(url, e.title, e.meta_description, e.meta_keywords, e.meta_author, e.cleaned_text, e.text_length)
+
+
+def _extract_with_bs4(url: str, html_code: str) -> dict:
+    soup = BeautifulSoup(html_code, "lxml")
+
+    for tag in soup(["script", "style", "noscript", "svg", "video", "img", "iframe", "header", "footer"]):
+        tag.decompose()
+
+
+    visible_text = " ".join(soup.stripped_strings)
+    cleaned_text = " ".join(visible_text.split())
+
+    title = soup.title.string.strip() if soup.title and soup.title.string else None
+    meta_desc, meta_keywords, meta_author = None, None, None
+
+
+    for meta in soup.find_all("meta"):
+        if meta.get("name") == "description":
+            meta_desc = meta.get("content", "").strip()
+        elif meta.get("name") == "keywords":
+            meta_keywords = meta.get("content", "").strip()
+        elif meta.get("name") == "author":
+            meta_author = meta.get("content", "").strip()
+
+    return _build_result(url, title, meta_desc, meta_keywords, meta_author, cleaned_text)
+
+
+def _build_result(url, title, meta_desc, meta_keywords, meta_author, cleaned_text: str, text_length: Optional[int] = None) -> dict:
+    if text_length is None:
+        text_length = len(cleaned_text)
+    domain_name = parse_url(url).registrable
+
+    data = {
+        "url": url,
+        "domain": domain_name,
+        "title": title,
+        "meta_description": meta_desc,
+        "meta_keywords": meta_keywords,
+        "meta_author": meta_author,
+        "timestamp": datetime.utcnow().isoformat() + "Z",
+        "text_length": text_length,
+        "visible_text": cleaned_text[:VISIBLE_TEXT_CHARS] + ("..." if text_length > VISIBLE_TEXT_CHARS else "")
     }
 
+    return data
+
+
+def _store(cache: ScrapeCache, url: str, data: dict, headers) -> None:
+    '''Cache a freshly extracted page along with its validators'''
+    if "no-store" in (headers.get("Cache-Control") or ""):
+        return
     try:
-        response = requests.get(url, headers=headers, timeout=10)
-        response.raise_for_status()
+        cache.put(url, data, headers.get("ETag"), headers.get("Last-Modified"))
+    except Exception as e:
+        logger.debug(f"Scrape cache write failed for url={url}: {e}")
+
+
+def _error_result(url: str, e: Exception) -> dict:
+    return {
+        "url": url,
+        "error": str(e) or type(e).__name__,
+        "timestamp": datetime.utcnow().isoformat() + "Z"
+    }
+
+
+class _HostSlots:
+    __slots__ = ("semaphore", "users")
 
-        html_code = response.text
-        soup = BeautifulSoup(html_code, "lxml")
+    def __init__(self, limit: int):
+        self.semaphore = asyncio.Semaphore(limit)
+        self.users = 0  # fetches holding or waiting for a slot
 
-        for tag in soup(["script", "style", "noscript", "svg", "video", "img", "iframe", "header", "footer"]):
-            tag.decompose()
 
+class AsyncScraper:
+    '''Non-blocking scraper on one shared, pooled httpx.AsyncClient.
 
-        visible_text = " ".join(soup.stripped_strings)
-        cleaned_text = " ".join(visible_text.split())
+    Concurrency is capped globally and per host, and every fetch (including
+    time spent waiting for a slot) must finish within `total_budget` seconds.
 
-        title = soup.title.string.strip() if soup.title and soup.title.string else None
-        meta_desc, meta_keywords, meta_author = None, None, None
+    With `streaming` the body is read in chunks (at most `max_bytes`) into an
+    incremental parser and the download stops once enough visible text has
+    been collected; `text_length` is then a lower bound. Otherwise the whole
+    page is parsed (per SCRAPER_ENGINE) in a worker thread.
+    '''
 
+    def __init__(
+        self,
+        max_concurrency: int = 20,
+        max_per_host: int = 4,
+        request_timeout: float = 10.0,
+        total_budget: float = 15.0,
+        http2: bool = True,
+        max_keepalive: int = 20,
+        cache: Optional[ScrapeCache] = None,
+        streaming: bool = True,
+        max_bytes: int = 2 * 1024 * 1024,
+    ):
+        self.max_concurrency = max_concurrency
+        self.max_per_host = max_per_host
+        self.request_timeout = request_timeout
+        self.total_budget = total_budget
+        self.http2 = http2
+        self.max_keepalive = max_keepalive
+        self.cache = cache
+        self.streaming = streaming
+        self.max_bytes = max_bytes
+        self._client: Optional[httpx.AsyncClient] = None
+        self._global: Optional[asyncio.Semaphore] = None
+        self._per_host: Dict[str, _HostSlots] = {}
 
-        for meta in soup.find_all("meta"):
-            if meta.get("name") == "description":
-                meta_desc = meta.get("content", "").strip()
-            elif meta.get("name") == "keywords":
-                meta_keywords = meta.get("content", "").strip()
-            elif meta.get("name") == "author":
-                meta_author = meta.get("content", "").strip()
+    def _get_client(self) -> httpx.AsyncClient:
+        if self._client is None or self._client.is_closed:
+            limits = httpx.Limits(
+                max_connections=self.max_concurrency,
+                max_keepalive_connections=self.max_keepalive,
+            )
+            kwargs = dict(headers=HEADERS, timeout=self.request_timeout, limits=limits, follow_redirects=True)
+            try:
+                self._client = httpx.AsyncClient(http2=self.http2, **kwargs)
+            except ImportError:
+                # http2 needs the optional `h2` package
+                logger.warning("h2 not installed - scraper falling back to HTTP/1.1")
+                self._client = httpx.AsyncClient(**kwargs)
+            self._global = asyncio.Semaphore(self.max_concurrency)
+        return self._client
 
-        domain_parts = tldextract.extract(url)
-        domain_name = f"{domain_parts.domain}.{domain_parts.suffix}"
+    async def extract_visible_text_and_metadata(self, url: str) -> dict:
+        '''Async equivalent of the module-level function, same result shape'''
+        try:
+            return await asyncio.wait_for(self._fetch_and_extract(url), timeout=self.total_budget)
+        except asyncio.TimeoutError:
+            return _error_result(url, TimeoutError(f"scrape exceeded {self.total_budget}s budget"))
+        except Exception as e:
+            return _error_result(url, e)
 
-        data = {
-            "url": url,
-            "domain": domain_name,
-            "title": title,
-            "meta_description": meta_desc,
-            "meta_keywords": meta_keywords,
-            "meta_author": meta_author,
-            "timestamp": datetime.utcnow().isoformat() + "Z",
-            "text_length": len(cleaned_text),
-            "visible_text": cleaned_text[:3000] + ("..." if len(cleaned_text) > 3000 else "")
-        }
+    async def _fetch_and_extract(self, url: str) -> dict:
+        entry = await asyncio.to_thread(self.cache.get, url) if self.cache else None
+        if entry and self.cache.is_fresh(entry):
+            metrics.inc("scrape_cache.hits")
+            return entry.data
 
+        client = self._get_client()
+        host = parse_url(url).host
+        # Host slot first, so a backlog for one host waits without holding global slots
+        async with self._host_slot(host), self._global:
+            async with client.stream("GET", url, headers=entry.conditional_headers() if entry else None) as response:
+                if response.status_code == 304 and entry:
+                    await asyncio.to_thread(self.cache.touch, url)
+                    metrics.inc("scrape_cache.revalidated")
+                    return entry.data
+                response.raise_for_status()
+                if self.streaming:
+                    data = await self._extract_streaming(url, response)
+                else:
+                    await response.aread()
+                    html_code = response.text
+        if not self.streaming:
+            data = await asyncio.to_thread(_extract_from_html, url, html_code)
+        metrics.inc("scrape_cache.misses")
+        if self.cache is not None:
+            await asyncio.to_thread(_store, self.cache, url, data, response.headers)
         return data
 
-    except Exception as e:
-        return {
-            "url": url,
-            "error": str(e),
-            "timestamp": datetime.utcnow().isoformat() + "Z"
-        }
-    
+    @asynccontextmanager
+    async def _host_slot(self, host: str):
+        '''One of the host's `max_per_host` slots; a host is forgotten once no fetch holds or awaits one'''
+        slots = self._per_host.get(host)
+        if slots is None:
+            slots = self._per_host[host] = _HostSlots(self.max_per_host)
+        slots.users += 1
+        try:
+            async with slots.semaphore:
+                yield
+        finally:
+            slots.users -= 1
+            if not slots.users:
+                del self._per_host[host]
+
+    async def _extract_streaming(self, url: str, response: httpx.Response) -> dict:
+        extractor = StreamingExtractor(max_chars=VISIBLE_TEXT_CHARS, encoding=response.charset_encoding)
+        try:
+            async for chunk in response.aiter_bytes():
+                if extractor.feed(chunk[: self.max_bytes - extractor.bytes_read]):
+                    break
+                if extractor.bytes_read >= self.max_bytes:
+                    logger.debug(f"Scrape of url={url} stopped at {self.max_bytes} byte cap")
+                    break
+        finally:
+            extractor.close()
+        return _build_result(
+            url,
+            extractor.title,
+            extractor.meta("description"),
+            extractor.meta("keywords"),
+            extractor.meta("author"),
+            extractor.cleaned_text,
+        )
+
+    async def aclose(self) -> None:
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
+
+
+async_scraper = AsyncScraper(
+    max_concurrency=settings.SCRAPER_MAX_CONCURRENCY,
+    max_per_host=settings.SCRAPER_MAX_PER_HOST,
+    request_timeout=settings.SCRAPER_REQUEST_TIMEOUT_SECONDS,
+    total_budget=settings.SCRAPER_TOTAL_BUDGET_SECONDS,
+    http2=settings.SCRAPER_HTTP2,
+    cache=scrape_cache,
+    streaming=settings.SCRAPER_STREAMING,
+    max_bytes=settings.SCRAPER_MAX_BYTES,
+)
 
 
-    ##TODO Should add the onTabClose and onTabOpen and onTabreload action listeners in the frontend 
+    ##TODO Should add the onTabClose and onTabOpen and onTabreload action listeners in the frontend
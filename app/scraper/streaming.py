@@ -0,0 +1,124 @@
+"""
+Streaming HTML Extraction
+Incremental visible-text/metadata collector fed with response chunks.
+Uses an lxml parser target, so no tree is built: script/style/svg (and the
+other non-visible) subtrees are skipped as they stream past, and the caller
+can stop downloading as soon as enough text has been collected.
+"""
+
+from typing import List, Optional
+
+from lxml import etree
+
+# Same set the BeautifulSoup extractor decomposes
+SKIP_TAGS = frozenset(["script", "style", "noscript", "svg", "video", "img", "iframe", "header", "footer"])
+META_NAMES = frozenset(["description", "keywords", "author"])
+
+
+class _Collector:
+    """lxml parser target: gathers title, meta tags and visible text"""
+
+    def __init__(self, max_chars: int):
+        self.max_chars = max_chars
+        self.parts: List[str] = []
+        self.chars = 0
+        # A text node can arrive in several data() calls (e.g. split across chunks)
+        self._pending: List[str] = []
+        self.skip_depth = 0
+        self.in_title = False
+        self.title_parts: List[str] = []
+        self.meta = {}
+
+    @property
+    def done(self) -> bool:
+        return self.chars > self.max_chars
+
+    def start(self, tag, attrib):
+        self._flush()
+        tag = tag.lower() if isinstance(tag, str) else ""
+        if self.skip_depth or tag in SKIP_TAGS:
+            self.skip_depth += 1
+            return
+        if tag == "title":
+            self.in_title = True
+        elif tag == "meta":
+            name = (attrib.get("name") or "").lower()
+            if name in META_NAMES and name not in self.meta:
+                self.meta[name] = (attrib.get("content") or "").strip()
+
+    def end(self, tag):
+        self._flush()
+        if self.skip_depth:
+            self.skip_depth -= 1
+            return
+        if isinstance(tag, str) and tag.lower() == "title":
+            self.in_title = False
+
+    def data(self, text):
+        if self.skip_depth or self.done:
+            return
+        if self.in_title:
+            self.title_parts.append(text)
+        self._pending.append(text)
+
+    def comment(self, text):
+        self._flush()
+
+    def close(self):
+        self._flush()
+        return None
+
+    def _flush(self):
+        if not self._pending:
+            return
+        stripped = "".join(self._pending).strip()
+        self._pending.clear()
+        if stripped:
+            self.parts.append(stripped)
+            self.chars += len(stripped) + 1
+
+
+class StreamingExtractor:
+    """
+    Feed raw body chunks with `feed()`; it returns True once more than
+    `max_chars` of visible text has been seen, at which point the rest of
+    the body can be skipped. `cleaned_text` is whitespace-normalised the same
+    way as the BeautifulSoup extractor.
+    """
+
+    def __init__(self, max_chars: int = 3000, encoding: Optional[str] = None):
+        self._collector = _Collector(max_chars)
+        self._parser = etree.HTMLParser(target=self._collector, encoding=encoding, recover=True)
+        self._closed = False
+        self.bytes_read = 0
+
+    def feed(self, chunk: bytes) -> bool:
+        self.bytes_read += len(chunk)
+        self._parser.feed(chunk)
+        return self._collector.done
+
+    @property
+    def done(self) -> bool:
+        return self._collector.done
+
+    def close(self) -> None:
+        if not self._closed:
+            self._closed = True
+            try:
+                self._parser.close()
+            except etree.XMLSyntaxError:
+                # Truncated/empty documents: keep whatever was collected
+                pass
+            self._collector.close()
+
+    @property
+    def title(self) -> Optional[str]:
+        title = "".join(self._collector.title_parts).strip()
+        return title or None
+
+    def meta(self, name: str) -> Optional[str]:
+        return self._collector.meta.get(name)
+
+    @property
+    def cleaned_text(self) -> str:
+        return " ".join(" ".join(self._collector.parts).split())
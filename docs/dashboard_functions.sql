@@ -0,0 +1,107 @@
+-- Dashboard aggregate functions
+-- Called through supabase.rpc(...) by app/api/v1/dashboard (see aggregates.py).
+-- Each returns a handful of aggregated rows instead of every raw session, so
+-- totals stay exact however many sessions a user has (plain PostgREST selects
+-- are silently capped at max-rows, 1000 by default on Supabase).
+-- Apply after schema.sql; every statement is idempotent.
+
+CREATE INDEX IF NOT EXISTS page_view_sessions_user_start
+    ON public.page_view_sessions (user_id, start_time);
+
+CREATE INDEX IF NOT EXISTS content_analysis_user_scraped
+    ON public.content_analysis (user_id, scraped_at);
+
+
+-- 1. Seconds and session counts per UTC day x fine category.
+-- A session's category is the user's content_analysis category for its URL
+-- (when p_use_analysis), else the first matching user_domain_categories
+-- pattern (substring of the domain), else 'uncategorized'. Mapping categories
+-- to dashboard buckets stays in Python (get_dashboard_bucket_mapping).
+CREATE OR REPLACE FUNCTION public.dashboard_category_seconds(
+    p_user_id UUID,
+    p_start TIMESTAMPTZ,
+    p_end TIMESTAMPTZ,
+    p_use_analysis BOOLEAN DEFAULT TRUE
+)
+RETURNS TABLE (day DATE, category TEXT, seconds DOUBLE PRECISION, sessions BIGINT)
+LANGUAGE sql STABLE
+AS $$
+    SELECT
+        (s.start_time AT TIME ZONE 'UTC')::date AS day,
+        CASE
+            WHEN s.domain = '' THEN 'uncategorized'
+            WHEN ca.page_url IS NOT NULL THEN COALESCE(NULLIF(ca.system_suggested_category, ''), 'uncategorized')
+            ELSE COALESCE(NULLIF(udc.category, ''), 'uncategorized')
+        END AS category,
+        SUM(GREATEST(0, EXTRACT(EPOCH FROM (s.end_time - s.start_time))))::double precision AS seconds,
+        COUNT(*) AS sessions
+    FROM public.page_view_sessions s
+    LEFT JOIN public.content_analysis ca
+        ON p_use_analysis AND ca.page_url = s.url AND ca.user_id = p_user_id
+    LEFT JOIN LATERAL (
+        SELECT c.category
+        FROM public.user_domain_categories c
+        WHERE c.user_id = p_user_id
+          AND c.domain_pattern <> ''
+          AND strpos(lower(s.domain), lower(c.domain_pattern)) > 0
+        ORDER BY c.user_category_id
+        LIMIT 1
+    ) udc ON ca.page_url IS NULL
+    WHERE s.user_id = p_user_id
+      AND s.start_time >= p_start
+      AND s.start_time < p_end
+    GROUP BY 1, 2
+$$;
+
+
+-- 2. Seconds per UTC day x lowercased domain (domain limit checks).
+CREATE OR REPLACE FUNCTION public.dashboard_domain_seconds(
+    p_user_id UUID,
+    p_start TIMESTAMPTZ,
+    p_end TIMESTAMPTZ
+)
+RETURNS TABLE (day DATE, domain TEXT, seconds DOUBLE PRECISION, sessions BIGINT)
+LANGUAGE sql STABLE
+AS $$
+    SELECT
+        (s.start_time AT TIME ZONE 'UTC')::date AS day,
+        lower(s.domain) AS domain,
+        SUM(GREATEST(0, EXTRACT(EPOCH FROM (s.end_time - s.start_time))))::double precision AS seconds,
+        COUNT(*) AS sessions
+    FROM public.page_view_sessions s
+    WHERE s.user_id = p_user_id
+      AND s.start_time >= p_start
+      AND s.start_time < p_end
+    GROUP BY 1, 2
+$$;
+
+
+-- 3. Analysed pages and emotion score sums per lowercased category.
+CREATE OR REPLACE FUNCTION public.dashboard_content_summary(
+    p_user_id UUID,
+    p_start TIMESTAMPTZ,
+    p_end TIMESTAMPTZ
+)
+RETURNS TABLE (
+    category TEXT,
+    docs BIGINT,
+    happy DOUBLE PRECISION,
+    sad DOUBLE PRECISION,
+    angry DOUBLE PRECISION,
+    neutral DOUBLE PRECISION
+)
+LANGUAGE sql STABLE
+AS $$
+    SELECT
+        lower(COALESCE(NULLIF(ca.system_suggested_category, ''), 'other')) AS category,
+        COUNT(*) AS docs,
+        SUM(COALESCE(ca.happy_score, 0))::double precision AS happy,
+        SUM(COALESCE(ca.sad_score, 0))::double precision AS sad,
+        SUM(COALESCE(ca.angry_score, 0))::double precision AS angry,
+        SUM(COALESCE(ca.neutral_score, 0))::double precision AS neutral
+    FROM public.content_analysis ca
+    WHERE ca.user_id = p_user_id
+      AND ca.scraped_at >= p_start
+      AND ca.scraped_at < p_end
+    GROUP BY 1
+$$;
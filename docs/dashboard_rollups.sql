@@ -0,0 +1,236 @@
+-- Daily dashboard rollups
+-- user_daily_rollups holds one row per (user, UTC day, category): session
+-- seconds and counts from page_view_sessions, plus analysed-page counts and
+-- emotion score sums from content_analysis. Triggers keep it up to date as
+-- the ingest path writes (including the sessionizer's upserts), so dashboards
+-- read a couple of weeks of rollup rows instead of every raw session.
+-- Dashboard buckets are derived from categories in Python.
+-- Apply after schema.sql and dashboard_functions.sql, then backfill with
+--   python -m scripts.rebuild_rollups
+-- Every statement is idempotent.
+
+ALTER TABLE public.page_view_sessions
+    ADD COLUMN IF NOT EXISTS rollup_category VARCHAR(50);  -- category the session is counted under
+
+CREATE TABLE IF NOT EXISTS public.user_daily_rollups (
+    user_id UUID NOT NULL REFERENCES public.profiles(id) ON DELETE CASCADE,
+    day DATE NOT NULL,
+    category VARCHAR(50) NOT NULL,
+
+    seconds DOUBLE PRECISION NOT NULL DEFAULT 0,
+    sessions INT NOT NULL DEFAULT 0,
+
+    -- content_analysis rows scraped that day, and their score sums
+    docs INT NOT NULL DEFAULT 0,
+    happy_sum DOUBLE PRECISION NOT NULL DEFAULT 0,
+    sad_sum DOUBLE PRECISION NOT NULL DEFAULT 0,
+    angry_sum DOUBLE PRECISION NOT NULL DEFAULT 0,
+    neutral_sum DOUBLE PRECISION NOT NULL DEFAULT 0,
+
+    updated_at TIMESTAMPTZ NOT NULL DEFAULT NOW(),
+    PRIMARY KEY (user_id, day, category)
+);
+
+
+-- Category a session is counted under: the user's content_analysis category
+-- for the URL, else the first matching user_domain_categories pattern, else
+-- 'uncategorized' (same rule as dashboard_category_seconds).
+CREATE OR REPLACE FUNCTION public.session_category(p_user_id UUID, p_url TEXT, p_domain TEXT)
+RETURNS TEXT
+LANGUAGE sql STABLE
+AS $$
+    SELECT CASE
+        WHEN COALESCE(p_domain, '') = '' THEN 'uncategorized'
+        ELSE COALESCE(
+            (SELECT COALESCE(NULLIF(ca.system_suggested_category, ''), 'uncategorized')
+             FROM public.content_analysis ca
+             WHERE ca.page_url = p_url AND ca.user_id = p_user_id),
+            (SELECT NULLIF(c.category, '')
+             FROM public.user_domain_categories c
+             WHERE c.user_id = p_user_id
+               AND c.domain_pattern <> ''
+               AND strpos(lower(p_domain), lower(c.domain_pattern)) > 0
+             ORDER BY c.user_category_id
+             LIMIT 1),
+            'uncategorized'
+        )
+    END
+$$;
+
+
+CREATE OR REPLACE FUNCTION public.rollup_add(
+    p_user_id UUID, p_day DATE, p_category TEXT,
+    p_seconds DOUBLE PRECISION, p_sessions INT,
+    p_docs INT, p_happy DOUBLE PRECISION, p_sad DOUBLE PRECISION, p_angry DOUBLE PRECISION, p_neutral DOUBLE PRECISION
+)
+RETURNS VOID
+LANGUAGE sql
+AS $$
+    INSERT INTO public.user_daily_rollups AS r
+        (user_id, day, category, seconds, sessions, docs, happy_sum, sad_sum, angry_sum, neutral_sum)
+    VALUES (p_user_id, p_day, p_category, p_seconds, p_sessions, p_docs, p_happy, p_sad, p_angry, p_neutral)
+    ON CONFLICT (user_id, day, category) DO UPDATE SET
+        seconds = r.seconds + EXCLUDED.seconds,
+        sessions = r.sessions + EXCLUDED.sessions,
+        docs = r.docs + EXCLUDED.docs,
+        happy_sum = r.happy_sum + EXCLUDED.happy_sum,
+        sad_sum = r.sad_sum + EXCLUDED.sad_sum,
+        angry_sum = r.angry_sum + EXCLUDED.angry_sum,
+        neutral_sum = r.neutral_sum + EXCLUDED.neutral_sum,
+        updated_at = NOW()
+$$;
+
+-- Removals only ever update an existing row (never insert), so cascaded
+-- deletes of a whole profile cannot recreate rollups for it.
+CREATE OR REPLACE FUNCTION public.rollup_sub(
+    p_user_id UUID, p_day DATE, p_category TEXT,
+    p_seconds DOUBLE PRECISION, p_sessions INT,
+    p_docs INT, p_happy DOUBLE PRECISION, p_sad DOUBLE PRECISION, p_angry DOUBLE PRECISION, p_neutral DOUBLE PRECISION
+)
+RETURNS VOID
+LANGUAGE sql
+AS $$
+    UPDATE public.user_daily_rollups SET
+        seconds = seconds - p_seconds,
+        sessions = sessions - p_sessions,
+        docs = docs - p_docs,
+        happy_sum = happy_sum - p_happy,
+        sad_sum = sad_sum - p_sad,
+        angry_sum = angry_sum - p_angry,
+        neutral_sum = neutral_sum - p_neutral,
+        updated_at = NOW()
+    WHERE user_id = p_user_id AND day = p_day AND category = p_category
+$$;
+
+
+-- page_view_sessions: categorise before the write, count after it. AFTER row
+-- triggers fire once per actual insert/update, so INSERT ... ON CONFLICT DO
+-- UPDATE (the sessionizer's upsert) is counted exactly once.
+CREATE OR REPLACE FUNCTION public.page_view_sessions_categorize()
+RETURNS TRIGGER
+LANGUAGE plpgsql
+AS $$
+BEGIN
+    NEW.rollup_category := public.session_category(NEW.user_id, NEW.url, NEW.domain);
+    RETURN NEW;
+END
+$$;
+
+CREATE OR REPLACE FUNCTION public.page_view_sessions_rollup()
+RETURNS TRIGGER
+LANGUAGE plpgsql
+AS $$
+BEGIN
+    IF current_setting('cognisense.rollup_rebuild', true) = 'on' THEN
+        RETURN NULL;
+    END IF;
+    IF TG_OP IN ('UPDATE', 'DELETE') AND OLD.rollup_category IS NOT NULL THEN
+        PERFORM public.rollup_sub(
+            OLD.user_id, (OLD.start_time AT TIME ZONE 'UTC')::date, OLD.rollup_category,
+            GREATEST(0, EXTRACT(EPOCH FROM (OLD.end_time - OLD.start_time)))::double precision, 1,
+            0, 0, 0, 0, 0);
+    END IF;
+    IF TG_OP IN ('INSERT', 'UPDATE') THEN
+        PERFORM public.rollup_add(
+            NEW.user_id, (NEW.start_time AT TIME ZONE 'UTC')::date, NEW.rollup_category,
+            GREATEST(0, EXTRACT(EPOCH FROM (NEW.end_time - NEW.start_time)))::double precision, 1,
+            0, 0, 0, 0, 0);
+    END IF;
+    RETURN NULL;
+END
+$$;
+
+DROP TRIGGER IF EXISTS page_view_sessions_categorize ON public.page_view_sessions;
+CREATE TRIGGER page_view_sessions_categorize
+    BEFORE INSERT OR UPDATE ON public.page_view_sessions
+    FOR EACH ROW EXECUTE FUNCTION public.page_view_sessions_categorize();
+
+DROP TRIGGER IF EXISTS page_view_sessions_rollup ON public.page_view_sessions;
+CREATE TRIGGER page_view_sessions_rollup
+    AFTER INSERT OR UPDATE OR DELETE ON public.page_view_sessions
+    FOR EACH ROW EXECUTE FUNCTION public.page_view_sessions_rollup();
+
+
+-- content_analysis: one analysed page counted on its scraped_at day
+CREATE OR REPLACE FUNCTION public.content_analysis_rollup()
+RETURNS TRIGGER
+LANGUAGE plpgsql
+AS $$
+BEGIN
+    IF current_setting('cognisense.rollup_rebuild', true) = 'on' THEN
+        RETURN NULL;
+    END IF;
+    IF TG_OP IN ('UPDATE', 'DELETE') THEN
+        PERFORM public.rollup_sub(
+            OLD.user_id, (OLD.scraped_at AT TIME ZONE 'UTC')::date,
+            COALESCE(NULLIF(OLD.system_suggested_category, ''), 'other'),
+            0, 0, 1,
+            COALESCE(OLD.happy_score, 0), COALESCE(OLD.sad_score, 0),
+            COALESCE(OLD.angry_score, 0), COALESCE(OLD.neutral_score, 0));
+    END IF;
+    IF TG_OP IN ('INSERT', 'UPDATE') THEN
+        PERFORM public.rollup_add(
+            NEW.user_id, (NEW.scraped_at AT TIME ZONE 'UTC')::date,
+            COALESCE(NULLIF(NEW.system_suggested_category, ''), 'other'),
+            0, 0, 1,
+            COALESCE(NEW.happy_score, 0), COALESCE(NEW.sad_score, 0),
+            COALESCE(NEW.angry_score, 0), COALESCE(NEW.neutral_score, 0));
+    END IF;
+    RETURN NULL;
+END
+$$;
+
+DROP TRIGGER IF EXISTS content_analysis_rollup ON public.content_analysis;
+CREATE TRIGGER content_analysis_rollup
+    AFTER INSERT OR UPDATE OR DELETE ON public.content_analysis
+    FOR EACH ROW EXECUTE FUNCTION public.content_analysis_rollup();
+
+
+-- Backfill / rebuild from the raw tables, for one user or (NULL) everyone.
+-- Re-categorises sessions with the current rules. Returns rollup rows written.
+CREATE OR REPLACE FUNCTION public.rebuild_user_daily_rollups(p_user_id UUID DEFAULT NULL)
+RETURNS BIGINT
+LANGUAGE plpgsql
+AS $$
+DECLARE
+    written BIGINT;
+BEGIN
+    PERFORM set_config('cognisense.rollup_rebuild', 'on', true);
+
+    UPDATE public.page_view_sessions s
+    SET rollup_category = public.session_category(s.user_id, s.url, s.domain)
+    WHERE p_user_id IS NULL OR s.user_id = p_user_id;
+
+    DELETE FROM public.user_daily_rollups WHERE p_user_id IS NULL OR user_id = p_user_id;
+
+    INSERT INTO public.user_daily_rollups
+        (user_id, day, category, seconds, sessions, docs, happy_sum, sad_sum, angry_sum, neutral_sum)
+    SELECT user_id, day, category,
+           SUM(seconds), SUM(sessions), SUM(docs), SUM(happy), SUM(sad), SUM(angry), SUM(neutral)
+    FROM (
+        SELECT s.user_id,
+               (s.start_time AT TIME ZONE 'UTC')::date AS day,
+               s.rollup_category AS category,
+               GREATEST(0, EXTRACT(EPOCH FROM (s.end_time - s.start_time)))::double precision AS seconds,
+               1 AS sessions, 0 AS docs,
+               0::double precision AS happy, 0::double precision AS sad,
+               0::double precision AS angry, 0::double precision AS neutral
+        FROM public.page_view_sessions s
+        WHERE p_user_id IS NULL OR s.user_id = p_user_id
+        UNION ALL
+        SELECT ca.user_id,
+               (ca.scraped_at AT TIME ZONE 'UTC')::date,
+               COALESCE(NULLIF(ca.system_suggested_category, ''), 'other'),
+               0, 0, 1,
+               COALESCE(ca.happy_score, 0), COALESCE(ca.sad_score, 0),
+               COALESCE(ca.angry_score, 0), COALESCE(ca.neutral_score, 0)
+        FROM public.content_analysis ca
+        WHERE p_user_id IS NULL OR ca.user_id = p_user_id
+    ) t
+    GROUP BY user_id, day, category;
+    GET DIAGNOSTICS written = ROW_COUNT;
+
+    PERFORM set_config('cognisense.rollup_rebuild', 'off', true);
+    RETURN written;
+END
+$$;
@@ -0,0 +1,16 @@
+-- Local Postgres stand-in for the Supabase objects schema.sql depends on.
+-- Used only by the `test` docker-compose profile; never apply to Supabase.
+
+CREATE SCHEMA IF NOT EXISTS auth;
+
+CREATE TABLE IF NOT EXISTS auth.users (
+    id UUID PRIMARY KEY
+);
+
+DO $$
+BEGIN
+    IF NOT EXISTS (SELECT 1 FROM pg_roles WHERE rolname = 'anon') THEN
+        CREATE ROLE anon NOLOGIN;
+    END IF;
+END
+$$;
@@ -0,0 +1,16 @@
+-- Runs after schema.sql and the dashboard SQL files in the `test` profile:
+-- lets PostgREST's anon role read/write the tables and call the functions,
+-- and exposes a helper that creates an auth user + profile for fixtures.
+
+CREATE OR REPLACE FUNCTION public.test_create_user(p_id UUID)
+RETURNS VOID
+LANGUAGE sql SECURITY DEFINER
+AS $$
+    INSERT INTO auth.users (id) VALUES (p_id) ON CONFLICT DO NOTHING;
+    INSERT INTO public.profiles (id, username) VALUES (p_id, 'test-user') ON CONFLICT DO NOTHING;
+$$;
+
+GRANT USAGE ON SCHEMA public TO anon;
+GRANT ALL ON ALL TABLES IN SCHEMA public TO anon;
+GRANT ALL ON ALL SEQUENCES IN SCHEMA public TO anon;
+GRANT EXECUTE ON ALL FUNCTIONS IN SCHEMA public TO anon;
@@ -0,0 +1,90 @@
+"""
+Benchmark: memory per activity record
+Compares the old dict-of-lists store against ActivityStore text modes.
+
+Usage: python -m scripts.bench_activity_store [records]
+"""
+
+import random
+import sys
+import time
+import tracemalloc
+
+from app.core.activity_store import ActivityStore
+
+WORDS = (
+    "the of and to in is for on that with as by this are from it be at or an was "
+    "python fastapi browser extension session dashboard productive social news "
+    "article video comment reply share update release notes tutorial guide"
+).split()
+
+
+def make_texts(count: int = 64) -> list:
+    rng = random.Random(42)
+    return [" ".join(rng.choice(WORDS) for _ in range(520))[:3000].encode("utf-8") for _ in range(count)]
+
+
+TEXTS = make_texts()
+
+
+def make_record(i: int) -> dict:
+    # Decode per record so every record owns its text, as a real ingest payload does
+    text = TEXTS[i % len(TEXTS)].decode("utf-8")
+    now = time.time()
+    return {
+        "user_id": "bench-user",
+        "url": f"https://example{i % 50}.com/articles/{i}",
+        "title": f"Example article number {i}",
+        "text": text,
+        "start_ts": now - 60,
+        "end_ts": now,
+        "duration_seconds": 60.0,
+        "clicks": 3,
+        "keypresses": 12,
+        "engagement_score": 0.5,
+        "received_at": now,
+        "sentiment": {"label": "POSITIVE", "score": 0.93},
+        "classified_category": "Technology",
+        "classified_scores": [{"label": "Technology", "score": 0.8}, {"label": "News", "score": 0.1}],
+        "emotions": [{"label": "joy", "score": 0.7}, {"label": "neutral", "score": 0.2}],
+    }
+
+
+def measure(label: str, fill) -> None:
+    """Retained memory after N ingests (payload dicts are transient, as in ingest)"""
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    t0 = time.perf_counter()
+    holder = fill()
+    elapsed = time.perf_counter() - t0
+    after = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    per_record = (after - before) / N
+    print(f"{label:<24} {per_record:>10.0f} B/record   {N / elapsed:>10.0f} ingests/s")
+    del holder
+
+
+def fill_dict():
+    store: dict = {}
+    for i in range(N):
+        r = make_record(i)
+        store.setdefault(r["user_id"], []).append(r)
+    return store
+
+
+def fill_store(mode: str):
+    def fill():
+        store = ActivityStore(max_records_per_user=N, max_bytes=1 << 40, text_mode=mode)
+        for i in range(N):
+            r = make_record(i)
+            store.append(r["user_id"], r)
+        return store
+    return fill
+
+
+if __name__ == "__main__":
+    N = int(sys.argv[1]) if len(sys.argv) > 1 else 5000
+    print(f"{N} records, ~3000 chars of page text each\n")
+    measure("dict (previous)", fill_dict)
+    for mode in ("keep", "compress", "drop"):
+        measure(f"ActivityStore[{mode}]", fill_store(mode))
@@ -0,0 +1,157 @@
+"""
+Synthetic pages for the extraction benchmark
+Writes the generated pages of scripts/bench_corpus: word-salad text in the
+markup shapes that matter to the extractors (large inline scripts and
+styles, header/nav/footer, inline SVG, img/iframe/video/noscript fallbacks,
+comments, entities, non-ASCII text, repeated and upper-case meta tags).
+They stress parsing and parity but are not real sites; the real pages in
+the corpus are listed in scripts/bench_scraper_engines.py.
+
+Seeded, so the output is byte-for-byte reproducible.
+
+Usage: python -m scripts.bench_corpus.generate
+"""
+
+import random
+from pathlib import Path
+
+OUT = Path(__file__).parent
+
+rng = random.Random(7)
+WORDS = (
+    "time data system user page content news world report market city school health science music game film team "
+    "research policy energy climate model network browser session focus habit learn build release update review café naïve über "
+    "résumé the of and to in is for on with as by from at"
+).split()
+SVG = '<svg viewBox="0 0 10 10"><title>icon title</title><path d="M0 0L10 10"/></svg>'
+
+
+def sentence(n=None) -> str:
+    n = n or rng.randint(6, 22)
+    s = " ".join(rng.choice(WORDS) for _ in range(n))
+    return s[0].upper() + s[1:] + rng.choice([".", ".", "!", "?"])
+
+
+def paragraph(k=None) -> str:
+    return " ".join(sentence() for _ in range(k or rng.randint(2, 6)))
+
+
+def script(kb: int) -> str:
+    return "<script>\n" + ("var a=\"</div>\"; function f(x){return x*2;}\n" * (kb * 1024 // 45)) + "</script>"
+
+
+def style(kb: int) -> str:
+    return "<style>\n" + (".c{color:#333;margin:0 auto;padding:4px}\n" * (kb * 1024 // 42)) + "</style>"
+
+
+def head(title: str, extra: str = "") -> str:
+    return (
+        f"<head><meta charset=\"utf-8\"><title>\n  {title}  \n</title>"
+        f"<meta name=\"description\" content=\"  {sentence()}  \"><meta name=\"keywords\" content=\"{', '.join(rng.sample(WORDS, 5))}\">"
+        f"<meta name=\"author\" content=\"Staff Writer\"><meta property=\"og:title\" content=\"{title}\">{extra}</head>"
+    )
+
+
+def header() -> str:
+    return "<header><nav><ul>" + "".join(f"<li><a href='/{w}'>{w}</a></li>" for w in rng.sample(WORDS, 8)) + "</ul></nav></header>"
+
+
+def footer() -> str:
+    return "<footer><p>&copy; 2025 Example &amp; Co. All rights reserved.</p></footer>"
+
+
+def news_article() -> str:
+    return (
+        "<!DOCTYPE html><html lang='en'>" + head("Breaking: " + sentence(6), style(20) + script(60)) + "<body>" + header()
+        + "<main><article><h1>" + sentence(8) + "</h1><p class='byline'>By <a href='#'>Staff</a> &middot; 5 min read</p>"
+        + "".join(
+            f"<p>{paragraph()}</p>"
+            + (f"<figure><img src='x.jpg' alt='a'>Caption tail {sentence(5)}<figcaption>{sentence(6)}</figcaption></figure>" if i % 5 == 0 else "")
+            + (script(2) if i % 7 == 0 else "")
+            for i in range(40)
+        )
+        + "</article><aside><iframe src='ad.html'>ad fallback</iframe><noscript>Enable JS</noscript></aside></main>"
+        + footer() + script(120) + "</body></html>"
+    )
+
+
+def docs_page() -> str:
+    return (
+        "<!DOCTYPE html><html>" + head("API Reference &mdash; " + sentence(4)) + "<body>" + header()
+        + "<div class='sidebar'>" + "".join(f"<a href='#s{i}'>{sentence(3)}</a>" for i in range(60)) + "</div><div class='content'>"
+        + "".join(
+            f"<h2 id='s{i}'>{sentence(4)}</h2><p>{paragraph(3)}</p><pre><code>def f(x):\n    return x &lt; 10 &amp;&amp; x &gt; 2\n</code></pre>"
+            f"<table><tr><th>Param</th><th>Type</th></tr><tr><td>{rng.choice(WORDS)}</td><td>str</td></tr></table><!-- hidden comment {i} -->"
+            for i in range(60)
+        )
+        + "</div>" + footer() + "</body></html>"
+    )
+
+
+def forum_thread() -> str:
+    return (
+        "<html>" + head("Thread: " + sentence(7), script(30)) + "<body>" + header()
+        + "".join(
+            f"<div class='post'><div class='meta'><span>user{i}</span> <time>2 hours ago</time>{SVG}</div><div class='body'><p>{paragraph(2)}</p>"
+            f"<blockquote>{sentence()}</blockquote><p>{paragraph(1)}<br>{sentence()}</p></div><div class='actions'><button>Reply</button> <button>Like</button></div></div>"
+            for i in range(150)
+        )
+        + footer() + "</body></html>"
+    )
+
+
+def shop_listing() -> str:
+    return (
+        "<!DOCTYPE html><html>" + head("Shop &ndash; " + sentence(3), style(40) + script(80)) + "<body>" + header()
+        + "<ul class='grid'>"
+        + "".join(
+            f"<li><img src='p{i}.jpg'><h3>{sentence(4)}</h3><span class='price'>&pound;{rng.randint(5, 500)}.99</span><span>{sentence(6)}</span>{SVG}</li>"
+            for i in range(300)
+        )
+        + "</ul>" + script(120) + footer() + "</body></html>"
+    )
+
+
+def spa_shell() -> str:
+    return (
+        "<!DOCTYPE html><html>" + head("App", script(120) + style(80))
+        + "<body><noscript>You need to enable JavaScript to run this app.</noscript>"
+        + "<div id='root'></div>" + script(200) + "</body></html>"
+    )
+
+
+def blog_post() -> str:
+    return (
+        "<html><head><title>A blog post about " + " ".join(rng.sample(WORDS, 4)) + "</title>"
+        + "<META NAME='description' CONTENT='uppercase meta'><meta name='description' content='second description wins'></head><body>"
+        + header() + "<div class='post'>"
+        + "".join(f"<p>{paragraph()} <em>{sentence(3)}</em> <strong>{rng.choice(WORDS)}</strong>&nbsp;{sentence(4)}</p>" for _ in range(25))
+        + "<video src='v.mp4'>video fallback</video>Tail after video. <iframe src='x'></iframe>" + "</div>" + footer() + "</body></html>"
+    )
+
+
+def tiny_page() -> str:
+    return (
+        "<html><head><title>Example Domain</title></head><body><div><h1>Example Domain</h1>"
+        "<p>This domain is for use in illustrative examples in documents.</p>"
+        "<p><a href='https://www.iana.org/domains/example'>More information...</a></p></div></body></html>"
+    )
+
+
+# In generation order: every page draws from the same seeded generator
+PAGES = {
+    "news_article.html": news_article,
+    "docs_page.html": docs_page,
+    "forum_thread.html": forum_thread,
+    "shop_listing.html": shop_listing,
+    "spa_shell.html": spa_shell,
+    "blog_post.html": blog_post,
+    "tiny_page.html": tiny_page,
+}
+
+
+if __name__ == "__main__":
+    for name, build in PAGES.items():
+        html = build()
+        (OUT / name).write_text(html, encoding="utf-8")
+        print(f"{name:<20} {len(html.encode()):>9} bytes")
@@ -0,0 +1,94 @@
+"""
+Benchmark: dashboard aggregation over a rollup result set
+Compares a per-row Python loop (date.fromisoformat and a bucket lookup per
+row) with app.api.v1.dashboard.analytics over the per-day x category rows
+the endpoints read from aggregates: one conversion to NumPy arrays, then
+bincount for totals and per-day stacks. A week of one user's rollups is a
+few dozen rows, where either takes well under a millisecond; the row count
+argument shows how each approach scales.
+
+Usage: python -m scripts.bench_dashboard_analytics [rows]
+"""
+
+import random
+import sys
+import time
+from datetime import date, datetime, timedelta, timezone
+
+from app.api.v1.dashboard import analytics
+
+CATEGORIES = ["productive", "Social", "social_media", "Entertainment", "news", "shopping", "uncategorized"]
+
+
+def bucket_for(cat: str):
+    lc = cat.lower()
+    if lc in ("productive", "entertainment"):
+        return lc
+    if lc in ("social", "social_media", "socialmedia", "social-media"):
+        return "social"
+    return None
+
+
+def make_rows(n: int, start: datetime) -> list:
+    rng = random.Random(42)
+    return [
+        {
+            "day": (start.date() + timedelta(days=rng.randrange(-7, 7))).isoformat(),
+            "category": rng.choice(CATEGORIES),
+            "seconds": rng.uniform(0, 3600),
+        }
+        for _ in range(n)
+    ]
+
+
+def per_row(rows: list, start: datetime) -> tuple:
+    totals = {"total": 0.0, "productive": 0.0, "social": 0.0, "entertainment": 0.0}
+    days = [{"productive": 0.0, "social": 0.0, "entertainment": 0.0} for _ in range(7)]
+    for r in rows:
+        seconds = float(r["seconds"] or 0)
+        totals["total"] += seconds
+        bucket = bucket_for(r.get("category") or "uncategorized")
+        if bucket:
+            totals[bucket] += seconds
+            day_index = (date.fromisoformat(r["day"]) - start.date()).days
+            if 0 <= day_index < 7:
+                days[day_index][bucket] += seconds
+    return totals, days
+
+
+def vectorised(rows: list, start: datetime) -> tuple:
+    usage = analytics.from_rows(rows, start, bucket_for)
+    return analytics.totals(usage), analytics.daily(usage, 7)
+
+
+def timed(fn, *args, repeat: int = 3):
+    best, result = float("inf"), None
+    for _ in range(repeat):
+        started = time.perf_counter()
+        result = fn(*args)
+        best = min(best, time.perf_counter() - started)
+    return best, result
+
+
+def main(n: int) -> None:
+    start = datetime(2025, 3, 3, tzinfo=timezone.utc)
+    rows = make_rows(n, start)
+
+    t_old, (totals_old, days_old) = timed(per_row, rows, start)
+    t_new, (totals_new, days_new) = timed(vectorised, rows, start)
+
+    assert all(abs(totals_old[k] - totals_new[k]) < 1e-3 for k in totals_old)
+    assert all(abs(days_old[i][b] - days_new[i][j]) < 1e-3 for i in range(7) for j, b in enumerate(analytics.BUCKETS))
+
+    # Aggregation alone, once rows are arrays (e.g. several views of one result set)
+    usage = analytics.from_rows(rows, start, bucket_for)
+    t_agg, _ = timed(lambda: (analytics.totals(usage), analytics.daily(usage, 7)))
+
+    print(f"{n} rollup rows")
+    print(f"{'per-row loop':<22} {t_old * 1000:>9.1f} ms")
+    print(f"{'analytics':<22} {t_new * 1000:>9.1f} ms   ({t_old / t_new:.1f}x)")
+    print(f"{'  of which bincount':<22} {t_agg * 1000:>9.1f} ms")
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 100_000)
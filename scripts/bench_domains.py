@@ -0,0 +1,52 @@
+"""
+Benchmark: URL -> host / registrable domain
+Compares per-call tldextract.extract + urlparse (previous code paths) with
+the memoized app.core.domains.parse_url, cold and warm.
+
+Usage: python -m scripts.bench_domains [calls]
+"""
+
+import random
+import sys
+import time
+from urllib.parse import urlparse
+
+import tldextract
+
+from app.core.domains import parse_url
+
+HOSTS = [
+    "www.youtube.com", "news.bbc.co.uk", "github.com", "docs.python.org", "foo.github.io",
+    "mail.google.com", "www.reddit.com", "en.wikipedia.org", "stackoverflow.com", "localhost:8000",
+]
+
+
+def make_urls(calls: int, distinct: int = 2000) -> list:
+    rng = random.Random(42)
+    pool = [f"https://{rng.choice(HOSTS)}/page/{i}?ref={i % 7}" for i in range(distinct)]
+    return [rng.choice(pool) for _ in range(calls)]
+
+
+def previous(url: str):
+    parts = tldextract.extract(url)
+    return (urlparse(url).netloc or "").lower(), f"{parts.domain}.{parts.suffix}"
+
+
+def run(label: str, fn, urls: list) -> None:
+    started = time.perf_counter()
+    for u in urls:
+        fn(u)
+    elapsed = time.perf_counter() - started
+    print(f"{label:<28} {len(urls) / elapsed:>12.0f} calls/s   {elapsed / len(urls) * 1e6:>7.2f} us/call")
+
+
+if __name__ == "__main__":
+    calls = int(sys.argv[1]) if len(sys.argv) > 1 else 200_000
+    urls = make_urls(calls)
+    previous(urls[0])  # load the suffix list outside the timed loop
+    print(f"{calls} calls over {len(set(urls))} distinct URLs\n")
+    run("tldextract + urlparse", previous, urls)
+    parse_url.cache_clear()
+    run("parse_url (from empty cache)", parse_url, urls)
+    run("parse_url (warm cache)", parse_url, urls)
+    print(f"\n{parse_url.cache_info()}")
@@ -0,0 +1,82 @@
+"""
+Benchmark: page extraction engines
+Runs the BeautifulSoup and lxml extractors over the pages in
+scripts/bench_corpus and compares throughput, peak allocations and output
+parity (title, meta tags, visible text, text length).
+
+The corpus is mostly synthetic: seven generated pages (see
+scripts/bench_corpus/generate.py) that exercise the markup shapes the
+extractors must agree on. Two are real pages, saved from the Rust
+documentation (MIT / Apache-2.0):
+  - rust_book_chapter.html: "What is Ownership?" from The Rust Programming
+    Language (mdBook: sidebar navigation, scripts, comments inside prose)
+  - rustdoc_api_page.html: std::collections::HashMap (rustdoc, 1.90.0)
+
+Usage: python -m scripts.bench_scraper_engines [rounds]
+"""
+
+import sys
+import time
+import tracemalloc
+from pathlib import Path
+
+from app.scraper.scraper import _extract_with_bs4, _extract_with_lxml
+
+CORPUS = Path(__file__).parent / "bench_corpus"
+COMPARED = ("title", "meta_description", "meta_keywords", "meta_author", "visible_text", "text_length")
+ENGINES = {"bs4": _extract_with_bs4, "lxml": _extract_with_lxml}
+
+
+def load_corpus() -> dict:
+    return {p.name: p.read_text(encoding="utf-8") for p in sorted(CORPUS.glob("*.html"))}
+
+
+def throughput(extract, pages: dict, rounds: int) -> float:
+    """Pages per second over the whole corpus"""
+    started = time.perf_counter()
+    for _ in range(rounds):
+        for name, html in pages.items():
+            extract(f"https://example.com/{name}", html)
+    return rounds * len(pages) / (time.perf_counter() - started)
+
+
+def peak_allocations(extract, html: str) -> int:
+    """Peak Python-heap bytes during one extraction (libxml2's own C heap is not traced)"""
+    tracemalloc.start()
+    extract("https://example.com/page", html)
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return peak
+
+
+def check_parity(pages: dict) -> int:
+    mismatches = 0
+    for name, html in pages.items():
+        url = f"https://example.com/{name}"
+        expected, actual = _extract_with_bs4(url, html), _extract_with_lxml(url, html)
+        for key in COMPARED:
+            if expected[key] != actual[key]:
+                mismatches += 1
+                print(f"  MISMATCH {name} {key}: bs4={expected[key]!r:.80} lxml={actual[key]!r:.80}")
+    return mismatches
+
+
+if __name__ == "__main__":
+    rounds = int(sys.argv[1]) if len(sys.argv) > 1 else 5
+    pages = load_corpus()
+    total_kb = sum(len(h.encode("utf-8")) for h in pages.values()) / 1024
+    print(f"{len(pages)} pages, {total_kb:.0f} KB, {rounds} rounds\n")
+
+    print("Parity (lxml vs bs4):")
+    mismatches = check_parity(pages)
+    print(f"  {mismatches} mismatching fields\n")
+
+    rates = {label: throughput(fn, pages, rounds) for label, fn in ENGINES.items()}
+    for label, rate in rates.items():
+        print(f"{label:<6} {rate:>8.1f} pages/s")
+    print(f"lxml speedup: {rates['lxml'] / rates['bs4']:.1f}x\n")
+
+    print(f"{'page':<22} {'bs4 peak KB':>12} {'lxml peak KB':>13}")
+    for name, html in pages.items():
+        peaks = [peak_allocations(fn, html) / 1024 for fn in ENGINES.values()]
+        print(f"{name:<22} {peaks[0]:>12.0f} {peaks[1]:>13.0f}")
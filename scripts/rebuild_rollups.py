@@ -0,0 +1,59 @@
+"""
+Backfill / rebuild user_daily_rollups from page_view_sessions and
+content_analysis (docs/dashboard_rollups.sql must be applied first).
+
+Run once after installing the rollup triggers, and again after changing
+categorisation rules outside the API (saving a rule through
+/user_domain_category/save rebuilds that user's rollups): sessions keep the
+category they were counted under when written until they are rebuilt.
+
+Usage: python -m scripts.rebuild_rollups [user_id ...]   (default: every profile)
+"""
+
+import asyncio
+import sys
+import time
+from typing import AsyncIterator, List
+
+from app.core.database import db
+
+PAGE_SIZE = 1000
+
+
+async def all_user_ids() -> AsyncIterator[str]:
+    offset = 0
+    while True:
+        page = await db.profiles.ids(offset, PAGE_SIZE)
+        for row in page:
+            yield row["id"]
+        if len(page) < PAGE_SIZE:
+            return
+        offset += PAGE_SIZE
+
+
+async def given(user_ids: List[str]) -> AsyncIterator[str]:
+    for user_id in user_ids:
+        yield user_id
+
+
+async def main(argv: List[str]) -> int:
+    if not db.configured:
+        print("Supabase client not configured (SUPABASE_URL / SUPABASE_KEY)", file=sys.stderr)
+        return 1
+    started = time.perf_counter()
+    users = rows = 0
+    try:
+        async for user_id in given(argv) if argv else all_user_ids():
+            # One call per user keeps each transaction (and statement timeout) small
+            written = await db.rollups.rebuild(user_id)
+            users += 1
+            rows += written
+            print(f"{user_id}: {written} rollup rows")
+    finally:
+        await db.aclose()
+    print(f"Rebuilt {rows} rows for {users} users in {time.perf_counter() - started:.1f}s")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(asyncio.run(main(sys.argv[1:])))